@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""Compare the JSON backends of dcat.encoders over synthetic catalogs.
+
+The catalogs are plain dicts shaped like the output of Catalog.to_jsonld(),
+so no database is needed.
+
+    python benchmarks/bench_encoders.py --datasets 20000 --distributions 5
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django.conf import settings
+
+
+def synthetic_catalog(datasets, distributions):
+    return {
+        "@type": "dcat:Catalog",
+        "dct:title": "Synthetic catalog",
+        "dct:description": "A catalog with synthetic datasets.",
+        "dct:publisher": {"foaf:name": "Publisher", "@type": "foaf:Organization"},
+        "dcat:dataset": [
+            {
+                "dct:title": f"Dataset {i}",
+                "dct:description": "Datos de población por región — " * 4,
+                "dcat:keyword": ["population", "census", f"region-{i % 50}"],
+                "dcat:theme": [{"@type": "skos:Concept", "skos:notation": "SOCI", "skos:prefLabel": "Population and society"}],
+                "dct:modified": "2024-01-01",
+                "dcat:distribution": [
+                    {
+                        "@type": "dcat:Distribution",
+                        "dcat:accessURL": f"https://example.com/dataset/{i}/distribution/{j}",
+                        "dcat:downloadURL": f"https://example.com/files/{i}/{j}.csv",
+                        "dct:title": f"Distribution {j}",
+                        "dct:format": {"@type": "dct:MediaTypeOrExtent", "rdfs:label": "CSV"},
+                    }
+                    for j in range(distributions)
+                ],
+            }
+            for i in range(datasets)
+        ],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", type=int, default=20000)
+    parser.add_argument("--distributions", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    settings.configure()
+    from dcat import encoders
+
+    catalog = synthetic_catalog(args.datasets, args.distributions)
+    backends = [encoders.JSONBackend()]
+    if encoders.orjson is not None:
+        backends.append(encoders.OrjsonBackend())
+    else:
+        print("orjson is not installed, only the stdlib backend is measured.")
+
+    for backend in backends:
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            size = len(backend.dumps(catalog))
+            best = min(best, time.perf_counter() - start)
+        print(f"{backend.name:<8} {best:8.3f} s {size / 2**20:8.1f} MiB {size / 2**20 / best:8.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Compare Catalog.to_jsonld() with dcat.serializers.serialize_catalog().
+
+Builds a synthetic catalog in an in-memory SQLite database and reports the
+wall time and the peak of Python allocations of both serialization paths.
+
+    python benchmarks/bench_serializers.py --datasets 2000 --distributions 5
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+
+def setup():
+    settings.configure(
+        INSTALLED_APPS=["dcat"],
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+    )
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def populate(datasets, distributions):
+    from dcat.cards import suspend_card_updates
+    from dcat.models import Agent, Catalog, Dataset, DataTheme, Distribution, Keyword, MediaType
+
+    publisher = Agent.objects.create(name="Publisher", type="foaf:Organization")
+    catalog = Catalog.objects.create(title="Catalog", description="", publisher=publisher)
+    csv = MediaType.objects.create(extension="CSV", media_type="text/csv")
+    theme = DataTheme.objects.create(code="ECON", label="Economy")
+    keyword = Keyword.objects.create(name="budget", slug="budget")
+
+    with suspend_card_updates():
+        Dataset.objects.bulk_create(
+            Dataset(title=f"Dataset {i}", description="A dataset", catalog=catalog, publisher=publisher)
+            for i in range(datasets)
+        )
+        ids = list(Dataset.objects.values_list("pk", flat=True))
+        Dataset.themes.through.objects.bulk_create(
+            Dataset.themes.through(dataset_id=pk, datatheme=theme) for pk in ids
+        )
+        Dataset.keywords.through.objects.bulk_create(
+            Dataset.keywords.through(dataset_id=pk, keyword=keyword) for pk in ids
+        )
+        Distribution.objects.bulk_create(
+            Distribution(
+                dataset_id=pk,
+                title=f"Distribution {j}",
+                external_access_url="https://example.com/access",
+                format=csv,
+            )
+            for pk in ids
+            for j in range(distributions)
+        )
+    return catalog
+
+
+def measure(label, function):
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<30} {elapsed:8.3f} s {peak / 2**20:10.1f} MiB peak")
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--datasets", type=int, default=2000)
+    parser.add_argument("--distributions", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    from dcat.serializers import serialize_catalog
+
+    catalog = populate(args.datasets, args.distributions)
+    print(f"{args.datasets} datasets, {args.datasets * args.distributions} distributions")
+    model_time, model_peak = measure("Catalog.to_jsonld()", catalog.to_jsonld)
+    fast_time, fast_peak = measure("serialize_catalog()", lambda: serialize_catalog(catalog))
+    print(f"speedup: {model_time / fast_time:.1f}x, memory: {model_peak / fast_peak:.1f}x less")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""Measure the throughput of chunked uploads and the cost of resuming them.
+
+Uploads a random file through the upload views with several chunk sizes,
+using a temporary SQLite database and media directory, and reports the
+throughput of each one. Then it measures how long the first chunk takes
+after an upload is resumed by a process that doesn't have its hash in
+memory, which has to hash again the bytes already stored.
+
+    python benchmarks/bench_uploads.py --size-mb 512
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+
+def setup(directory):
+    settings.configure(
+        INSTALLED_APPS=[
+            "django.contrib.auth",
+            "django.contrib.contenttypes",
+            "django.contrib.sessions",
+            "dcat",
+        ],
+        MIDDLEWARE=[
+            "django.contrib.sessions.middleware.SessionMiddleware",
+            "django.contrib.auth.middleware.AuthenticationMiddleware",
+        ],
+        DATABASES={
+            "default": {
+                "ENGINE": "django.db.backends.sqlite3",
+                "NAME": os.path.join(directory, "db.sqlite3"),
+            }
+        },
+        ROOT_URLCONF=__name__,
+        SECRET_KEY="benchmark",
+        MEDIA_ROOT=os.path.join(directory, "media"),
+        DCAT_UPLOAD_MAX_CHUNK_SIZE=2**31,
+    )
+    django.setup()
+    from django.core.management import call_command
+    from django.urls import include, path
+
+    global urlpatterns
+    urlpatterns = [path("dcat/", include("dcat.urls"))]
+    call_command("migrate", verbosity=0)
+
+
+def client():
+    from django.contrib.auth.models import User
+    from django.test import Client
+
+    user, _ = User.objects.get_or_create(username="admin", is_superuser=True)
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def distribution():
+    from dcat.models import Agent, Catalog, Dataset, Distribution
+
+    publisher = Agent.objects.create(name="Publisher")
+    catalog = Catalog.objects.create(title="Catalog", publisher=publisher)
+    dataset = Dataset.objects.create(title="Dataset", catalog=catalog)
+    return Distribution.objects.create(dataset=dataset, title="File")
+
+
+def start(client, size):
+    from django.urls import reverse
+
+    response = client.post(
+        reverse("dcat:upload-start", args=[distribution().uuid]),
+        {"filename": "data.bin", "size": size},
+    )
+    return response["Location"]
+
+
+def send(client, url, offset, data):
+    response = client.patch(
+        url,
+        data,
+        content_type="application/offset+octet-stream",
+        headers={"Upload-Offset": str(offset)},
+    )
+    assert response.status_code == 200, response.content
+
+
+def upload(client, content, chunk_size):
+    url = start(client, len(content))
+    for offset in range(0, len(content), chunk_size):
+        send(client, url, offset, content[offset : offset + chunk_size])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--chunk-mb", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup(directory)
+        from dcat import uploads
+
+        http = client()
+        content = os.urandom(args.size_mb * 2**20)
+        print(f"{args.size_mb} MiB file")
+        for chunk_mb in args.chunk_mb:
+            start_time = time.perf_counter()
+            upload(http, content, chunk_mb * 2**20)
+            elapsed = time.perf_counter() - start_time
+            print(
+                f"  {f'{chunk_mb} MiB chunks':<28} {elapsed:8.3f} s "
+                f"{args.size_mb / elapsed:8.1f} MiB/s"
+            )
+
+        chunk_size = 8 * 2**20
+        half = len(content) // 2 // chunk_size * chunk_size
+        url = start(http, len(content))
+        for offset in range(0, half, chunk_size):
+            send(http, url, offset, content[offset : offset + chunk_size])
+        for label in ("resume, hash cached", "resume, hash lost"):
+            if label.endswith("lost"):
+                uploads._hashes.clear()
+            start_time = time.perf_counter()
+            send(http, url, half, content[half : half + chunk_size])
+            print(f"  {label:<28} {time.perf_counter() - start_time:8.3f} s")
+            half += chunk_size
+
+
+if __name__ == "__main__":
+    main()
@@ -4,37 +4,195 @@ from django.contrib import admin
 
 from dcat.models import (
     Catalog,
+    CatalogStatistics,
     Dataset,
+    DatasetCard,
     Distribution,
     Agent,
     MediaType,
     LicenceDocument,
     DataTheme,
+    HarvestSource,
     Keyword,
+    LinkCheck,
+    Task,
+    UploadSession,
 )
+from dcat.archive import archive_catalog, archive_datasets
+from dcat.paginators import EstimatedCountPaginator
+
+
+@admin.action(description="Archive selected catalogs and their datasets")
+def archive_selected_catalogs(modeladmin, request, queryset):
+    for catalog in queryset:
+        archive_catalog(catalog)
+    modeladmin.message_user(request, f"Archived {len(queryset)} catalogs.")
+
+
+@admin.action(description="Archive selected datasets")
+def archive_selected_datasets(modeladmin, request, queryset):
+    total = archive_datasets(queryset)
+    modeladmin.message_user(request, f"Archived {total} datasets.")
+
+
+class CatalogAdmin(admin.ModelAdmin):
+    list_display = ("title", "publisher")
+    list_select_related = ("publisher",)
+    search_fields = ("title",)
+    autocomplete_fields = ("publisher", "licence", "themes")
+    actions = [archive_selected_catalogs]
 
 
 class DatasetAdmin(admin.ModelAdmin):
+    list_display = ("title", "catalog", "publisher", "modified")
+    list_select_related = ("catalog", "publisher")
     search_fields = ("title",)
+    autocomplete_fields = ("catalog", "publisher", "themes", "keywords")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = [archive_selected_datasets]
 
 
 class DistributionAdmin(admin.ModelAdmin):
+    list_display = ("title", "dataset", "format")
+    list_select_related = ("dataset", "format")
     search_fields = ("title",)
+    autocomplete_fields = ("dataset", "format", "licence")
+    raw_id_fields = ("checksum",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class AgentAdmin(admin.ModelAdmin):
+    search_fields = ("name",)
+
+
+class MediaTypeAdmin(admin.ModelAdmin):
+    list_display = ("extension", "code", "media_type")
+    search_fields = ("extension", "code", "media_type")
+
+
+class LicenceDocumentAdmin(admin.ModelAdmin):
+    list_display = ("label", "code")
+    search_fields = ("label", "code")
 
 
 class KeywordAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ["name"]}
+    search_fields = ("name",)
 
 
 class DataThemeAdmin(admin.ModelAdmin):
     search_fields = ("label",)
 
 
-admin.site.register(Catalog)
+class DatasetCardAdmin(admin.ModelAdmin):
+    """Read-only listing of datasets backed by the denormalized cards."""
+
+    list_display = ("title", "publisher_name", "distribution_count", "modified")
+    search_fields = ("title",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class CatalogStatisticsAdmin(admin.ModelAdmin):
+    """Read-only statistics of the catalogs."""
+
+    list_display = (
+        "catalog",
+        "dataset_count",
+        "distribution_count",
+        "byte_size",
+        "last_modified",
+    )
+    list_select_related = ("catalog",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class LinkCheckAdmin(admin.ModelAdmin):
+    """Read-only results of the check_links command."""
+
+    list_display = ("url", "status", "latency_ms", "content_type", "checked_at")
+    list_filter = ("status",)
+    search_fields = ("url",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class TaskAdmin(admin.ModelAdmin):
+    """Read-only view of the background tasks and their progress."""
+
+    list_display = ("name", "status", "progress", "total", "attempts", "created_at")
+    list_filter = ("status", "name")
+    raw_id_fields = ("parent",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class UploadSessionAdmin(admin.ModelAdmin):
+    """Read-only view of the chunked uploads of distribution files."""
+
+    list_display = ("name", "offset", "size", "updated_at", "completed_at")
+    raw_id_fields = ("distribution",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class HarvestSourceAdmin(admin.ModelAdmin):
+    """Remote catalogs harvested by the harvest command, with their last result."""
+
+    list_display = ("url", "enabled", "status", "dataset_count", "harvested_at")
+    list_filter = ("enabled", "status")
+    search_fields = ("url",)
+    readonly_fields = (
+        "catalog",
+        "status",
+        "error",
+        "dataset_count",
+        "etag",
+        "last_modified",
+        "harvested_at",
+    )
+
+
+admin.site.register(Catalog, CatalogAdmin)
 admin.site.register(Dataset, DatasetAdmin)
+admin.site.register(DatasetCard, DatasetCardAdmin)
+admin.site.register(CatalogStatistics, CatalogStatisticsAdmin)
 admin.site.register(Distribution, DistributionAdmin)
-admin.site.register(Agent)
-admin.site.register(MediaType)
-admin.site.register(LicenceDocument)
-admin.site.register(DataTheme)
+admin.site.register(Agent, AgentAdmin)
+admin.site.register(MediaType, MediaTypeAdmin)
+admin.site.register(LicenceDocument, LicenceDocumentAdmin)
+admin.site.register(DataTheme, DataThemeAdmin)
 admin.site.register(Keyword, KeywordAdmin)
+admin.site.register(LinkCheck, LinkCheckAdmin)
+admin.site.register(Task, TaskAdmin)
+admin.site.register(UploadSession, UploadSessionAdmin)
+admin.site.register(HarvestSource, HarvestSourceAdmin)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DcatConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "dcat"
+
+    def ready(self):
+        from dcat import signals  # noqa: F401
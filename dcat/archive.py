@@ -0,0 +1,161 @@
+"""Archive catalogs and datasets at once, and purge them later in batches.
+
+Deleting a big catalog with ``Catalog.delete()`` makes Django load every
+dataset, distribution and many-to-many row to cascade the deletion and send
+signals, holding locks for minutes. Archiving only sets ``archived_at`` with
+one UPDATE per table: the default managers (``objects``) leave archived rows
+out, so they disappear from every feed, listing and lookup at once, and
+``all_objects`` still sees them.
+
+``purge_archived()`` deletes the rows archived before a date in batches of
+plain DELETE statements, without loading objects or sending signals. The
+files of the purged distributions are handed to a callback, so they can be
+removed by a background task.
+"""
+from django.db import models, transaction
+from django.utils import timezone
+
+from dcat.cache import invalidate_datasets
+from dcat.models import (
+    Catalog,
+    ChangeLogEntry,
+    Checksum,
+    Dataset,
+    DatasetCard,
+    Distribution,
+    UploadSession,
+)
+from dcat.stats import apply_differences, removal_differences
+
+
+def _raw_delete(queryset):
+    """Delete the rows of queryset with one DELETE, skipping the collector."""
+    return queryset._raw_delete(queryset.db)
+
+
+def _log_deleted(datasets, batch_size):
+    rows = datasets.values_list("pk", "uuid", "catalog_id")
+    entries = []
+    for pk, object_uuid, catalog_id in rows.iterator(chunk_size=batch_size):
+        entries.append(
+            ChangeLogEntry(
+                kind="dataset",
+                object_uuid=object_uuid,
+                action=ChangeLogEntry.DELETED,
+                dataset_id=pk,
+                catalog_id=catalog_id,
+            )
+        )
+        if len(entries) >= batch_size:
+            ChangeLogEntry.objects.bulk_create(entries)
+            entries = []
+    ChangeLogEntry.objects.bulk_create(entries)
+
+
+@transaction.atomic
+def archive_datasets(datasets, batch_size=1000):
+    """Archive the datasets of a queryset and their distributions.
+
+    Returns the number of archived datasets.
+    """
+    now = timezone.now()
+    ids = datasets.filter(archived_at__isnull=True).values("pk")
+    # The log entries are written first: archived datasets are no longer
+    # in the queryset after the update.
+    _log_deleted(Dataset.objects.filter(pk__in=ids), batch_size)
+    differences = removal_differences(Dataset.objects.filter(pk__in=ids))
+    invalidate_datasets(Dataset.objects.filter(pk__in=ids))
+    Distribution.objects.filter(dataset__in=ids).update(archived_at=now)
+    DatasetCard.objects.filter(dataset__in=ids).delete()
+    total = Dataset.objects.filter(pk__in=ids).update(archived_at=now)
+    apply_differences(differences)
+    return total
+
+
+@transaction.atomic
+def archive_catalog(catalog, batch_size=1000):
+    """Archive a catalog with all its datasets. Returns the number of datasets."""
+    Catalog.objects.filter(pk=catalog.pk).update(archived_at=timezone.now())
+    return archive_datasets(Dataset.all_objects.filter(catalog=catalog), batch_size)
+
+
+def delete_files(names):
+    """Delete the files of distributions from their storage."""
+    storage = Distribution._meta.get_field("file").storage
+    for name in names:
+        storage.delete(name)
+
+
+def _relations(model):
+    """Return the relations pointing to model, including the hidden ones."""
+    return [
+        field
+        for field in model._meta.get_fields(include_hidden=True)
+        if field.auto_created
+        and not field.concrete
+        and (field.one_to_many or field.one_to_one)
+    ]
+
+
+def _delete_rows(queryset, files):
+    """Delete queryset and the rows depending on it, following on_delete.
+
+    Every table is deleted with a single statement, without loading the
+    objects. The files of deleted distributions and unfinished uploads are
+    appended to files.
+    """
+    model = queryset.model
+    for relation in _relations(model):
+        name = relation.field.name
+        related = relation.related_model._base_manager.filter(
+            **{f"{name}__in": queryset}
+        )
+        if relation.on_delete is models.CASCADE:
+            _delete_rows(related, files)
+        elif relation.on_delete is models.SET_NULL:
+            related.update(**{name: None})
+        # DO_NOTHING (the change log) is left alone, and PROTECT or RESTRICT
+        # are enforced by the database constraints.
+
+    if model is Distribution:
+        checksums = list(
+            queryset.exclude(checksum=None).values_list("checksum", flat=True)
+        )
+        files.extend(name for name in queryset.values_list("file", flat=True) if name)
+        deleted = _raw_delete(queryset)
+        _raw_delete(Checksum.objects.filter(pk__in=checksums))
+        return deleted
+    if model is UploadSession:
+        # The file of a complete upload is the file of its distribution.
+        files.extend(
+            queryset.filter(completed_at__isnull=True).values_list("name", flat=True)
+        )
+    return _raw_delete(queryset)
+
+
+def _purge(queryset, batch_size, on_files):
+    total = 0
+    while ids := list(queryset.values_list("pk", flat=True)[:batch_size]):
+        batch = queryset.model._base_manager.filter(pk__in=ids)
+        files = []
+        with transaction.atomic():
+            total += _delete_rows(batch, files)
+            if files:
+                transaction.on_commit(lambda files=files: on_files(files))
+    return total
+
+
+def purge_archived(before=None, batch_size=1000, on_files=delete_files):
+    """Delete the catalogs and datasets archived before a date, in batches.
+
+    Every batch is deleted in its own transaction, so locks are held for a
+    short time. The names of the files of the deleted distributions are
+    passed to ``on_files`` once the batch commits. Returns the number of
+    purged datasets.
+    """
+    before = before or timezone.now()
+    datasets = Dataset.all_objects.filter(archived_at__lt=before).order_by("pk")
+    total = _purge(datasets, batch_size, on_files)
+    catalogs = Catalog.all_objects.filter(archived_at__lt=before).order_by("pk")
+    _purge(catalogs, batch_size, on_files)
+    return total
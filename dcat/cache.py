@@ -0,0 +1,416 @@
+"""Cache the JSON-LD of datasets, distributions and agents.
+
+Rendering a dataset reads its publisher, themes, keywords, formats and
+licences, rows that are shared by thousands of datasets and rarely change.
+Set DCAT_CACHE to the name of a Django cache to cache them in two tiers:
+
+- the rows of the vocabularies (agents, themes, keywords, media types and
+  licences) are kept in memory by every process, in an LRU cache bounded by
+  DCAT_ROW_CACHE_SIZE entries, each kept at most DCAT_ROW_CACHE_TTL seconds;
+- the rendered documents are stored in the DCAT_CACHE cache for
+  DCAT_CACHE_TIMEOUT seconds.
+
+Documents aren't deleted to invalidate them: they are stored with versions,
+random tokens kept in the DCAT_CACHE cache, and a change drops the versions
+it makes stale (see dcat.signals), so the next read makes new ones and the
+old documents are never used again. Every document depends on a global
+version, on the version of its object and on the versions of the rows it was
+rendered from; a cached row depends on the global version and on its own.
+Queries that skip the signals (bulk updates, archiving) call
+``invalidate_objects()``, ``invalidate_datasets()``, ``invalidate_rows()`` or
+``invalidate()`` themselves.
+
+The versions are how processes tell each other about changes, so DCAT_CACHE
+must be shared by every process writing or serving DCAT objects, workers and
+management commands included: the system checks warn about a local-memory
+cache. Caching is off when DCAT_CACHE is None, the default.
+
+``stats()`` returns the hits and misses of both tiers in this process.
+"""
+import collections
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Prefetch
+
+from dcat.encoders import dumps
+from dcat.jsonld import CONTEXT
+from dcat.models import (
+    Agent,
+    Dataset,
+    DataTheme,
+    Distribution,
+    Keyword,
+    LicenceDocument,
+    MediaType,
+)
+
+GLOBAL_VERSION = "dcat:version"
+# Invalidating more objects at once drops the global version instead.
+MAX_OBJECT_VERSIONS = 1000
+
+
+def _statistics(hits, misses, **extra):
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / total if total else 0.0,
+        **extra,
+    }
+
+
+class LRUCache:
+    """A thread-safe in-memory cache bounded in size and in time.
+
+    Every entry is stored with a version: getting it with another version,
+    or after ``ttl`` seconds, is a miss. Once ``maxsize`` entries are stored,
+    the least recently used ones are evicted.
+    """
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = self.misses = self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version=None, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, entry_version, expires = entry
+                if entry_version == version and self.clock() < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, version=None):
+        with self._lock:
+            self._entries[key] = (value, version, self.clock() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return _statistics(
+                self.hits,
+                self.misses,
+                evictions=self.evictions,
+                size=len(self._entries),
+            )
+
+
+_rows = None
+
+
+def row_cache():
+    """Return the in-memory cache of vocabulary rows of this process."""
+    global _rows
+    if _rows is None:
+        _rows = LRUCache(
+            getattr(settings, "DCAT_ROW_CACHE_SIZE", 10000),
+            getattr(settings, "DCAT_ROW_CACHE_TTL", 300),
+        )
+    return _rows
+
+
+def fragment_cache():
+    """Return the Django cache of the documents, or None if caching is off."""
+    alias = getattr(settings, "DCAT_CACHE", None)
+    return None if alias is None else caches[alias]
+
+
+@checks.register(checks.Tags.caches)
+def check_cache(app_configs, **kwargs):
+    alias = getattr(settings, "DCAT_CACHE", None)
+    if alias is None:
+        return []
+    if alias not in settings.CACHES:
+        return [
+            checks.Error(f"DCAT_CACHE names an unknown cache: {alias}.", id="dcat.E001")
+        ]
+    if settings.CACHES[alias]["BACKEND"].endswith(".LocMemCache"):
+        return [
+            checks.Warning(
+                f"DCAT_CACHE names a local-memory cache: {alias}.",
+                hint="The changes made by other processes (workers, management "
+                "commands) don't invalidate its documents. Use a cache shared by "
+                "every process, such as Redis or Memcached.",
+                id="dcat.W001",
+            )
+        ]
+    return []
+
+
+def fragment_timeout():
+    return getattr(settings, "DCAT_CACHE_TIMEOUT", 3600)
+
+
+def _row_version_key(model, pk):
+    return f"{GLOBAL_VERSION}:row:{model._meta.label_lower}:{pk}"
+
+
+def get_rows(model, pks, version, dependencies):
+    """Return ``{pk: instance}`` for the rows of model, cached when valid.
+
+    A row is cached for the global version and for its own, which is added
+    to dependencies, a dictionary of ``{version key: version}``.
+    """
+    keys = {pk: _row_version_key(model, pk) for pk in set(pks)}
+    if not keys:
+        return {}
+    dependencies.update(
+        zip(keys.values(), _get_versions(fragment_cache(), list(keys.values())))
+    )
+    cache = row_cache()
+    label = model._meta.label
+    rows = {}
+    missing = []
+    for pk, key in keys.items():
+        row = cache.get((label, pk), (version, dependencies[key]))
+        if row is None:
+            missing.append(pk)
+        else:
+            rows[pk] = row
+    if missing:
+        for pk, row in model.objects.in_bulk(missing).items():
+            cache.set((label, pk), row, (version, dependencies[keys[pk]]))
+            rows[pk] = row
+    return rows
+
+
+def _version_key(kind, object_uuid):
+    return f"{GLOBAL_VERSION}:{kind}:{object_uuid}"
+
+
+def _get_versions(cache, keys):
+    """Return the versions stored at keys, storing new ones where missing."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            token = uuid.uuid4().hex
+            if not cache.add(key, token, None):
+                token = cache.get(key) or token
+            versions[key] = token
+    return [versions[key] for key in keys]
+
+
+def _drop_versions(keys):
+    cache = fragment_cache()
+    if cache is None:
+        return
+    cache.delete_many(keys)
+    # Again after the commit: the old rows may have been cached meanwhile.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate():
+    """Invalidate every cached document and row."""
+    _drop_versions([GLOBAL_VERSION])
+
+
+def invalidate_rows(model, pks):
+    """Invalidate the cached rows of model and the documents rendered from them."""
+    keys = [_row_version_key(model, pk) for pk in pks]
+    if len(keys) > MAX_OBJECT_VERSIONS:
+        invalidate()
+    elif keys:
+        _drop_versions(keys)
+
+
+def invalidate_objects(kind, uuids):
+    """Invalidate the documents of the objects of a kind identified by uuids."""
+    keys = [_version_key(kind, object_uuid) for object_uuid in uuids]
+    if len(keys) > MAX_OBJECT_VERSIONS:
+        invalidate()
+    elif keys:
+        _drop_versions(keys)
+
+
+def invalidate_datasets(datasets):
+    """Invalidate the documents of a Dataset queryset and of its distributions."""
+    for kind, uuids in (
+        ("dataset", datasets.values_list("uuid", flat=True)),
+        (
+            "distribution",
+            Distribution.all_objects.filter(
+                dataset__in=datasets.values("pk")
+            ).values_list("uuid", flat=True),
+        ),
+    ):
+        uuids = list(uuids[: MAX_OBJECT_VERSIONS + 1])
+        if len(uuids) > MAX_OBJECT_VERSIONS:
+            invalidate()
+            return
+        invalidate_objects(kind, uuids)
+
+
+# Loaders
+
+
+def _set_prefetched(instance, name, objects):
+    """Make ``getattr(instance, name).all()`` return objects without a query."""
+    queryset = getattr(instance, name).all()
+    queryset._result_cache = list(objects)
+    queryset._prefetch_done = True
+    instance.__dict__.setdefault("_prefetched_objects_cache", {})[name] = queryset
+
+
+def _attach_rows(distributions, version, dependencies):
+    formats = get_rows(
+        MediaType,
+        [d.format_id for d in distributions if d.format_id],
+        version,
+        dependencies,
+    )
+    licences = get_rows(
+        LicenceDocument,
+        [d.licence_id for d in distributions if d.licence_id],
+        version,
+        dependencies,
+    )
+    for distribution in distributions:
+        if distribution.format_id in formats:
+            distribution.format = formats[distribution.format_id]
+        if distribution.licence_id in licences:
+            distribution.licence = licences[distribution.licence_id]
+
+
+def _prefetch_rows(dataset, name, model, version, dependencies):
+    """Prefetch the many-to-many rows of dataset.name from the row cache."""
+    through = getattr(Dataset, name).through
+    ids = list(
+        through.objects.filter(dataset_id=dataset.pk)
+        .order_by("pk")
+        .values_list(f"{model._meta.model_name}_id", flat=True)
+    )
+    rows = get_rows(model, ids, version, dependencies)
+    _set_prefetched(dataset, name, [rows[pk] for pk in ids if pk in rows])
+
+
+def _load_dataset(object_uuid, version, dependencies):
+    dataset = (
+        Dataset.objects.prefetch_related(
+            Prefetch(
+                "distribution_set",
+                queryset=Distribution.objects.select_related("checksum"),
+            ),
+        )
+        .filter(uuid=object_uuid)
+        .first()
+    )
+    if dataset is None:
+        return None
+    if dataset.publisher_id is not None:
+        publishers = get_rows(Agent, [dataset.publisher_id], version, dependencies)
+        if dataset.publisher_id in publishers:
+            dataset.publisher = publishers[dataset.publisher_id]
+    _prefetch_rows(dataset, "themes", DataTheme, version, dependencies)
+    _prefetch_rows(dataset, "keywords", Keyword, version, dependencies)
+    _attach_rows(list(dataset.distribution_set.all()), version, dependencies)
+    return dataset
+
+
+def _load_distribution(object_uuid, version, dependencies):
+    distribution = (
+        Distribution.objects.select_related("checksum").filter(uuid=object_uuid).first()
+    )
+    if distribution is not None:
+        _attach_rows([distribution], version, dependencies)
+    return distribution
+
+
+def _load_agent(object_uuid, version, dependencies):
+    # Read through the row cache, so the document depends on the row version.
+    pk = Agent.objects.filter(uuid=object_uuid).values_list("pk", flat=True).first()
+    if pk is None:
+        return None
+    return get_rows(Agent, [pk], version, dependencies).get(pk)
+
+
+LOADERS = {
+    "dataset": _load_dataset,
+    "distribution": _load_distribution,
+    "agent": _load_agent,
+}
+
+# Without the cache, the querysets fetching everything to_jsonld() needs.
+_QUERYSETS = {
+    "dataset": lambda: Dataset.objects.for_jsonld(),
+    "distribution": lambda: Distribution.objects.for_jsonld(),
+    "agent": Agent.objects.all,
+}
+
+_fragments = {"hits": 0, "misses": 0}
+_fragments_lock = threading.Lock()
+
+
+def _count_fragment(hit):
+    with _fragments_lock:
+        _fragments["hits" if hit else "misses"] += 1
+
+
+def _render(obj):
+    return dumps({"@context": CONTEXT, **obj.to_jsonld()})
+
+
+def get_resource_jsonld(kind, object_uuid):
+    """Return the encoded JSON-LD document of a resource of one of LOADERS.
+
+    Returns None when the resource doesn't exist (or is archived).
+    """
+    cache = fragment_cache()
+    if cache is None:
+        obj = _QUERYSETS[kind]().filter(uuid=object_uuid).first()
+        return None if obj is None else _render(obj)
+
+    global_version, object_version = _get_versions(
+        cache, [GLOBAL_VERSION, _version_key(kind, object_uuid)]
+    )
+    key = f"dcat:jsonld:{kind}:{object_uuid}:{global_version}:{object_version}"
+    cached = cache.get(key)
+    if cached is not None:
+        dependencies, content = cached
+        if not dependencies or cache.get_many(list(dependencies)) == dependencies:
+            _count_fragment(True)
+            return content
+    _count_fragment(False)
+
+    dependencies = {}
+    obj = LOADERS[kind](object_uuid, global_version, dependencies)
+    if obj is None:
+        return None
+    content = _render(obj)
+    cache.set(key, (dependencies, content), fragment_timeout())
+    return content
+
+
+def stats():
+    """Return the hits, misses and hit ratio of the rows and of the documents."""
+    with _fragments_lock:
+        fragments = _statistics(**_fragments)
+    return {"rows": row_cache().stats(), "fragments": fragments}
+
+
+def reset():
+    """Empty the row cache of this process and reset the statistics."""
+    with _fragments_lock:
+        _fragments.update(hits=0, misses=0)
+    row_cache().clear()
@@ -0,0 +1,93 @@
+"""Build and refresh the denormalized DatasetCard rows.
+
+A card holds everything a listing page shows about a Dataset (publisher name,
+theme labels, keywords, distribution count and formats), so listings read a
+single table instead of joining six of them.
+"""
+import contextlib
+import contextvars
+
+from django.db.models import Prefetch
+
+from dcat.models import Dataset, DatasetCard, Distribution
+
+_updates_suspended = contextvars.ContextVar("dcat_card_updates_suspended", default=False)
+
+
+@contextlib.contextmanager
+def suspend_card_updates():
+    """Don't refresh cards from signals inside this block.
+
+    Useful for bulk imports, which should refresh the cards once at the end.
+    """
+    token = _updates_suspended.set(True)
+    try:
+        yield
+    finally:
+        _updates_suspended.reset(token)
+
+
+def card_updates_suspended():
+    return _updates_suspended.get()
+
+
+def build_card(dataset):
+    """Return an unsaved DatasetCard for a dataset.
+
+    The dataset is expected to come from a queryset with publisher, themes,
+    keywords and distribution formats already fetched.
+    """
+    distributions = dataset.distribution_set.all()
+    formats = {d.format.extension for d in distributions if d.format is not None}
+    return DatasetCard(
+        dataset=dataset,
+        catalog_id=dataset.catalog_id,
+        title=dataset.title,
+        publisher_name=dataset.publisher.name if dataset.publisher else "",
+        theme_labels=sorted(theme.label for theme in dataset.themes.all()),
+        keyword_names=sorted(keyword.name for keyword in dataset.keywords.all()),
+        distribution_count=len(distributions),
+        formats=sorted(formats),
+        modified=dataset.modified,
+    )
+
+
+def refresh_dataset_cards(datasets=None, batch_size=500):
+    """Rebuild the cards of a Dataset queryset (all datasets if None).
+
+    Returns the number of cards written. Datasets are read in chunks and
+    cards are upserted in batches, so memory stays bounded.
+    """
+    if datasets is None:
+        datasets = Dataset.objects.all()
+    datasets = datasets.select_related("publisher").prefetch_related(
+        "themes",
+        "keywords",
+        Prefetch("distribution_set", queryset=Distribution.objects.select_related("format")),
+    )
+
+    total = 0
+    cards = []
+    for dataset in datasets.iterator(chunk_size=batch_size):
+        cards.append(build_card(dataset))
+        if len(cards) >= batch_size:
+            total += _save_cards(cards)
+            cards = []
+    if cards:
+        total += _save_cards(cards)
+    return total
+
+
+def _save_cards(cards):
+    update_fields = [
+        field.name
+        for field in DatasetCard._meta.concrete_fields
+        if not field.primary_key
+    ]
+    DatasetCard.objects.bulk_create(
+        cards,
+        update_conflicts=True,
+        unique_fields=["dataset"],
+        update_fields=update_fields,
+    )
+    return len(cards)
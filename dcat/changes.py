@@ -0,0 +1,104 @@
+"""Change feed for incremental harvesting.
+
+Every create, update or delete of a Dataset or Distribution appends a
+ChangeLogEntry (see dcat.signals). Harvesters remember the last sequence
+number they saw and ask for the changes since then: ``changes_since()``
+returns the JSON-LD of every dataset that changed (a change in a distribution,
+including its deletion, is a change in its dataset) and the IRIs of every
+deleted resource.
+
+``compact_changelog()`` drops the entries superseded by a newer one for the
+same object, so the log doesn't grow without bounds.
+"""
+from django.db.models import Max
+
+from dcat.iris import build_iri
+from dcat.models import ChangeLogEntry, Dataset
+from dcat.serializers import iter_datasets
+
+
+def record_change(kind, obj, action):
+    """Append an entry to the change log for a Dataset or Distribution."""
+    dataset = obj if kind == "dataset" else obj.dataset
+    ChangeLogEntry.objects.create(
+        kind=kind,
+        object_uuid=obj.uuid,
+        action=action,
+        dataset_id=dataset.pk,
+        catalog_id=dataset.catalog_id,
+    )
+
+
+def record_updates(datasets, action=ChangeLogEntry.UPDATED):
+    """Log an action (an update by default) on every dataset changed by bulk queries."""
+    ChangeLogEntry.objects.bulk_create(
+        [
+            ChangeLogEntry(
+                kind="dataset",
+                object_uuid=object_uuid,
+                action=action,
+                dataset_id=pk,
+                catalog_id=catalog_id,
+            )
+            for pk, object_uuid, catalog_id in datasets.values_list(
+                "pk", "uuid", "catalog_id"
+            )
+        ]
+    )
+
+
+def changes_since(sequence=0, since=None, catalog=None, limit=1000):
+    """Return the changes after the sequence number, or the datetime since.
+
+    At most ``limit`` log entries are read. The result contains the sequence
+    number to use in the next call and ``has_more`` when there are entries
+    left to read.
+    """
+    entries = ChangeLogEntry.objects.order_by("id")
+    if since is not None:
+        entries = entries.filter(timestamp__gte=since)
+    else:
+        entries = entries.filter(id__gt=sequence)
+    if catalog is not None:
+        entries = entries.filter(catalog_id=catalog.pk)
+
+    rows = list(
+        entries.values_list("id", "kind", "object_uuid", "action", "dataset_id")[
+            : limit + 1
+        ]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    deleted = {}
+    changed_datasets = set()
+    for _, kind, object_uuid, action, dataset_id in rows:
+        if action == ChangeLogEntry.DELETED:
+            deleted[build_iri(kind, object_uuid)] = None
+        # Deleted datasets are just not found below.
+        changed_datasets.add(dataset_id)
+
+    datasets = Dataset.objects.filter(pk__in=changed_datasets)
+    return {
+        "sequence": rows[-1][0] if rows else sequence,
+        "has_more": has_more,
+        "dcat:dataset": list(iter_datasets(datasets)),
+        "deleted": list(deleted),
+    }
+
+
+def compact_changelog(before):
+    """Delete the entries older than before superseded by a newer entry.
+
+    The latest entry of every object is kept, so a harvester reading from an
+    old sequence number still gets the current state of every object.
+    Returns the number of deleted entries.
+    """
+    old_entries = ChangeLogEntry.objects.filter(timestamp__lt=before)
+    latest = (
+        ChangeLogEntry.objects.values("kind", "object_uuid")
+        .annotate(latest=Max("id"))
+        .values("latest")
+    )
+    deleted, _ = old_entries.exclude(id__in=latest).delete()
+    return deleted
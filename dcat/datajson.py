@@ -0,0 +1,134 @@
+"""Export catalogs to data.json (DCAT-US 1.1), the format import_from_datajson reads.
+
+The document mirrors what ckanext-datajson produces, so a catalog exported
+here and imported again with import_from_datajson gets the same metadata. It
+is streamed dataset by dataset from chunked querysets, so memory stays
+bounded no matter the size of the catalog.
+
+Schema: https://resources.data.gov/resources/dcat-us/
+"""
+import os
+import shutil
+
+from dcat.encoders import dumps
+from dcat.models import Dataset, Distribution
+
+SCHEMA = "https://project-open-data.cio.gov/v1.1/schema"
+
+
+def _publisher(agent):
+    result = {"@type": "org:Organization", "name": agent.name}
+    # An empty address is kept apart from a missing one (None).
+    if agent.mbox is not None:
+        result["mbox"] = agent.mbox
+    return result
+
+
+def file_name(distribution):
+    """Return the name of the local file of a distribution, or ""."""
+    return os.path.basename(distribution.file.name) if distribution.file else ""
+
+
+def distribution_to_datajson(distribution):
+    result = dict()
+    result["@type"] = "dcat:Distribution"
+    result["identifier"] = str(distribution.uuid)
+    result["title"] = distribution.title
+    if distribution.description:
+        result["description"] = distribution.description
+    if distribution.file:
+        result["fileName"] = file_name(distribution)
+    if distribution.download_url:
+        result["downloadURL"] = distribution.download_url
+    if distribution.external_access_url:
+        result["accessURL"] = distribution.external_access_url
+    if distribution.format:
+        result["format"] = distribution.format.extension
+        if distribution.format.media_type:
+            result["mediaType"] = distribution.format.media_type
+    if distribution.licence:
+        result["license"] = distribution.licence.label
+    return result
+
+
+def dataset_to_datajson(dataset):
+    result = dict()
+    result["@type"] = "dcat:Dataset"
+    result["identifier"] = str(dataset.uuid)
+    result["title"] = dataset.title
+    result["description"] = dataset.description
+    if dataset.publisher:
+        result["publisher"] = _publisher(dataset.publisher)
+    result["keyword"] = [keyword.name for keyword in dataset.keywords.all()]
+    themes = [theme.code for theme in dataset.themes.all()]
+    if themes:
+        result["theme"] = themes
+    if dataset.issued:
+        result["issued"] = dataset.issued.isoformat()
+    if dataset.modified:
+        result["modified"] = dataset.modified.isoformat()
+    if dataset.landing_page:
+        result["landingPage"] = dataset.landing_page
+    result["distribution"] = [
+        distribution_to_datajson(d) for d in dataset.distribution_set.all()
+    ]
+    return result
+
+
+def catalog_to_datajson(catalog):
+    """Return the data.json of catalog without its datasets."""
+    result = dict()
+    result["@type"] = "dcat:Catalog"
+    result["conformsTo"] = SCHEMA
+    result["describedBy"] = f"{SCHEMA}/catalog.json"
+    result["title"] = catalog.title
+    result["description"] = catalog.description
+    result["publisher"] = _publisher(catalog.publisher)
+    if catalog.licence:
+        result["license"] = catalog.licence.label
+    result["themeTaxonomy"] = [
+        {"id": theme.code, "label": theme.label, "description": theme.description}
+        for theme in catalog.themes.order_by("code")
+    ]
+    return result
+
+
+def iter_datasets(catalog, chunk_size=1000):
+    """Yield every dataset of catalog, reading them in chunks."""
+    datasets = Dataset.objects.filter(catalog=catalog).for_jsonld().order_by("pk")
+    yield from datasets.iterator(chunk_size=chunk_size)
+
+
+def iter_datajson(catalog, chunk_size=1000):
+    """Yield the data.json document of catalog as encoded chunks of bytes."""
+    # Reopen the encoded catalog to append the datasets to it.
+    yield dumps(catalog_to_datajson(catalog))[:-1]
+    yield b',"dataset":['
+    for i, dataset in enumerate(iter_datasets(catalog, chunk_size=chunk_size)):
+        encoded = dumps(dataset_to_datajson(dataset))
+        yield encoded if i == 0 else b"," + encoded
+    yield b"]}"
+
+
+def export_files(catalog, datapath):
+    """Copy the local files of catalog to the folder layout the importer reads.
+
+    Files are copied to ``datapath/{dataset identifier}/{distribution identifier}/``.
+    Returns the number of copied files.
+    """
+    distributions = (
+        Distribution.objects.filter(dataset__catalog=catalog)
+        .exclude(file="")
+        .select_related("dataset")
+    )
+    total = 0
+    for distribution in distributions.iterator():
+        folder = os.path.join(
+            datapath, str(distribution.dataset.uuid), str(distribution.uuid)
+        )
+        os.makedirs(folder, exist_ok=True)
+        with distribution.file.open(mode="rb") as source:
+            with open(os.path.join(folder, file_name(distribution)), "wb") as target:
+                shutil.copyfileobj(source, target)
+        total += 1
+    return total
@@ -0,0 +1,237 @@
+"""Find and merge duplicated Agents, Keywords and Licences.
+
+The importers create these objects with ``get_or_create()`` on their exact
+name, so "Ministry of Health", "ministry of health " and "Ministry of Heath"
+end up as three rows. ``find_duplicates()`` groups them:
+
+* The name of every object is normalized (case, accents, punctuation and
+  spacing) and objects are split in blocks by the first characters of the
+  normalized name, so only objects of the same block are compared.
+* Inside a block, objects with the same hashed name are duplicates, and so
+  are the ones with similar names when a ``threshold`` below 1 is given.
+* Objects with different non-empty values in the ``compatible`` fields of
+  the spec (for example two agents with different emails) are never merged.
+
+``merge()`` keeps one object of every group, repoints the foreign keys and
+many-to-many rows of the others to it with bulk queries, and deletes them.
+"""
+import collections
+import difflib
+import hashlib
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+
+from dcat.cache import invalidate_datasets
+from dcat.cards import refresh_dataset_cards
+from dcat.changes import record_updates
+from dcat.models import Agent, Dataset, Distribution, Keyword, LicenceDocument
+
+BLOCK_SIZE = 3
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(value):
+    """Return value without accents, case, punctuation and extra spaces."""
+    value = unicodedata.normalize("NFKD", value or "")
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return " ".join(_NON_WORD.sub(" ", value.casefold()).split())
+
+
+def _digest(key):
+    return hashlib.blake2b(key.encode(), digest_size=8).digest()
+
+
+def similar(a, b, threshold):
+    """Return True if the similarity ratio of a and b reaches threshold."""
+    matcher = difflib.SequenceMatcher(None, a, b)
+    # The quick ratios are upper bounds of ratio(): skip it when they fail.
+    return (
+        matcher.real_quick_ratio() >= threshold
+        and matcher.quick_ratio() >= threshold
+        and matcher.ratio() >= threshold
+    )
+
+
+class Spec:
+    """How to find the duplicates of a model.
+
+    ``field`` holds the name compared between objects. Non-empty values of
+    the ``compatible`` fields must be equal for two objects to be merged; the
+    object with more of them filled (then the oldest) survives the merge.
+    """
+
+    def __init__(self, model, field, compatible=()):
+        self.model = model
+        self.field = field
+        self.compatible = compatible
+
+
+SPECS = {
+    "agent": Spec(Agent, "name", compatible=("mbox", "type")),
+    "keyword": Spec(Keyword, "name"),
+    "licence": Spec(LicenceDocument, "label", compatible=("code", "url_general")),
+}
+
+
+class Candidate:
+    __slots__ = ("pk", "value", "key", "compatible")
+
+    def __init__(self, pk, value, compatible):
+        self.pk = pk
+        self.value = value
+        self.key = normalize(value)
+        self.compatible = {name: normalize(v) for name, v in compatible.items() if v}
+
+
+class Cluster:
+    """An object and its duplicates."""
+
+    def __init__(self, survivor):
+        self.survivor = survivor
+        self.duplicates = []
+        self.compatible = dict(survivor.compatible)
+
+    def accepts(self, candidate):
+        return all(
+            self.compatible.get(name, value) == value
+            for name, value in candidate.compatible.items()
+        )
+
+    def add(self, candidate):
+        self.duplicates.append(candidate)
+        for name, value in candidate.compatible.items():
+            self.compatible.setdefault(name, value)
+
+    def to_dict(self):
+        return {
+            "survivor": {"pk": self.survivor.pk, "value": self.survivor.value},
+            "duplicates": [{"pk": d.pk, "value": d.value} for d in self.duplicates],
+        }
+
+
+def find_duplicates(spec, threshold=1.0):
+    """Return the Clusters of duplicated objects of spec.model.
+
+    With the default threshold only objects with the same normalized name
+    are duplicates.
+    """
+    rows = spec.model.objects.order_by("pk").values_list(
+        "pk", spec.field, *spec.compatible
+    )
+    blocks = collections.defaultdict(list)
+    for pk, value, *compatible in rows.iterator():
+        candidate = Candidate(pk, value, dict(zip(spec.compatible, compatible)))
+        if candidate.key:
+            blocks[candidate.key[:BLOCK_SIZE]].append(candidate)
+
+    clusters = []
+    for block in blocks.values():
+        block.sort(key=lambda c: (-len(c.compatible), c.pk))
+        block_clusters = []
+        by_digest = collections.defaultdict(list)
+        for candidate in block:
+            digest = _digest(candidate.key)
+            cluster = next(
+                (c for c in by_digest[digest] if c.accepts(candidate)), None
+            )
+            if cluster is None and threshold < 1:
+                cluster = next(
+                    (
+                        c
+                        for c in block_clusters
+                        if c.accepts(candidate)
+                        and similar(c.survivor.key, candidate.key, threshold)
+                    ),
+                    None,
+                )
+            if cluster is None:
+                cluster = Cluster(candidate)
+                block_clusters.append(cluster)
+            else:
+                cluster.add(candidate)
+            by_digest[digest].append(cluster)
+        clusters.extend(c for c in block_clusters if c.duplicates)
+    return sorted(clusters, key=lambda c: c.survivor.pk)
+
+
+def _repoint_foreign_key(rel, mapping, batch_size):
+    """Point the rows referencing a duplicate to its survivor."""
+    model = rel.related_model
+    field = rel.field
+    datasets = set()
+    items = list(mapping.items())
+    for i in range(0, len(items), batch_size):
+        chunk = dict(items[i : i + batch_size])
+        rows = model._base_manager.filter(**{f"{field.attname}__in": chunk})
+        if model is Dataset:
+            datasets.update(rows.values_list("pk", flat=True))
+        elif model is Distribution:
+            datasets.update(rows.values_list("dataset_id", flat=True))
+        rows.update(
+            **{
+                field.attname: Case(
+                    *[
+                        When(**{field.attname: dup}, then=Value(survivor))
+                        for dup, survivor in chunk.items()
+                    ],
+                    output_field=field.target_field,
+                )
+            }
+        )
+    return datasets
+
+
+def _repoint_many_to_many(rel, mapping, batch_size):
+    """Replace the many-to-many rows of a duplicate by rows of its survivor.
+
+    Objects related to both the duplicate and the survivor keep one row.
+    """
+    through = rel.through
+    source = f"{rel.field.m2m_field_name()}_id"
+    target = f"{rel.field.m2m_reverse_field_name()}_id"
+    datasets = set()
+    duplicates = list(mapping)
+    for i in range(0, len(duplicates), batch_size):
+        chunk = duplicates[i : i + batch_size]
+        rows = through.objects.filter(**{f"{target}__in": chunk})
+        pairs = list(rows.values_list(source, target))
+        merged = {(s, mapping[t]) for s, t in pairs}
+        through.objects.bulk_create(
+            [through(**{source: s, target: t}) for s, t in merged],
+            ignore_conflicts=True,
+        )
+        rows.delete()
+        if rel.related_model is Dataset:
+            datasets.update(s for s, _ in pairs)
+    return datasets
+
+
+@transaction.atomic
+def merge(spec, clusters, batch_size=500):
+    """Merge every cluster into its survivor.
+
+    Returns the number of deleted objects.
+    """
+    mapping = {d.pk: c.survivor.pk for c in clusters for d in c.duplicates}
+    if not mapping:
+        return 0
+
+    datasets = set()
+    for rel in spec.model._meta.related_objects:
+        if rel.many_to_many:
+            datasets |= _repoint_many_to_many(rel, mapping, batch_size)
+        else:
+            datasets |= _repoint_foreign_key(rel, mapping, batch_size)
+    deleted, _ = spec.model.objects.filter(pk__in=mapping).delete()
+
+    # Bulk queries don't send signals: log the changes, refresh the cards and
+    # invalidate the cached documents here.
+    affected = Dataset.objects.filter(pk__in=datasets)
+    record_updates(affected)
+    refresh_dataset_cards(affected)
+    invalidate_datasets(affected)
+    return deleted
@@ -0,0 +1,63 @@
+"""JSON encoding backends for the DCAT output.
+
+Every feed is encoded through ``dumps()``/``dump()``, which always produce
+bytes so they can be written straight to a response or a binary file. The
+backend is chosen with the ``DCAT_JSON_BACKEND`` setting:
+
+- ``"auto"`` (default): orjson when it is installed, the stdlib otherwise.
+- ``"orjson"``: orjson (``pip install django-dcat[fast]``).
+- ``"json"``: the stdlib json module.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONBackend:
+    """Encode with the stdlib json module."""
+
+    name = "json"
+
+    def dumps(self, obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class OrjsonBackend:
+    """Encode with orjson, which writes bytes directly."""
+
+    name = "orjson"
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+
+def get_backend():
+    """Return the backend configured in DCAT_JSON_BACKEND."""
+    name = getattr(settings, "DCAT_JSON_BACKEND", "auto")
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name == "orjson":
+        if orjson is None:
+            raise ImproperlyConfigured(
+                "DCAT_JSON_BACKEND is 'orjson' but orjson is not installed."
+            )
+        return OrjsonBackend()
+    if name == "json":
+        return JSONBackend()
+    raise ImproperlyConfigured(f"Unknown DCAT_JSON_BACKEND: {name!r}.")
+
+
+def dumps(obj):
+    """Return obj encoded as JSON bytes."""
+    return get_backend().dumps(obj)
+
+
+def dump(obj, fp):
+    """Write obj encoded as JSON to the binary file fp."""
+    fp.write(dumps(obj))
@@ -0,0 +1,240 @@
+"""Detect the format and size of the files of distributions.
+
+The importers only set ``Distribution.format`` from the format declared by
+the source, and never the size of the files. ``detect_formats()`` looks at
+the stored files instead: the first bytes of each file are compared with the
+magic numbers of common formats, and the extension of the file name is used
+when the content is not conclusive (plain text formats like CSV, or ZIP
+containers like XLSX). The result is matched against the MediaType table by
+extension or media type, and the size is stored as ``dcat:byteSize``.
+
+Files are read in a pool of threads, mapping only their header in memory,
+and the distributions are updated in batches.
+"""
+import concurrent.futures
+import mmap
+import os
+
+from django.db.models import Q
+
+from dcat.cache import invalidate_objects
+from dcat.cards import refresh_dataset_cards
+from dcat.models import ChangeLogEntry, Dataset, Distribution, MediaType
+from dcat.stats import add_difference, apply_differences
+
+HEADER_SIZE = 512
+
+# (offset, magic bytes, extension, media type)
+SIGNATURES = [
+    (0, b"%PDF-", "pdf", "application/pdf"),
+    (0, b"PK\x03\x04", "zip", "application/zip"),
+    (0, b"\x1f\x8b", "gz", "application/gzip"),
+    (0, b"BZh", "bz2", "application/x-bzip2"),
+    (0, b"7z\xbc\xaf\x27\x1c", "7z", "application/x-7z-compressed"),
+    (0, b"Rar!\x1a\x07", "rar", "application/vnd.rar"),
+    (0, b"\x89PNG\r\n\x1a\n", "png", "image/png"),
+    (0, b"\xff\xd8\xff", "jpeg", "image/jpeg"),
+    (0, b"GIF8", "gif", "image/gif"),
+    (0, b"II*\x00", "tiff", "image/tiff"),
+    (0, b"MM\x00*", "tiff", "image/tiff"),
+    (0, b"PAR1", "parquet", "application/vnd.apache.parquet"),
+    (0, b"SQLite format 3\x00", "sqlite", "application/vnd.sqlite3"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "xls", "application/vnd.ms-excel"),
+    (0, b"\x89HDF\r\n\x1a\n", "hdf5", "application/x-hdf5"),
+    (0, b"CDF\x01", "netcdf", "application/netcdf"),
+    (0, b"<?xml", "xml", "application/xml"),
+]
+
+# Formats stored in a container with the magic number of another format: the
+# extension of the file is more precise than the content.
+CONTAINERS = {
+    "zip": {"xlsx", "docx", "pptx", "ods", "odt", "odp", "kmz", "epub", "shp"},
+    "xls": {"doc", "ppt", "msg"},
+    "xml": {"rdf", "kml", "gml", "gpx", "xsd", "svg", "atom", "rss", "owl"},
+}
+
+
+def _normalize(extension):
+    return (extension or "").strip().lstrip(".").lower()
+
+
+def read_header(path):
+    """Return the first bytes and the size of the file at path."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return b"", 0
+        with mmap.mmap(
+            f.fileno(), min(size, HEADER_SIZE), access=mmap.ACCESS_READ
+        ) as header:
+            return header[:], size
+
+
+def sniff(header, name):
+    """Return the (extension, media type) of a file from its header and name.
+
+    The media type is "" when the format is only guessed from the extension.
+    """
+    extension = _normalize(os.path.splitext(name)[1])
+    for offset, magic, magic_extension, media_type in SIGNATURES:
+        if header[offset : offset + len(magic)] == magic:
+            if extension in CONTAINERS.get(magic_extension, ()):
+                return extension, ""
+            return magic_extension, media_type
+    return extension, ""
+
+
+class MediaTypeIndex:
+    """MediaType objects by normalized extension and by media type.
+
+    Vocabulary entries (the ones with a code) win over the ones created by
+    the importers.
+    """
+
+    ALIASES = {"jpg": "jpeg", "tif": "tiff", "gzip": "gz", "htm": "html"}
+
+    def __init__(self, media_types=None):
+        if media_types is None:
+            media_types = MediaType.objects.all()
+        self.by_extension = {}
+        self.by_media_type = {}
+        ordered = sorted(media_types, key=lambda m: (m.code is not None, -m.pk))
+        for media_type in ordered:
+            for key in (_normalize(media_type.extension), _normalize(media_type.code)):
+                if key:
+                    self.by_extension[self.ALIASES.get(key, key)] = media_type
+            if media_type.media_type:
+                self.by_media_type[media_type.media_type] = media_type
+
+    def get(self, extension, media_type=""):
+        extension = self.ALIASES.get(extension, extension)
+        return self.by_extension.get(extension) or self.by_media_type.get(media_type)
+
+
+def inspect_file(distribution):
+    """Return the (extension, media type, size) of the file of a distribution."""
+    try:
+        header, size = read_header(distribution.file.path)
+    except NotImplementedError:
+        # Storages without local paths: read the header from the file object.
+        with distribution.file.open(mode="rb") as f:
+            header = f.read(HEADER_SIZE)
+        size = distribution.file.size
+    extension, media_type = sniff(header, distribution.file.name)
+    return extension, media_type, size
+
+
+def detect_formats(distributions=None, workers=8, batch_size=500, overwrite=False):
+    """Detect the format and size of the files of distributions.
+
+    ``distributions`` is a Distribution queryset (all of them if None). The
+    format is only set when it is missing, or always with ``overwrite``.
+    Returns the number of updated distributions.
+    """
+    if distributions is None:
+        distributions = Distribution.objects.all()
+    distributions = distributions.exclude(file="").only(
+        "pk", "uuid", "file", "format", "byte_size", "dataset"
+    )
+    if not overwrite:
+        distributions = distributions.filter(Q(format=None) | Q(byte_size=None))
+    index = MediaTypeIndex()
+
+    total = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        batch = []
+        rows = distributions.order_by("pk").iterator(chunk_size=batch_size)
+        for distribution in rows:
+            batch.append(distribution)
+            if len(batch) >= batch_size:
+                total += _update_batch(batch, index, executor, overwrite)
+                batch = []
+        if batch:
+            total += _update_batch(batch, index, executor, overwrite)
+    return total
+
+
+def _inspect_or_none(distribution):
+    try:
+        return inspect_file(distribution)
+    except OSError:
+        return None
+
+
+def _update_batch(batch, index, executor, overwrite):
+    changed = []
+    previous = {}
+    for distribution, found in zip(batch, executor.map(_inspect_or_none, batch)):
+        if found is None:
+            continue
+        extension, media_type, size = found
+        format = index.get(extension, media_type)
+        before = (distribution.format_id, distribution.byte_size)
+        if format is not None and (overwrite or distribution.format_id is None):
+            distribution.format = format
+        distribution.byte_size = size
+        if (distribution.format_id, distribution.byte_size) != before:
+            changed.append(distribution)
+            previous[distribution.pk] = before
+
+    if changed:
+        # bulk_update() doesn't send signals: log the changes, refresh the
+        # cards and statistics and invalidate the cached documents here.
+        datasets = {d.dataset_id for d in changed}
+        catalog_ids = _catalog_ids(changed)
+        Distribution.objects.bulk_update(changed, ["format", "byte_size"])
+        ChangeLogEntry.objects.bulk_create(
+            [
+                ChangeLogEntry(
+                    kind="distribution",
+                    object_uuid=d.uuid,
+                    action=ChangeLogEntry.UPDATED,
+                    dataset_id=d.dataset_id,
+                    catalog_id=catalog_id,
+                )
+                for d, catalog_id in zip(changed, catalog_ids)
+            ]
+        )
+        refresh_dataset_cards(Dataset.objects.filter(pk__in=datasets))
+        invalidate_objects("distribution", [d.uuid for d in changed])
+        invalidate_objects(
+            "dataset",
+            Dataset.objects.filter(pk__in=datasets).values_list("uuid", flat=True),
+        )
+        apply_differences(_differences(changed, catalog_ids, previous))
+    return len(changed)
+
+
+def _differences(distributions, catalog_ids, previous):
+    """Return the statistics differences made by updating distributions."""
+    format_ids = {d.format_id for d in distributions}
+    format_ids.update(format_id for format_id, byte_size in previous.values())
+    extensions = dict(
+        MediaType.objects.filter(pk__in=format_ids - {None}).values_list(
+            "pk", "extension"
+        )
+    )
+    differences = {}
+    for distribution, catalog_id in zip(distributions, catalog_ids):
+        format_id, byte_size = previous[distribution.pk]
+        formats = {}
+        for pk, count in ((format_id, -1), (distribution.format_id, 1)):
+            extension = extensions.get(pk)
+            if extension:
+                formats[extension] = formats.get(extension, 0) + count
+        add_difference(
+            differences,
+            catalog_id,
+            byte_size=(distribution.byte_size or 0) - (byte_size or 0),
+            formats=formats,
+        )
+    return differences
+
+
+def _catalog_ids(distributions):
+    catalogs = dict(
+        Dataset.objects.filter(
+            pk__in={d.dataset_id for d in distributions}
+        ).values_list("pk", "catalog_id")
+    )
+    return [catalogs[d.dataset_id] for d in distributions]
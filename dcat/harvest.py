@@ -0,0 +1,904 @@
+"""Harvest remote DCAT catalogs published as JSON-LD.
+
+A HarvestSource is the URL of a catalog in the compact JSON-LD form produced
+by ``Catalog.to_jsonld()`` and the feeds of dcat.views, which other portals
+running django-dcat publish too. ``harvest()`` fetches many sources
+concurrently with asyncio, following the ``hydra:next`` links (or the
+``Link: <...>; rel="next"`` headers) of paged catalogs. Responses are parsed
+while they arrive: the items of the ``dcat:dataset`` array are decoded one at
+a time, so a big catalog is never held in memory as a whole.
+
+As in dcat.linkcheck, the blocking HTTP requests run in a pool of threads
+driven by an event loop. The loop runs in its own thread and hands batches of
+datasets to the calling thread, which writes them with bulk queries. Harvested
+objects get a UUID derived from the IRI of the remote object and from the
+source, so harvesting again updates the same rows, and aggregators listing
+the same dataset as another source get their own copy. Only the rows that
+changed are logged in the change log. A source answering 304 to the ETag or the
+Last-Modified of the previous harvest is skipped, and the datasets that
+disappeared from a fully harvested source are archived.
+"""
+import asyncio
+import codecs
+import collections
+import concurrent.futures
+import http.client
+import json
+import queue
+import re
+import threading
+import urllib.parse
+import uuid
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.text import slugify
+
+from dcat.archive import archive_datasets
+from dcat.cache import invalidate_objects, invalidate_rows
+from dcat.cards import refresh_dataset_cards, suspend_card_updates
+from dcat.models import (
+    Agent,
+    Catalog,
+    ChangeLogEntry,
+    Checksum,
+    Dataset,
+    DataTheme,
+    Distribution,
+    HarvestSource,
+    Keyword,
+    LicenceDocument,
+    MediaType,
+)
+from dcat.stats import refresh_catalog_statistics, suspend_statistics_updates
+
+USER_AGENT = "django-dcat harvester"
+MAX_REDIRECTS = 5
+MAX_PAGES = 10000
+READ_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NEXT_LINK = re.compile(r'<([^>]*)>[^,]*;\s*rel="?next"?')
+
+
+class HarvestError(Exception):
+    """A source can't be fetched or isn't a JSON-LD catalog."""
+
+
+# Incremental parsing
+
+
+class _Incomplete(Exception):
+    pass
+
+
+class JSONObjectStream:
+    """Parse a JSON object incrementally.
+
+    ``feed()`` takes the next piece of the text and returns the events it
+    completes: ``("member", key, value)`` for every member of the object, and
+    ``("item", key, value)`` for every item of the arrays under the keys in
+    ``streamed``, which are never decoded as a whole. As in JSON-LD, a single
+    value under those keys is an array of one item, and null an empty one.
+    """
+
+    def __init__(self, streamed=(), max_buffer=16 * 1024 * 1024):
+        self.streamed = set(streamed)
+        self.max_buffer = max_buffer
+        self.buffer = ""
+        self.state = "start"
+        self.key = None
+        self._decoder = json.JSONDecoder()
+
+    def _decode(self, buffer, pos, final):
+        try:
+            value, end = self._decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            raise _Incomplete
+        # A number at the end of the buffer can go on in the next piece.
+        if end == len(buffer) and not final and isinstance(value, (int, float)):
+            raise _Incomplete
+        return value, end
+
+    def _step(self, buffer, pos, final):
+        """Parse the next token at pos. Returns (event or None, new pos)."""
+        char = buffer[pos]
+        if self.state == "start":
+            if char != "{":
+                raise ValueError("The document isn't a JSON object.")
+            self.state = "key"
+            return None, pos + 1
+        if self.state == "key":
+            if char in ",}":
+                self.state = "end" if char == "}" else "key"
+                return None, pos + 1
+            key, end = self._decode(buffer, pos, final)
+            end = _WHITESPACE.match(buffer, end).end()
+            if end == len(buffer):
+                raise _Incomplete
+            if buffer[end] != ":":
+                raise ValueError(f"Expected ':' at position {end}.")
+            self.key = key
+            self.state = "value"
+            return None, end + 1
+        if self.state == "value":
+            if char == "[" and self.key in self.streamed:
+                self.state = "items"
+                return None, pos + 1
+            value, end = self._decode(buffer, pos, final)
+            self.state = "key"
+            if self.key not in self.streamed:
+                return ("member", self.key, value), end
+            return (None if value is None else ("item", self.key, value)), end
+        if self.state == "items":
+            if char in ",]":
+                self.state = "key" if char == "]" else "items"
+                return None, pos + 1
+            value, end = self._decode(buffer, pos, final)
+            return ("item", self.key, value), end
+        raise ValueError("Extra data after the JSON object.")
+
+    def feed(self, text, final=False):
+        buffer = self.buffer + text
+        pos = 0
+        events = []
+        try:
+            while True:
+                pos = _WHITESPACE.match(buffer, pos).end()
+                if pos == len(buffer):
+                    break
+                event, pos = self._step(buffer, pos, final)
+                if event:
+                    events.append(event)
+        except _Incomplete:
+            pass
+        self.buffer = buffer[pos:]
+        if len(self.buffer) > self.max_buffer:
+            raise ValueError("A JSON value is too big.")
+        if final and self.state != "end":
+            raise ValueError("The JSON document is truncated.")
+        return events
+
+
+# Fetching
+
+
+def _open(url, headers, timeout):
+    """Send a GET request to url, following redirects.
+
+    Returns the final URL, the connection and the response, whose body is
+    still unread.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme == "https":
+            connection = http.client.HTTPSConnection(parts.netloc, timeout=timeout)
+        elif parts.scheme == "http":
+            connection = http.client.HTTPConnection(parts.netloc, timeout=timeout)
+        else:
+            raise HarvestError(f"Can't harvest {url}.")
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        try:
+            connection.request(
+                "GET",
+                path,
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "application/ld+json, application/json;q=0.9",
+                    **headers,
+                },
+            )
+            response = connection.getresponse()
+        except BaseException:
+            connection.close()
+            raise
+        location = response.getheader("Location")
+        if response.status not in (301, 302, 303, 307, 308) or not location:
+            return url, connection, response
+        connection.close()
+        url = urllib.parse.urljoin(url, location)
+    raise HarvestError(f"Too many redirects from {url}.")
+
+
+def _next_page(url, response, members):
+    """Return the URL of the next page of a paged catalog, or None."""
+    view = members.get("hydra:view")
+    for node in (members, view if isinstance(view, dict) else {}):
+        for key in ("hydra:next", "hydra:nextPage"):
+            value = _text(node.get(key))
+            if value:
+                return urllib.parse.urljoin(url, value)
+    match = _NEXT_LINK.search(response.getheader("Link", ""))
+    if match:
+        return urllib.parse.urljoin(url, match.group(1))
+    return None
+
+
+async def _fetch_page(executor, url, headers, timeout, on_item):
+    """Fetch a page, calling on_item for every dataset as soon as it is parsed.
+
+    Returns the final URL, the response and the other members of the catalog,
+    or None for a 304 response.
+    """
+    loop = asyncio.get_running_loop()
+    url, connection, response = await loop.run_in_executor(
+        executor, _open, url, headers, timeout
+    )
+    try:
+        if response.status == 304 and headers:
+            return None
+        if response.status != 200:
+            raise HarvestError(f"{url} answered {response.status}.")
+        parser = JSONObjectStream(streamed=["dcat:dataset"])
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        members = {}
+        final = False
+        while not final:
+            data = await loop.run_in_executor(executor, response.read, READ_SIZE)
+            final = not data
+            for event, key, value in parser.feed(decoder.decode(data, final), final):
+                if event == "member":
+                    members[key] = value
+                else:
+                    await on_item(value, members)
+        return url, response, members
+    finally:
+        connection.close()
+
+
+async def _fetch_source(executor, source_id, url, headers, send, batch_size, timeout):
+    """Fetch every page of a source, sending its datasets in batches.
+
+    Messages are ``("batch", source_id, datasets, header)``, where header has
+    the members of the catalog, and a last ``("done", source_id, status,
+    etag, last_modified, header, error)``.
+    """
+    header = {}
+    batch = []
+
+    async def on_item(item, members):
+        nonlocal batch
+        batch.append(item)
+        if len(batch) >= batch_size:
+            await send(("batch", source_id, batch, header or dict(members)))
+            batch = []
+
+    visited = []
+    etag = last_modified = ""
+    try:
+        while url and url not in visited and len(visited) < MAX_PAGES:
+            visited.append(url)
+            page_headers = headers if len(visited) == 1 else {}
+            page = await _fetch_page(executor, url, page_headers, timeout, on_item)
+            if page is None:
+                status = HarvestSource.NOT_MODIFIED
+                await send(("done", source_id, status, "", "", {}, ""))
+                return
+            url, response, members = page
+            if len(visited) == 1:
+                header = members
+                etag = response.getheader("ETag", "")
+                last_modified = response.getheader("Last-Modified", "")
+            if batch:
+                await send(("batch", source_id, batch, header))
+                batch = []
+            url = _next_page(url, response, members)
+    except (OSError, http.client.HTTPException, HarvestError, ValueError) as e:
+        error = str(e) or e.__class__.__name__
+        await send(("done", source_id, HarvestSource.FAILED, "", "", header, error))
+        return
+    status = HarvestSource.OK
+    await send(("done", source_id, status, etag, last_modified, header, ""))
+
+
+async def fetch_sources(sources, send, concurrency=10, batch_size=200, timeout=30):
+    """Fetch ``(source_id, url, headers)`` sources, concurrency at a time.
+
+    ``send`` is a coroutine function receiving the messages of every source
+    (see _fetch_source()).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(source_id, url, headers):
+        async with semaphore:
+            await _fetch_source(
+                executor, source_id, url, headers, send, batch_size, timeout
+            )
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        await asyncio.gather(*[fetch(*source) for source in sources])
+
+
+def _fetch_in_thread(sources, messages, stopped, errors, **options):
+    """Run fetch_sources() putting its messages in a queue, then None."""
+
+    async def send(message):
+        if stopped.is_set():
+            raise HarvestError("The harvest was stopped.")
+        # The queue is bounded: wait for the writes without blocking the loop.
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, messages.put, message)
+
+    try:
+        asyncio.run(fetch_sources(sources, send, **options))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        messages.put(None)
+
+
+# Mapping to the models
+
+
+def harvested_uuid(iri, source_url=None):
+    """Return the UUID of the local copy of the remote object identified by iri.
+
+    Objects owned by a catalog are identified within the URL of their source,
+    agents are shared by every source.
+    """
+    if source_url is not None:
+        # A space can't appear in a URL, so names never collide.
+        iri = f"{source_url} {iri}"
+    return uuid.uuid5(uuid.NAMESPACE_URL, iri)
+
+
+def _list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _text(value):
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    if isinstance(value, dict):
+        value = value.get("@value", value.get("@id", ""))
+    return "" if value is None else str(value)
+
+
+def _url(value, max_length=200):
+    if isinstance(value, dict) and "foaf:Document" in value:
+        value = value["foaf:Document"]
+    value = _text(value)
+    if len(value) > max_length or not value.startswith(("http://", "https://")):
+        return ""
+    return value
+
+
+def _date(value):
+    try:
+        return parse_date(_text(value)[:10])
+    except ValueError:
+        return None
+
+
+def _size(value):
+    try:
+        size = int(_text(value))
+    except ValueError:
+        return None
+    return size if size >= 0 else None
+
+
+def _label(value, key):
+    """Return the label of a vocabulary node, or the last segment of its IRI."""
+    if isinstance(value, dict) and value.get(key):
+        return _text(value[key])
+    return _text(value).rstrip("/").rsplit("/", 1)[-1]
+
+
+def _agent_key(node):
+    """Return the IRI identifying an agent node, or None."""
+    if not isinstance(node, dict):
+        return None
+    if node.get("@id"):
+        return _text(node["@id"])
+    if node.get("foaf:name"):
+        return f"urn:dcat:harvest:agent:{_text(node['foaf:name'])}"
+    return None
+
+
+def _save_agents(nodes):
+    """Insert or update the agents of JSON-LD nodes. Returns {IRI: pk}."""
+    agents = {}
+    for node in nodes:
+        key = _agent_key(node)
+        if key:
+            agents[key] = Agent(
+                uuid=harvested_uuid(key),
+                name=(_text(node.get("foaf:name")) or key)[:255],
+                type=_text(node.get("@type"))[:20],
+            )
+    if not agents:
+        return {}
+    stored = _stored_values(
+        Agent.objects.filter(uuid__in=[agent.uuid for agent in agents.values()]),
+        ["id", "name", "type"],
+    )
+    Agent.objects.bulk_create(
+        agents.values(),
+        update_conflicts=True,
+        unique_fields=["uuid"],
+        update_fields=["name", "type"],
+    )
+    # bulk_create() doesn't send signals: invalidate the renamed agents here.
+    invalidate_rows(
+        Agent,
+        [
+            stored[agent.uuid][0]
+            for agent in agents.values()
+            if agent.uuid in stored
+            and stored[agent.uuid][1:] != (agent.name, agent.type)
+        ],
+    )
+    pks = dict(
+        Agent.objects.filter(
+            uuid__in=[agent.uuid for agent in agents.values()]
+        ).values_list("uuid", "pk")
+    )
+    return {key: pks[agent.uuid] for key, agent in agents.items()}
+
+
+def _get_or_create(model, field, objects):
+    """Return {value: pk} for the rows of model whose field is a key of objects.
+
+    objects maps values to unsaved instances, the missing ones are created
+    with a single query.
+    """
+    if not objects:
+        return {}
+    lookup = f"{field}__in"
+    found = dict(model.objects.filter(**{lookup: objects}).values_list(field, "pk"))
+    missing = [value for value in objects if value not in found]
+    if missing:
+        model.objects.bulk_create(
+            [objects[value] for value in missing], ignore_conflicts=True
+        )
+        found.update(
+            model.objects.filter(**{lookup: missing}).values_list(field, "pk")
+        )
+    return found
+
+
+def _themes(document):
+    """Yield the (code, label) of the themes of a dataset."""
+    for node in _list(document.get("dcat:theme")):
+        if isinstance(node, dict) and node.get("skos:notation"):
+            code = _text(node["skos:notation"])
+        else:
+            code = _label(node, "skos:prefLabel")
+        if code:
+            yield code[:255], (_label(node, "skos:prefLabel") or code)[:255]
+
+
+def _keywords(document):
+    for keyword in _list(document.get("dcat:keyword")):
+        name = _text(keyword)[:50]
+        if name:
+            yield name
+
+
+def _distributions(iri, document):
+    """Yield the (IRI, node) of the distributions of a dataset."""
+    for i, node in enumerate(_list(document.get("dcat:distribution"))):
+        if isinstance(node, dict):
+            yield _text(node.get("@id")) or f"{iri}#distribution-{i}", node
+
+
+def _save_vocabularies(documents):
+    """Create the missing themes, keywords, formats and licences of datasets.
+
+    Returns a dictionary of {value: pk} for each of them.
+    """
+    themes, keywords, formats, licences = {}, {}, {}, {}
+    for document in documents:
+        for code, label in _themes(document):
+            themes[code] = DataTheme(code=code, label=label)
+        for name in _keywords(document):
+            keywords[name] = Keyword(name=name, slug=slugify(name)[:50])
+        for _, node in _distributions("", document):
+            extension = _label(node.get("dct:format"), "rdfs:label")[:10]
+            if extension:
+                formats[extension] = MediaType(
+                    extension=extension,
+                    media_type=_text(node.get("dcat:mediaType"))[:50],
+                )
+            licence = node.get("dct:license")
+            label = _label(licence, "rdfs:label")[:255]
+            if label:
+                url = _url(licence.get("dct:type")) if isinstance(licence, dict) else ""
+                licences[label] = LicenceDocument(label=label, url_general=url)
+    return {
+        "themes": _get_or_create(DataTheme, "code", themes),
+        "keywords": _get_or_create(Keyword, "name", keywords),
+        "formats": _get_or_create(MediaType, "extension", formats),
+        "licences": _get_or_create(LicenceDocument, "label", licences),
+    }
+
+
+def _stored_values(queryset, fields):
+    """Return {uuid: values of fields} for the rows of queryset."""
+    opts = queryset.model._meta
+    attnames = [opts.get_field(name).attname for name in fields]
+    return {row[0]: row[1:] for row in queryset.values_list("uuid", *attnames)}
+
+
+def _values(obj, fields):
+    return tuple(getattr(obj, obj._meta.get_field(name).attname) for name in fields)
+
+
+def _changes(objects, stored, fields):
+    """Return {uuid: action} for the objects that are new or differ from stored.
+
+    Archived rows harvested again are created again.
+    """
+    archived_at = fields.index("archived_at")
+    changes = {}
+    for obj in objects:
+        old = stored.get(obj.uuid)
+        if old is None or old[archived_at] is not None:
+            changes[obj.uuid] = ChangeLogEntry.CREATED
+        elif old != _values(obj, fields):
+            changes[obj.uuid] = ChangeLogEntry.UPDATED
+    return changes
+
+
+def _log_changes(kind, changes, dataset_ids, catalog):
+    """Log {uuid: action} changes, dataset_ids mapping uuids to datasets."""
+    ChangeLogEntry.objects.bulk_create(
+        [
+            ChangeLogEntry(
+                kind=kind,
+                object_uuid=object_uuid,
+                action=action,
+                dataset_id=dataset_ids[object_uuid],
+                catalog_id=catalog.pk,
+            )
+            for object_uuid, action in changes.items()
+        ]
+    )
+
+
+def _replace_relations(through, field, pairs, dataset_ids):
+    """Make pairs the (dataset_id, pk) rows of through for dataset_ids.
+
+    Only the rows of datasets whose relations changed are replaced. Returns
+    the ids of those datasets.
+    """
+    old = collections.defaultdict(set)
+    new = collections.defaultdict(set)
+    rows = through.objects.filter(dataset_id__in=dataset_ids)
+    for dataset_id, pk in rows.values_list("dataset_id", field):
+        old[dataset_id].add(pk)
+    for dataset_id, pk in pairs:
+        new[dataset_id].add(pk)
+    changed = {
+        dataset_id for dataset_id in dataset_ids if old[dataset_id] != new[dataset_id]
+    }
+    through.objects.filter(dataset_id__in=changed).delete()
+    through.objects.bulk_create(
+        [
+            through(dataset_id=dataset_id, **{field: pk})
+            for dataset_id in changed
+            for pk in new[dataset_id]
+        ]
+    )
+    return changed
+
+
+def _save_checksums(checksums):
+    """Attach {distribution uuid: (algorithm, value)} checksums to distributions.
+
+    Returns the uuids of the distributions whose checksum changed.
+    """
+    distributions = Distribution.all_objects.filter(
+        uuid__in=checksums
+    ).select_related("checksum")
+    changed, new, uuids = [], [], set()
+    for distribution in distributions:
+        algorithm, value = checksums[distribution.uuid]
+        checksum = distribution.checksum
+        if checksum is None:
+            distribution.checksum = Checksum(algorithm=algorithm, checksum_value=value)
+            new.append(distribution)
+        elif (checksum.algorithm, checksum.checksum_value) != (algorithm, value):
+            checksum.algorithm = algorithm
+            checksum.checksum_value = value
+            changed.append(checksum)
+        else:
+            continue
+        uuids.add(distribution.uuid)
+    Checksum.objects.bulk_update(changed, ["algorithm", "checksum_value"])
+    Checksum.objects.bulk_create([distribution.checksum for distribution in new])
+    for distribution in new:
+        # Backends that can't return the keys of inserted rows.
+        if distribution.checksum.pk is None:
+            distribution.checksum.save()
+    Distribution.all_objects.bulk_update(new, ["checksum"])
+    return uuids
+
+
+_DATASET_FIELDS = [
+    "catalog",
+    "title",
+    "description",
+    "publisher",
+    "issued",
+    "modified",
+    "landing_page",
+    "archived_at",
+]
+_DISTRIBUTION_FIELDS = [
+    "dataset",
+    "title",
+    "description",
+    "format",
+    "licence",
+    "external_download_url",
+    "external_access_url",
+    "byte_size",
+    "archived_at",
+]
+
+
+def _save_distributions(catalog, documents, ids, vocabularies, source_url):
+    """Insert or update the distributions of harvested datasets.
+
+    documents and ids map dataset uuids to their JSON-LD and their pk.
+    Distributions no longer listed by their dataset are deleted. Returns the
+    ids of the datasets whose distributions changed.
+    """
+    distributions = {}
+    checksums = {}
+    for dataset_uuid, document in documents.items():
+        iri = _text(document["@id"])
+        for distribution_iri, node in _distributions(iri, document):
+            distribution_uuid = harvested_uuid(distribution_iri, source_url)
+            extension = _label(node.get("dct:format"), "rdfs:label")[:10]
+            licence = _label(node.get("dct:license"), "rdfs:label")[:255]
+            distributions[distribution_uuid] = Distribution(
+                uuid=distribution_uuid,
+                dataset_id=ids[dataset_uuid],
+                title=_text(node.get("dct:title"))[:255],
+                description=_text(node.get("dct:description")),
+                format_id=vocabularies["formats"].get(extension),
+                licence_id=vocabularies["licences"].get(licence),
+                external_download_url=_url(node.get("dcat:downloadURL")),
+                external_access_url=_url(node.get("dcat:accessURL")),
+                byte_size=_size(node.get("dcat:byteSize")),
+                archived_at=None,
+            )
+            checksum = node.get("spdx:checksum")
+            if isinstance(checksum, dict) and checksum.get("spdx:checksumValue"):
+                checksums[distribution_uuid] = (
+                    _text(checksum.get("spdx:algorithm"))[:10],
+                    _text(checksum["spdx:checksumValue"])[:255],
+                )
+
+    # Deleted distributions are logged and invalidated by the signals.
+    Distribution.all_objects.filter(dataset_id__in=ids.values()).exclude(
+        uuid__in=distributions
+    ).delete()
+    stored = _stored_values(
+        Distribution.all_objects.filter(uuid__in=distributions), _DISTRIBUTION_FIELDS
+    )
+    changes = _changes(distributions.values(), stored, _DISTRIBUTION_FIELDS)
+    if distributions:
+        Distribution.all_objects.bulk_create(
+            distributions.values(),
+            update_conflicts=True,
+            unique_fields=["uuid"],
+            update_fields=_DISTRIBUTION_FIELDS,
+        )
+    if checksums:
+        for distribution_uuid in _save_checksums(checksums):
+            changes.setdefault(distribution_uuid, ChangeLogEntry.UPDATED)
+    dataset_ids = {u: distributions[u].dataset_id for u in changes}
+    _log_changes("distribution", changes, dataset_ids, catalog)
+    invalidate_objects("distribution", changes)
+    return set(dataset_ids.values())
+
+
+def save_datasets(catalog, documents, source_url):
+    """Insert or update the datasets of JSON-LD documents in catalog.
+
+    Documents without an ``@id`` are skipped. The datasets and distributions
+    that are new or changed are logged in the change log. Returns {uuid: pk}
+    of the saved datasets.
+    """
+    by_uuid = {}
+    for document in documents:
+        if isinstance(document, dict) and _text(document.get("@id")):
+            by_uuid[harvested_uuid(_text(document["@id"]), source_url)] = document
+    if not by_uuid:
+        return {}
+
+    agents = _save_agents(d.get("dct:publisher") for d in by_uuid.values())
+    vocabularies = _save_vocabularies(by_uuid.values())
+    datasets = []
+    for dataset_uuid, document in by_uuid.items():
+        title = _text(document.get("dct:title")) or _text(document["@id"])
+        datasets.append(
+            Dataset(
+                uuid=dataset_uuid,
+                catalog=catalog,
+                title=title[:255],
+                description=_text(document.get("dct:description")),
+                publisher_id=agents.get(_agent_key(document.get("dct:publisher"))),
+                issued=_date(document.get("dct:issued")),
+                modified=_date(document.get("dct:modified")),
+                landing_page=_url(document.get("dcat:landingPage")),
+                archived_at=None,
+            )
+        )
+    stored = _stored_values(
+        Dataset.all_objects.filter(uuid__in=by_uuid), _DATASET_FIELDS
+    )
+    changes = _changes(datasets, stored, _DATASET_FIELDS)
+    Dataset.all_objects.bulk_create(
+        datasets,
+        update_conflicts=True,
+        unique_fields=["uuid"],
+        update_fields=_DATASET_FIELDS,
+    )
+    ids = dict(Dataset.all_objects.filter(uuid__in=by_uuid).values_list("uuid", "pk"))
+
+    themes = vocabularies["themes"]
+    changed = _replace_relations(
+        Dataset.themes.through,
+        "datatheme_id",
+        {
+            (ids[dataset_uuid], themes[code])
+            for dataset_uuid, document in by_uuid.items()
+            for code, _ in _themes(document)
+        },
+        ids.values(),
+    )
+    keywords = vocabularies["keywords"]
+    changed |= _replace_relations(
+        Dataset.keywords.through,
+        "keyword_id",
+        {
+            (ids[dataset_uuid], keywords[name])
+            for dataset_uuid, document in by_uuid.items()
+            for name in _keywords(document)
+        },
+        ids.values(),
+    )
+    for dataset_uuid, pk in ids.items():
+        if pk in changed:
+            changes.setdefault(dataset_uuid, ChangeLogEntry.UPDATED)
+    _log_changes("dataset", changes, ids, catalog)
+    changed = _save_distributions(catalog, by_uuid, ids, vocabularies, source_url)
+    # Bulk queries don't send signals: invalidate the cached documents here.
+    invalidate_objects(
+        "dataset",
+        [u for u, pk in ids.items() if u in changes or pk in changed],
+    )
+    return ids
+
+
+# Harvesting
+
+
+class _SourceHarvest:
+    """The writes of the harvest of a source, made in the calling thread."""
+
+    def __init__(self, source):
+        self.source = source
+        self.catalog = source.catalog
+        self.uuids = set()
+
+    def _save_catalog(self, header):
+        source = self.source
+        publisher = header.get("dct:publisher")
+        if not _agent_key(publisher):
+            host = urllib.parse.urlsplit(source.url).netloc
+            publisher = {"@id": f"urn:dcat:harvest:agent:{host}", "foaf:name": host}
+        (publisher_id,) = _save_agents([publisher]).values()
+        catalog = self.catalog or Catalog(
+            uuid=harvested_uuid(_text(header.get("@id")) or source.url, source.url)
+        )
+        catalog.title = (_text(header.get("dct:title")) or source.url)[:255]
+        catalog.description = _text(header.get("dct:description"))
+        catalog.publisher_id = publisher_id
+        catalog.homepage = _url(header.get("foaf:homepage"))
+        catalog.save()
+        self.catalog = catalog
+
+    def save_batch(self, documents, header):
+        with transaction.atomic(), suspend_card_updates(), suspend_statistics_updates():
+            if self.catalog is None:
+                self._save_catalog(header)
+            ids = save_datasets(self.catalog, documents, self.source.url)
+            self.uuids.update(ids)
+            refresh_dataset_cards(Dataset.objects.filter(pk__in=ids.values()))
+
+    def finish(self, status, etag, last_modified, header, error):
+        source = self.source
+        if status == HarvestSource.OK:
+            with transaction.atomic():
+                self._save_catalog(header)
+                stale = [
+                    pk
+                    for pk, dataset_uuid in Dataset.objects.filter(
+                        catalog=self.catalog
+                    ).values_list("pk", "uuid")
+                    if dataset_uuid not in self.uuids
+                ]
+                for start in range(0, len(stale), 1000):
+                    archive_datasets(
+                        Dataset.objects.filter(pk__in=stale[start : start + 1000])
+                    )
+            source.catalog = self.catalog
+            source.etag = etag[:255]
+            source.last_modified = last_modified[:64]
+            source.dataset_count = len(self.uuids)
+        if self.catalog is not None and status != HarvestSource.NOT_MODIFIED:
+            refresh_catalog_statistics(Catalog.all_objects.filter(pk=self.catalog.pk))
+        source.status = status
+        source.error = error
+        source.harvested_at = timezone.now()
+        source.save()
+
+
+def harvest(sources=None, concurrency=10, batch_size=200, timeout=30, force=False):
+    """Harvest a HarvestSource queryset (the enabled sources if None).
+
+    Sources are fetched ``concurrency`` at a time and their datasets are
+    written ``batch_size`` at a time. Unless ``force`` is true, sources not
+    modified since the last harvest are skipped. Returns the list of sources
+    with their new status.
+    """
+    if sources is None:
+        sources = HarvestSource.objects.filter(enabled=True)
+    harvests = {
+        source.pk: _SourceHarvest(source)
+        for source in sources.select_related("catalog")
+    }
+    plans = []
+    for source_id, source_harvest in harvests.items():
+        source = source_harvest.source
+        headers = {}
+        if source.catalog_id and not force:
+            if source.etag:
+                headers["If-None-Match"] = source.etag
+            if source.last_modified:
+                headers["If-Modified-Since"] = source.last_modified
+        plans.append((source_id, source.url, headers))
+
+    messages = queue.Queue(maxsize=2 * concurrency)
+    stopped = threading.Event()
+    errors = []
+    thread = threading.Thread(
+        target=_fetch_in_thread,
+        args=(plans, messages, stopped, errors),
+        kwargs={
+            "concurrency": concurrency,
+            "batch_size": batch_size,
+            "timeout": timeout,
+        },
+        daemon=True,
+    )
+    thread.start()
+    try:
+        while (message := messages.get()) is not None:
+            kind, source_id, *values = message
+            if kind == "batch":
+                harvests[source_id].save_batch(*values)
+            else:
+                harvests[source_id].finish(*values)
+    except BaseException:
+        # Stop the fetches and let the thread put its last messages.
+        stopped.set()
+        while messages.get() is not None:
+            pass
+        raise
+    finally:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return [source_harvest.source for source_harvest in harvests.values()]
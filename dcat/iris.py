@@ -0,0 +1,69 @@
+"""Stable IRIs for the DCAT resources.
+
+Catalogs, datasets, distributions and agents are identified by the UUID stored
+in their ``uuid`` field. When the ``DCAT_BASE_IRI`` setting is defined (for
+example ``"https://data.example.org/dcat"``) the IRI is
+``<DCAT_BASE_IRI>/<kind>/<uuid>``, which the views in dcat.urls can
+dereference if the app is mounted at that URL. Otherwise a URN like
+``urn:dcat:<kind>:<uuid>`` is used.
+"""
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.urls import NoReverseMatch, reverse
+
+KINDS = ("catalog", "dataset", "distribution", "agent")
+
+
+def _base_iri():
+    return getattr(settings, "DCAT_BASE_IRI", "").rstrip("/")
+
+
+def build_iri(kind, value):
+    """Return the IRI of the resource of kind identified by the UUID value."""
+    base = _base_iri()
+    if base:
+        return f"{base}/{kind}/{value}"
+    return f"urn:dcat:{kind}:{value}"
+
+
+def build_download_url(value):
+    """Return the URL of the download view of the distribution with UUID value.
+
+    The URL is absolute when ``DCAT_BASE_IRI`` is defined. Returns "" when it
+    isn't and dcat.urls isn't mounted either.
+    """
+    base = _base_iri()
+    if base:
+        return f"{base}/distributions/{value}/download"
+    try:
+        return reverse("dcat:distribution-download", args=[value])
+    except NoReverseMatch:
+        return ""
+
+
+def parse_iri(iri):
+    """Return the ``(kind, uuid)`` of an IRI built by build_iri(), or None."""
+    base = _base_iri()
+    if base and iri.startswith(base + "/"):
+        kind, _, value = iri[len(base) + 1 :].partition("/")
+    elif iri.startswith("urn:dcat:"):
+        kind, _, value = iri[len("urn:dcat:") :].partition(":")
+    else:
+        return None
+    if kind not in KINDS:
+        return None
+    try:
+        return kind, uuid.UUID(value)
+    except ValueError:
+        return None
+
+
+def resolve_iri(iri):
+    """Return the object identified by iri, or None, with a single query."""
+    parsed = parse_iri(iri)
+    if parsed is None:
+        return None
+    kind, value = parsed
+    return apps.get_model("dcat", kind).objects.filter(uuid=value).first()
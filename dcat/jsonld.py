@@ -0,0 +1,50 @@
+"""JSON-LD context and expansion of the DCAT output.
+
+The serializers use compact IRIs (``dct:title``, ``dcat:distribution``...).
+``CONTEXT`` maps those prefixes to their namespaces, so a compact document only
+needs it once at the top. ``expand()`` turns a compact node into the JSON-LD
+expanded form, with full IRIs, so consumers can skip the expansion algorithm.
+"""
+import functools
+
+CONTEXT = {
+    "dcat": "http://www.w3.org/ns/dcat#",
+    "dct": "http://purl.org/dc/terms/",
+    "foaf": "http://xmlns.com/foaf/0.1/",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "skos": "http://www.w3.org/2004/02/skos/core#",
+    "spdx": "http://spdx.org/rdf/terms#",
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def expand_iri(value):
+    """Return the full IRI of a compact IRI like ``dcat:Dataset``.
+
+    Values without a known prefix are returned unchanged.
+    """
+    prefix, sep, suffix = value.partition(":")
+    if sep and prefix in CONTEXT:
+        return CONTEXT[prefix] + suffix
+    return value
+
+
+def expand(node):
+    """Return the expanded form of a compact JSON-LD node."""
+    result = dict()
+    for key, value in node.items():
+        if key == "@id":
+            result[key] = value
+        elif key == "@type":
+            result[key] = [expand_iri(value)]
+        else:
+            result[expand_iri(key)] = _expand_values(value)
+    return result
+
+
+def _expand_values(value):
+    if isinstance(value, list):
+        return [item for v in value for item in _expand_values(v)]
+    if isinstance(value, dict):
+        return [expand(value)]
+    return [{"@value": value}]
@@ -0,0 +1,258 @@
+"""Check the external URLs of the catalog.
+
+Download and access URLs of distributions, landing pages of datasets and
+homepages of catalogs rot over time. ``check_urls()`` checks many of them
+concurrently with asyncio: every URL gets a HEAD request, or a GET for the
+first byte when the server doesn't support HEAD.
+
+The blocking HTTP requests run in a pool of threads. Every host keeps a few
+clients, each one keeping its connection open, so requests to the same host
+reuse connections.
+The number of simultaneous requests per host is limited and a delay between
+requests to the same host can be enforced to be polite with the servers.
+Redirects are followed one request at a time, each through the limits of
+the host it goes to.
+
+Results are stored in LinkCheck, and ``urls_to_check()`` only returns the
+URLs never checked or checked before a given age, so the check can run
+periodically and refresh the results incrementally.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import http.client
+import time
+import urllib.parse
+
+from django.utils import timezone
+
+from dcat.models import Catalog, Dataset, Distribution, LinkCheck
+
+USER_AGENT = "django-dcat link checker"
+MAX_REDIRECTS = 5
+
+
+class CheckResult:
+    """The outcome of checking a URL: an HTTP status or an error."""
+
+    __slots__ = (
+        "url",
+        "status",
+        "latency_ms",
+        "content_length",
+        "content_type",
+        "error",
+    )
+
+    def __init__(self, url):
+        self.url = url
+        self.status = None
+        self.latency_ms = None
+        self.content_length = None
+        self.content_type = ""
+        self.error = ""
+
+
+def collect_urls():
+    """Return the set of external URLs referenced by the catalogs."""
+    querysets = [
+        Distribution.objects.exclude(external_download_url="").values_list(
+            "external_download_url", flat=True
+        ),
+        Distribution.objects.exclude(external_access_url="").values_list(
+            "external_access_url", flat=True
+        ),
+        Dataset.objects.exclude(landing_page="").values_list("landing_page", flat=True),
+        Catalog.objects.exclude(homepage="").values_list("homepage", flat=True),
+    ]
+    urls = set()
+    for queryset in querysets:
+        urls.update(queryset.distinct().iterator())
+    return urls
+
+
+def urls_to_check(max_age):
+    """Return the URLs never checked, or checked before max_age (a timedelta)."""
+    cutoff = timezone.now() - max_age
+    fresh = LinkCheck.objects.filter(checked_at__gte=cutoff).values_list(
+        "url", flat=True
+    )
+    return sorted(collect_urls() - set(fresh.iterator()))
+
+
+def save_results(results):
+    """Insert or update the LinkCheck rows of results with a single query."""
+    now = timezone.now()
+    LinkCheck.objects.bulk_create(
+        [
+            LinkCheck(
+                url=r.url,
+                status=r.status,
+                latency_ms=r.latency_ms,
+                content_length=r.content_length,
+                content_type=r.content_type[:255],
+                error=r.error[:255],
+                checked_at=now,
+            )
+            for r in results
+        ],
+        update_conflicts=True,
+        unique_fields=["url"],
+        update_fields=[
+            "status",
+            "latency_ms",
+            "content_length",
+            "content_type",
+            "error",
+            "checked_at",
+        ],
+    )
+
+
+class _Client:
+    """Blocking HTTP client keeping its connections open between requests.
+
+    A client sends one request at a time: every worker of check_urls() has
+    its own client.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.connections = {}
+
+    def _connection(self, scheme, netloc):
+        connections = self.connections
+        key = (scheme, netloc)
+        if key not in connections:
+            if scheme == "https":
+                connection = http.client.HTTPSConnection(netloc, timeout=self.timeout)
+            else:
+                connection = http.client.HTTPConnection(netloc, timeout=self.timeout)
+            connections[key] = connection
+        return connections[key]
+
+    def _request(self, method, url, headers):
+        parts = urllib.parse.urlsplit(url)
+        path = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        headers = {"User-Agent": USER_AGENT, **headers}
+        connection = self._connection(parts.scheme, parts.netloc)
+        try:
+            connection.request(method, path, headers=headers)
+            response = connection.getresponse()
+        except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+            # The server closed the kept-alive connection, try once more.
+            connection.close()
+            connection.request(method, path, headers=headers)
+            response = connection.getresponse()
+        if method == "HEAD":
+            response.read()
+        if method != "HEAD" or response.will_close:
+            # The body of a GET is never read: servers ignoring Range send the
+            # whole file. The connection is closed instead, and the next
+            # request opens a new one.
+            response.close()
+            connection.close()
+        return response
+
+    def fetch(self, url):
+        """Return the response to a HEAD request, or to a GET of one byte."""
+        response = self._request("HEAD", url, {})
+        if response.status in (405, 501):
+            response = self._request("GET", url, {"Range": "bytes=0-0"})
+        return response
+
+    def close(self):
+        for connection in self.connections.values():
+            connection.close()
+
+
+def _set_response(result, response):
+    result.status = response.status
+    result.content_type = response.getheader("Content-Type", "")
+    content_range = response.getheader("Content-Range", "")
+    if response.status == 206 and "/" in content_range:
+        length = content_range.rsplit("/", 1)[1]
+    else:
+        length = response.getheader("Content-Length")
+    if length and length.isdigit():
+        result.content_length = int(length)
+
+
+class _Host:
+    """The limits of the requests to a host, and its idle clients."""
+
+    def __init__(self, per_host):
+        self.semaphore = asyncio.Semaphore(per_host)
+        self.lock = asyncio.Lock()
+        self.last_request = 0.0
+        self.clients = []
+
+
+async def check_urls(urls, concurrency=20, per_host=2, delay=0.0, timeout=10):
+    """Check urls and return a list of CheckResult.
+
+    At most ``concurrency`` requests run at the same time, with at most
+    ``per_host`` of them to the same host, and ``delay`` seconds between the
+    start of two requests to the same host. Requests following a redirect
+    count for the host they are sent to.
+    """
+    loop = asyncio.get_running_loop()
+    hosts = collections.defaultdict(lambda: _Host(per_host))
+    clients = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(url):
+        host = hosts[urllib.parse.urlsplit(url).netloc]
+        async with host.semaphore:
+            async with host.lock:
+                wait = host.last_request + delay - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                host.last_request = loop.time()
+            if host.clients:
+                client = host.clients.pop()
+            else:
+                client = _Client(timeout)
+                clients.append(client)
+            try:
+                async with semaphore:
+                    return await loop.run_in_executor(executor, client.fetch, url)
+            finally:
+                host.clients.append(client)
+
+    async def check(url):
+        result = CheckResult(url)
+        start = time.perf_counter()
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                response = await fetch(url)
+                location = response.getheader("Location")
+                if response.status not in (301, 302, 303, 307, 308) or not location:
+                    break
+                url = urllib.parse.urljoin(url, location)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            result.error = str(e) or e.__class__.__name__
+            return result
+        result.latency_ms = int((time.perf_counter() - start) * 1000)
+        _set_response(result, response)
+        return result
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        try:
+            return list(await asyncio.gather(*[check(url) for url in urls]))
+        finally:
+            for client in clients:
+                client.close()
+
+
+def check_links(urls, batch_size=1000, **options):
+    """Check urls in batches, saving the results of every batch.
+
+    Returns the number of checked URLs. ``options`` are passed to check_urls().
+    """
+    total = 0
+    for i in range(0, len(urls), batch_size):
+        results = asyncio.run(check_urls(urls[i : i + batch_size], **options))
+        save_results(results)
+        total += len(results)
+    return total
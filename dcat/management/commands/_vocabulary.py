@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+
+class VocabularyCommand(BaseCommand):
+    """Base command to import a vocabulary from dcat.vocabularies."""
+
+    vocabulary = None
+    label = "records"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            help="Path to the XML file of the vocabulary",
+            default=self.vocabulary.filename,
+        )
+
+    def handle(self, *args, **options):
+        vocabulary = self.vocabulary()
+        path = options.get("file")
+        if not os.path.isfile(path):
+            self.stdout.write(
+                self.style.ERROR(
+                    f"{path} does not exist. Please download it from {vocabulary.download_url}."
+                )
+            )
+            return
+
+        def on_skip(code):
+            self.stdout.write(self.style.WARNING(f"{code} is not valid. Skipping it."))
+
+        total = vocabulary.import_file(path, on_skip=on_skip)
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully imported {total} {self.label}.")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from dcat.archive import archive_catalog
+from dcat.models import Catalog
+
+
+class Command(BaseCommand):
+    help = "Archive a catalog and its datasets, hiding them until they are purged."
+
+    def add_arguments(self, parser):
+        parser.add_argument("catalog", type=int, help="Id of the catalog to archive")
+
+    def handle(self, *args, **options):
+        try:
+            catalog = Catalog.objects.get(pk=options.get("catalog"))
+        except Catalog.DoesNotExist:
+            msg = f"Catalog {options.get('catalog')} does not exist."
+            self.stdout.write(self.style.ERROR(msg))
+            return
+
+        total = archive_catalog(catalog)
+        msg = f"Archived {catalog} and {total} datasets."
+        self.stdout.write(self.style.SUCCESS(msg))
@@ -0,0 +1,73 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from dcat import tasks
+from dcat.linkcheck import check_links, urls_to_check
+
+
+class Command(BaseCommand):
+    help = "Check the external URLs of the catalogs and store the results."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--max-age-days",
+            type=int,
+            default=7,
+            help="Check again the URLs checked longer ago than this number of days",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=20,
+            help="Maximum number of simultaneous requests",
+        )
+        parser.add_argument(
+            "--per-host",
+            type=int,
+            default=2,
+            help="Maximum number of simultaneous requests to the same host",
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.0,
+            help="Seconds between two requests to the same host",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=10,
+            help="Seconds to wait for a response",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of URLs checked between two saves of the results",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Queue tasks for run_tasks instead of checking the URLs now",
+        )
+
+    def handle(self, *args, **options):
+        max_age = datetime.timedelta(days=options.get("max_age_days"))
+        urls = urls_to_check(max_age)
+        check_options = {
+            "concurrency": options.get("concurrency"),
+            "per_host": options.get("per_host"),
+            "delay": options.get("delay"),
+            "timeout": options.get("timeout"),
+        }
+        if options.get("background"):
+            parent = tasks.check_links.fan_out(
+                urls, options.get("batch_size"), argument="urls", **check_options
+            )
+            msg = f"Queued {len(urls)} URLs in {parent.total} tasks (task {parent.pk})."
+            self.stdout.write(self.style.SUCCESS(msg))
+            return
+
+        total = check_links(urls, batch_size=options.get("batch_size"), **check_options)
+        self.stdout.write(self.style.SUCCESS(f"Checked {total} URLs."))
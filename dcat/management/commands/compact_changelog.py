@@ -0,0 +1,23 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from dcat.changes import compact_changelog
+
+
+class Command(BaseCommand):
+    help = "Delete the change log entries superseded by a newer entry."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Only compact the entries older than this number of days",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(days=options.get("days"))
+        total = compact_changelog(before)
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} change log entries."))
@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from dcat.dedup import SPECS, find_duplicates, merge
+
+
+class Command(BaseCommand):
+    help = "Merge duplicated agents, keywords and licences."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            choices=sorted(SPECS),
+            action="append",
+            help="Only deduplicate this model (can be repeated)",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=1.0,
+            help="Similarity (0-1) from which names are duplicates, 1 for equal names",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report the duplicates without merging them",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        report = {}
+        for name in options.get("model") or sorted(SPECS):
+            spec = SPECS[name]
+            clusters = find_duplicates(spec, threshold=options.get("threshold"))
+            report[name] = [cluster.to_dict() for cluster in clusters]
+            if not options.get("json"):
+                self._write_report(name, clusters)
+            if not options.get("dry_run"):
+                merge(spec, clusters)
+
+        if options.get("json"):
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        total = sum(
+            len(cluster["duplicates"])
+            for clusters in report.values()
+            for cluster in clusters
+        )
+        if options.get("dry_run"):
+            self.stdout.write(self.style.WARNING(f"Found {total} duplicates."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Merged {total} duplicates."))
+
+    def _write_report(self, name, clusters):
+        for cluster in clusters:
+            survivor = cluster.survivor
+            duplicates = ", ".join(f"{d.pk} {d.value!r}" for d in cluster.duplicates)
+            msg = f"{name} {survivor.pk} {survivor.value!r} <- {duplicates}"
+            self.stdout.write(msg)
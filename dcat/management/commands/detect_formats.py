@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+
+from dcat import tasks
+from dcat.formats import detect_formats
+from dcat.models import Distribution
+
+
+class Command(BaseCommand):
+    help = "Detect the format and size of the files of the distributions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--catalog", type=int, help="Only inspect the files of this catalog id"
+        )
+        parser.add_argument(
+            "--overwrite",
+            action="store_true",
+            help="Replace the formats already set with the detected ones",
+        )
+        parser.add_argument(
+            "--workers", type=int, default=8, help="Number of threads reading files"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of distributions updated at once",
+        )
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Queue a task per batch for run_tasks instead of reading the files",
+        )
+
+    def handle(self, *args, **options):
+        distributions = Distribution.objects.all()
+        if options.get("catalog"):
+            distributions = distributions.filter(
+                dataset__catalog_id=options.get("catalog")
+            )
+
+        if options.get("background"):
+            ids = distributions.exclude(file="").values_list("pk", flat=True)
+            parent = tasks.detect_formats.fan_out(
+                ids.order_by("pk"),
+                options.get("batch_size"),
+                overwrite=options.get("overwrite"),
+            )
+            msg = f"Queued {parent.total} tasks (task {parent.pk})."
+            self.stdout.write(self.style.SUCCESS(msg))
+            return
+
+        total = detect_formats(
+            distributions,
+            workers=options.get("workers"),
+            batch_size=options.get("batch_size"),
+            overwrite=options.get("overwrite"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {total} distributions."))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from dcat.encoders import get_backend
+from dcat.models import Catalog
+from dcat.routers import use_replica
+from dcat.serializers import iter_catalog_jsonld
+
+
+class Command(BaseCommand):
+    help = "Export a catalog to a JSON-LD file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("catalog", type=int, help="Id of the catalog to export")
+        parser.add_argument(
+            "--output", help="Path to the output file", default="catalog.jsonld"
+        )
+        parser.add_argument(
+            "--expanded",
+            action="store_true",
+            help="Write the expanded form (full IRIs) instead of the compact one",
+        )
+
+    def handle(self, *args, **options):
+        # Only reads: served by the replica when there is one.
+        with use_replica():
+            self._export(options)
+
+    def _export(self, options):
+        try:
+            catalog = Catalog.objects.get(pk=options.get("catalog"))
+        except Catalog.DoesNotExist:
+            msg = f"Catalog {options.get('catalog')} does not exist."
+            self.stdout.write(self.style.ERROR(msg))
+            return
+
+        with open(options.get("output"), "wb") as f:
+            for chunk in iter_catalog_jsonld(catalog, expanded=options.get("expanded")):
+                f.write(chunk)
+
+        msg = f"Catalog exported to {options.get('output')} using {get_backend().name}."
+        self.stdout.write(self.style.SUCCESS(msg))
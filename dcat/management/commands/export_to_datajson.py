@@ -0,0 +1,45 @@
+import pathlib
+
+from django.core.management.base import BaseCommand
+
+from dcat.datajson import export_files, iter_datajson
+from dcat.models import Catalog
+from dcat.routers import use_replica
+
+
+class Command(BaseCommand):
+    help = "Export a catalog to a DCAT-US file that import_from_datajson can read."
+
+    def add_arguments(self, parser):
+        parser.add_argument("catalog", type=int, help="Id of the catalog to export")
+        parser.add_argument(
+            "--file", help="Path to the data.json file", default="data.json"
+        )
+        parser.add_argument(
+            "--datapath",
+            type=pathlib.Path,
+            help="Copy the files of the distributions to this data folder",
+        )
+
+    def handle(self, *args, **options):
+        # Only reads: served by the replica when there is one.
+        with use_replica():
+            self._export(options)
+
+    def _export(self, options):
+        try:
+            catalog = Catalog.objects.get(pk=options.get("catalog"))
+        except Catalog.DoesNotExist:
+            msg = f"Catalog {options.get('catalog')} does not exist."
+            self.stdout.write(self.style.ERROR(msg))
+            return
+
+        with open(options.get("file"), "wb") as f:
+            for chunk in iter_datajson(catalog):
+                f.write(chunk)
+
+        if options.get("datapath"):
+            total = export_files(catalog, options.get("datapath"))
+            self.stdout.write(f"Copied {total} files to {options.get('datapath')}.")
+
+        self.stdout.write(self.style.SUCCESS("Data exported successfully"))
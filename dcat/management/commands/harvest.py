@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+
+from dcat.harvest import harvest
+from dcat.models import HarvestSource
+
+
+class Command(BaseCommand):
+    help = "Harvest the remote DCAT JSON-LD catalogs of the harvest sources."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            action="append",
+            default=[],
+            help="URL of a source to harvest (added if new), can be repeated",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=10,
+            help="Maximum number of sources fetched at the same time",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of datasets written at once",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30,
+            help="Seconds to wait for a response",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Harvest the sources even if they weren't modified",
+        )
+
+    def handle(self, *args, **options):
+        sources = None
+        if options.get("source"):
+            for url in options.get("source"):
+                HarvestSource.objects.get_or_create(url=url)
+            sources = HarvestSource.objects.filter(url__in=options.get("source"))
+
+        harvested = harvest(
+            sources,
+            concurrency=options.get("concurrency"),
+            batch_size=options.get("batch_size"),
+            timeout=options.get("timeout"),
+            force=options.get("force"),
+        )
+        for source in harvested:
+            if source.status == HarvestSource.FAILED:
+                msg = f"{source.url}: {source.error}"
+                self.stdout.write(self.style.ERROR(msg))
+            else:
+                msg = f"{source.url}: {source.get_status_display()}"
+                msg += f", {source.dataset_count} datasets."
+                self.stdout.write(self.style.SUCCESS(msg))
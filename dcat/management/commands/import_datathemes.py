@@ -0,0 +1,8 @@
+from dcat.management.commands._vocabulary import VocabularyCommand
+from dcat.vocabularies import DataThemeVocabulary
+
+
+class Command(VocabularyCommand):
+    help = "Import the EU's Data theme vocabulary into the database."
+    vocabulary = DataThemeVocabulary
+    label = "data themes"
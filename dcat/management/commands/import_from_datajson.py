@@ -1,13 +1,15 @@
+import datetime
 import json
 import pathlib
+import uuid
 
 from os import listdir
 
-from django.core.exceptions import ObjectDoesNotExist
 from django.core.files.base import ContentFile
 from django.core.management.base import BaseCommand
 from django.utils.text import slugify
 
+from dcat.cards import refresh_dataset_cards, suspend_card_updates
 from dcat.models import (
     Catalog,
     Dataset,
@@ -18,6 +20,29 @@ from dcat.models import (
     DataTheme,
     Keyword,
 )
+from dcat.stats import refresh_catalog_statistics, suspend_statistics_updates
+
+
+def _parse_date(value):
+    """Return the date part of an ISO 8601 date or datetime, or None."""
+    if not value:
+        return None
+    return datetime.date.fromisoformat(value[:10])
+
+
+def _new_uuid(model, identifier):
+    """Return identifier as the uuid of a new object, if it is a free UUID.
+
+    Catalogs exported with export_to_datajson use the uuid as identifier, so
+    importing them keeps the IRIs of their objects.
+    """
+    try:
+        value = uuid.UUID(str(identifier))
+    except ValueError:
+        return None
+    if model.objects.filter(uuid=value).exists():
+        return None
+    return value
 
 
 class Command(BaseCommand):
@@ -45,6 +70,10 @@ class Command(BaseCommand):
         except IndexError:
             msg = f'{distribution.get("identifier")} folder does not have a file'
             self.stdout.write(self.style.ERROR(msg))
+        except FileNotFoundError:
+            # Nothing was downloaded for this distribution (e.g. it is only
+            # available through its access URL).
+            pass
         return file
 
     def add_arguments(self, parser):
@@ -68,15 +97,27 @@ class Command(BaseCommand):
         with options.get("file") as file:
             data = json.load(file)
 
+        # Cards and statistics are refreshed once for the whole catalog instead
+        # of on every save.
+        with suspend_card_updates(), suspend_statistics_updates():
+            catalog = self._import_catalog(data, options)
+        refresh_dataset_cards(Dataset.objects.filter(catalog=catalog))
+        refresh_catalog_statistics(Catalog.objects.filter(pk=catalog.pk))
+
+        self.stdout.write(self.style.SUCCESS("Data imported successfully"))
+
+    def _import_catalog(self, data, options):
         title = data.get("title")
         description = data.get("description")
         publisher, _ = Agent.objects.get_or_create(
             name=data.get("publisher").get("name"),
-            mbox=data.get("publisher").get("mbox", ""),
-        )
-        catalog_licence, _ = LicenceDocument.objects.get_or_create(
-            label=data.get("license")
+            mbox=data.get("publisher").get("mbox"),
         )
+        catalog_licence = None
+        if data.get("license"):
+            catalog_licence, _ = LicenceDocument.objects.get_or_create(
+                label=data.get("license")
+            )
         catalog = Catalog.objects.create(
             title=title,
             description=description,
@@ -91,8 +132,7 @@ class Command(BaseCommand):
 
             theme_obj, _ = DataTheme.objects.get_or_create(
                 code=theme_id,
-                label=theme_label,
-                description=theme_description,
+                defaults={"label": theme_label, "description": theme_description},
             )
             catalog.themes.add(theme_obj)
 
@@ -102,19 +142,26 @@ class Command(BaseCommand):
             dataset_info = {}
             dataset_info["title"] = dataset.get("title")
             dataset_info["description"] = dataset.get("description")
-            dataset_info["publisher"], _ = Agent.objects.get_or_create(
-                name=dataset.get("publisher").get("name"),
-                mbox=dataset.get("publisher").get("mbox", ""),
-            )
+            dataset_info["publisher"] = None
+            if dataset.get("publisher"):
+                dataset_info["publisher"], _ = Agent.objects.get_or_create(
+                    name=dataset.get("publisher").get("name"),
+                    mbox=dataset.get("publisher").get("mbox"),
+                )
             dataset_info["catalog"] = catalog
+            dataset_info["issued"] = _parse_date(dataset.get("issued"))
+            dataset_info["modified"] = _parse_date(dataset.get("modified"))
+            dataset_info["landing_page"] = dataset.get("landingPage", "")
+            dataset_uuid = _new_uuid(Dataset, dataset.get("identifier"))
+            if dataset_uuid:
+                dataset_info["uuid"] = dataset_uuid
             dataset_created = Dataset.objects.create(**dataset_info)
 
             for theme in dataset.get("theme", []):
-                try:
-                    dataset_theme = DataTheme.objects.get(code=theme)
-                except ObjectDoesNotExist:
-                    msg = f"Theme of {dataset.get('identifier')} does not existed a theme"
-                    self.stdout.write(self.style.WARNING(msg))
+                # The taxonomy only lists the themes of the catalog.
+                dataset_theme, _ = DataTheme.objects.get_or_create(
+                    code=theme, defaults={"label": theme}
+                )
                 dataset_created.themes.add(dataset_theme)
 
             for keyword in dataset.get("keyword", []):
@@ -130,11 +177,21 @@ class Command(BaseCommand):
                 distribution_info["dataset"] = dataset_created
                 distribution_info["title"] = distribution.get("title")
                 distribution_info["description"] = distribution.get("description", "")
+                distribution_info["external_access_url"] = distribution.get("accessURL", "")
+                distribution_uuid = _new_uuid(Distribution, distribution.get("identifier"))
+                if distribution_uuid:
+                    distribution_info["uuid"] = distribution_uuid
                 distribution_info["file"] = self._get_content_file(
                     dataset, distribution, datapath=options.get("datapath")
                 )
                 file_name = distribution.get("fileName")
-                if not file_name:
+                if file_name and distribution_info["file"] is None:
+                    # The file wasn't exported with the catalog: keep the URL
+                    # it was downloaded from.
+                    distribution_info["external_download_url"] = distribution.get(
+                        "downloadURL", ""
+                    )
+                elif not file_name:
                     # If the file name is not provided, the dataset is hosted
                     # in another portal. We add the download_url instead.
                     external_download = distribution.get("downloadURL")
@@ -158,4 +215,4 @@ class Command(BaseCommand):
 
                 Distribution.objects.create(**distribution_info)
 
-        self.stdout.write(self.style.SUCCESS("Data imported successfully"))
+        return catalog
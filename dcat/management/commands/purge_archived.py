@@ -0,0 +1,43 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from dcat import tasks
+from dcat.archive import delete_files, purge_archived
+
+
+class Command(BaseCommand):
+    help = "Delete the catalogs and datasets archived some days ago."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Only purge what was archived more than this number of days ago",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of datasets deleted in every transaction",
+        )
+        parser.add_argument(
+            "--delete-files-now",
+            action="store_true",
+            help="Delete the files here instead of queuing tasks for run_tasks",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - datetime.timedelta(days=options.get("days"))
+        total = purge_archived(
+            before,
+            batch_size=options.get("batch_size"),
+            on_files=delete_files if options.get("delete_files_now") else _queue,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Purged {total} datasets."))
+
+
+def _queue(names):
+    tasks.delete_files.enqueue(names=names)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from dcat.models import Catalog
+from dcat.stats import refresh_catalog_statistics
+
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed statistics of catalogs used by dashboards."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--catalog", type=int, help="Only rebuild the statistics of this catalog id"
+        )
+
+    def handle(self, *args, **options):
+        catalogs = Catalog.objects.all()
+        if options.get("catalog"):
+            catalogs = catalogs.filter(pk=options.get("catalog"))
+
+        total = refresh_catalog_statistics(catalogs)
+        msg = f"Successfully rebuilt the statistics of {total} catalogs."
+        self.stdout.write(self.style.SUCCESS(msg))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from dcat.cards import refresh_dataset_cards
+from dcat.models import Dataset, DatasetCard
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized DatasetCard rows used by listing pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--catalog", type=int, help="Only rebuild the cards of this catalog id"
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only build the cards of datasets that don't have one yet",
+        )
+
+    def handle(self, *args, **options):
+        datasets = Dataset.objects.all()
+        if options.get("catalog"):
+            datasets = datasets.filter(catalog_id=options.get("catalog"))
+        if options.get("missing"):
+            datasets = datasets.exclude(
+                pk__in=DatasetCard.objects.values("dataset_id")
+            )
+
+        total = refresh_dataset_cards(datasets)
+        self.stdout.write(self.style.SUCCESS(f"Successfully rebuilt {total} cards."))
@@ -0,0 +1,52 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import autodiscover_modules
+
+from dcat.tasks import requeue_stale, work
+
+
+class Command(BaseCommand):
+    help = "Run the background tasks queued in the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there are no pending tasks instead of waiting for more",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait before looking for new tasks",
+        )
+        parser.add_argument(
+            "--max-tasks", type=int, help="Exit after running this number of tasks"
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            help="Queue again the tasks running for longer than this number of minutes",
+        )
+        parser.add_argument(
+            "--worker", help="Name of the worker, hostname:pid by default"
+        )
+
+    def handle(self, *args, **options):
+        # Register the tasks of every installed app.
+        autodiscover_modules("tasks")
+
+        if options.get("stale_minutes"):
+            timeout = datetime.timedelta(minutes=options.get("stale_minutes"))
+            requeued = requeue_stale(timeout)
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale tasks.")
+
+        total = work(
+            worker=options.get("worker"),
+            once=options.get("once"),
+            sleep=options.get("sleep"),
+            max_tasks=options.get("max_tasks"),
+        )
+        self.stdout.write(self.style.SUCCESS(f"Ran {total} tasks."))
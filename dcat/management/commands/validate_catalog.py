@@ -0,0 +1,47 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from dcat.models import Catalog
+from dcat.routers import use_replica
+from dcat.validation import validate_catalog
+
+
+class Command(BaseCommand):
+    help = "Check the DCAT-AP conformance of a catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument("catalog", type=int, help="Id of the catalog to validate")
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON"
+        )
+
+    def handle(self, *args, **options):
+        # Only reads: served by the replica when there is one.
+        with use_replica():
+            self._validate(options)
+
+    def _validate(self, options):
+        try:
+            catalog = Catalog.objects.get(pk=options.get("catalog"))
+        except Catalog.DoesNotExist:
+            msg = f"Catalog {options.get('catalog')} does not exist."
+            self.stdout.write(self.style.ERROR(msg))
+            return
+
+        report = validate_catalog(catalog)
+        if options.get("json"):
+            self.stdout.write(json.dumps(report.to_dict(), indent=2))
+            return
+
+        for result in report.errors:
+            msg = f"{result.rule}: {result.failures} of {result.total} missing."
+            self.stdout.write(self.style.ERROR(msg))
+        for result in report.warnings:
+            msg = f"{result.rule}: {result.failures} of {result.total} missing."
+            self.stdout.write(self.style.WARNING(msg))
+
+        if report.is_conformant:
+            self.stdout.write(self.style.SUCCESS(f"{catalog} conforms to DCAT-AP."))
+        else:
+            self.stdout.write(self.style.ERROR(f"{catalog} does not conform to DCAT-AP."))
@@ -0,0 +1,198 @@
+"""The JSON-LD of every model, as tables of fields.
+
+Each table is a Mapping from columns to JSON-LD keys, in the order of the
+document. ``to_jsonld()`` reads the columns from the attributes of a model
+instance, and dcat.serializers from the plain tuples of ``values_list()``,
+so both always produce the same document.
+
+This module doesn't import the models, so dcat.models can use it.
+"""
+from django.apps import apps
+from django.db.models.fields.files import FieldFile
+
+from dcat.iris import build_download_url, build_iri
+
+
+class Mapping:
+    """A precompiled mapping from a row of columns to a JSON-LD dict.
+
+    ``fields`` is a list of ``(key, columns, build)``. ``build`` receives the
+    values of ``columns`` and returns the JSON-LD value, or the value of the
+    single column is used when it is None. Empty values are only emitted for
+    the keys listed in ``required``. The values of ``related`` (lists of
+    related objects) aren't read from the database: they follow the columns
+    in the row.
+    """
+
+    def __init__(self, fields, required=(), related=()):
+        columns = []
+        for _, field_columns, _ in fields:
+            columns.extend(
+                c for c in field_columns if c not in columns and c not in related
+            )
+        self.columns = tuple(columns)
+        self.related = tuple(related)
+        names = self.columns + self.related
+        self._plan = tuple(
+            (key, tuple(names.index(c) for c in field_columns), build, key in required)
+            for key, field_columns, build in fields
+        )
+
+    def __call__(self, row):
+        result = dict()
+        for key, indexes, build, required in self._plan:
+            if build is None:
+                value = row[indexes[0]]
+            else:
+                value = build(*[row[i] for i in indexes])
+            if value or required:
+                result[key] = value
+        return result
+
+    def from_instance(self, obj, **related):
+        """Return the JSON-LD of a model instance, with the related values."""
+        row = [_attribute(obj, column) for column in self.columns]
+        row.extend(related[name] for name in self.related)
+        return self(row)
+
+
+def _attribute(obj, column):
+    """Return the value of a column like ``publisher__name`` on an instance."""
+    for name in column.split("__"):
+        if obj is None:
+            return None
+        obj = getattr(obj, name)
+    # values_list() returns the name of files.
+    return (obj.name or "") if isinstance(obj, FieldFile) else obj
+
+
+def _constant(value):
+    return lambda: value
+
+
+def _iri(kind):
+    return lambda value: build_iri(kind, value)
+
+
+def _related(name, mapping):
+    """Return the columns and build of the object of a foreign key."""
+    columns = (f"{name}_id", *(f"{name}__{c}" for c in mapping.columns))
+    return columns, lambda pk, *values: None if pk is None else mapping(values)
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _document(url):
+    return {"@type": "foaf:Document", "foaf:Document": url} if url else None
+
+
+def _download_url(external_download_url, uuid, file):
+    if external_download_url:
+        return external_download_url
+    if file:
+        storage = apps.get_model("dcat", "Distribution")._meta.get_field("file").storage
+        return build_download_url(uuid) or storage.url(file)
+    return ""
+
+
+def _access_url(external_access_url, uuid, file):
+    return external_access_url or _download_url("", uuid, file)
+
+
+AGENT = Mapping(
+    [
+        ("@id", ("uuid",), _iri("agent")),
+        ("foaf:name", ("name",), None),
+        ("@type", ("type",), None),
+    ],
+    required=("foaf:name",),
+)
+
+MEDIA_TYPE = Mapping(
+    [
+        ("@type", (), _constant("dct:MediaTypeOrExtent")),
+        ("rdfs:label", ("extension",), None),
+    ],
+    required=("@type", "rdfs:label"),
+)
+
+LICENCE = Mapping(
+    [
+        ("@type", (), _constant("dct:LicenseDocument")),
+        ("rdfs:label", ("label",), None),
+        ("dct:type", ("url_general", "label"), lambda url, label: url or label),
+    ],
+    required=("@type", "rdfs:label"),
+)
+
+THEME = Mapping(
+    [
+        ("@type", (), _constant("skos:Concept")),
+        ("skos:notation", ("code",), None),
+        ("skos:prefLabel", ("label",), None),
+    ],
+    required=("@type", "skos:notation", "skos:prefLabel"),
+)
+
+CHECKSUM = Mapping(
+    [
+        ("@type", (), _constant("spdx:Checksum")),
+        ("spdx:algorithm", ("algorithm",), None),
+        ("spdx:checksumValue", ("checksum_value",), None),
+    ],
+    required=("@type", "spdx:algorithm", "spdx:checksumValue"),
+)
+
+# The datasets of catalogs are serialized one by one, after the other keys.
+CATALOG = Mapping(
+    [
+        ("@id", ("uuid",), _iri("catalog")),
+        ("@type", (), _constant("dcat:Catalog")),
+        ("dct:title", ("title",), None),
+        ("dct:description", ("description",), None),
+        ("dct:publisher", *_related("publisher", AGENT)),
+        ("foaf:homepage", ("homepage",), _document),
+    ],
+    required=("@type", "dct:title", "dct:description"),
+)
+
+DATASET = Mapping(
+    [
+        ("@id", ("uuid",), _iri("dataset")),
+        ("@type", (), _constant("dcat:Dataset")),
+        ("dct:title", ("title",), None),
+        ("dct:description", ("description",), None),
+        ("dct:publisher", *_related("publisher", AGENT)),
+        ("dcat:theme", ("themes",), None),
+        ("dcat:keyword", ("keywords",), None),
+        ("dct:issued", ("issued",), _isoformat),
+        ("dct:modified", ("modified",), _isoformat),
+        ("dcat:landingPage", ("landing_page",), _document),
+        ("dcat:distribution", ("distributions",), None),
+    ],
+    required=("@type", "dct:title", "dcat:distribution"),
+    related=("themes", "keywords", "distributions"),
+)
+
+DISTRIBUTION = Mapping(
+    [
+        ("@id", ("uuid",), _iri("distribution")),
+        ("@type", (), _constant("dcat:Distribution")),
+        ("dcat:accessURL", ("external_access_url", "uuid", "file"), _access_url),
+        (
+            "dcat:downloadURL",
+            ("external_download_url", "uuid", "file"),
+            _download_url,
+        ),
+        ("dct:title", ("title",), None),
+        ("dct:description", ("description",), None),
+        ("dct:format", *_related("format", MEDIA_TYPE)),
+        ("dcat:mediaType", ("format__media_type",), None),
+        ("dct:license", *_related("licence", LICENCE)),
+        ("dcat:byteSize", ("byte_size",), None),
+        ("spdx:checksum", *_related("checksum", CHECKSUM)),
+    ],
+    required=("@type", "dcat:accessURL"),
+)
@@ -0,0 +1,56 @@
+"""Middleware choosing the database of the DCAT queries of every request.
+
+See dcat.routers.
+"""
+import contextvars
+
+from django.conf import settings
+
+from dcat.routers import is_pinned, use_primary, use_replica
+
+PIN_COOKIE = "dcat_primary"
+
+
+class ReplicaMiddleware:
+    """Read from the replica in safe requests, and from the primary otherwise.
+
+    After a request that writes DCAT models, the client reads from the
+    primary for ``DCAT_REPLICA_PIN_SECONDS`` (a cookie remembers it), so it
+    sees its own changes even when the replica lags behind, for example on
+    the page the admin redirects to after saving. Requests that don't write,
+    like queries sent with POST, don't pin the client.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in ("GET", "HEAD", "OPTIONS")
+        pinned = PIN_COOKIE in request.COOKIES
+        with use_replica() if safe and not pinned else use_primary():
+            response = self.get_response(request)
+            wrote = is_pinned()
+            if response.streaming and not response.is_async:
+                # Streamed content is produced after this block ends.
+                response.streaming_content = _run_in_context(
+                    contextvars.copy_context(), response.streaming_content
+                )
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=getattr(settings, "DCAT_REPLICA_PIN_SECONDS", 15),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+def _run_in_context(context, iterable):
+    """Yield the items of iterable, producing each of them inside context."""
+    iterator = iter(iterable)
+    while True:
+        try:
+            yield context.run(next, iterator)
+        except StopIteration:
+            return
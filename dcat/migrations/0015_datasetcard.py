@@ -0,0 +1,52 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcat", "0014_alter_agent_mbox_alter_agent_name_alter_agent_type_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetCard",
+            fields=[
+                (
+                    "dataset",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="card",
+                        serialize=False,
+                        to="dcat.dataset",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("publisher_name", models.CharField(blank=True, max_length=255)),
+                ("theme_labels", models.JSONField(default=list)),
+                ("keyword_names", models.JSONField(default=list)),
+                ("distribution_count", models.PositiveIntegerField(default=0)),
+                ("formats", models.JSONField(default=list)),
+                ("modified", models.DateField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "catalog",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="dcat.catalog",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["catalog", "title"],
+                        name="dcat_datase_catalog_67e48b_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcat", "0015_datasetcard"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="agent",
+            name="uuid",
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="catalog",
+            name="uuid",
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="dataset",
+            name="uuid",
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="distribution",
+            name="uuid",
+            field=models.UUIDField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.1.2 on 2026-10-19 09:13
+
+import uuid
+
+from django.db import migrations
+
+
+def populate_uuid(apps, schema_editor):
+    for model_name in ("Agent", "Catalog", "Dataset", "Distribution"):
+        model = apps.get_model("dcat", model_name)
+        objects = list(model.objects.filter(uuid__isnull=True).only("pk"))
+        for obj in objects:
+            obj.uuid = uuid.uuid4()
+        model.objects.bulk_update(objects, ["uuid"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcat", "0016_add_uuid"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_uuid, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcat", "0019_changelogentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LinkCheck",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.URLField(max_length=2000, unique=True)),
+                ("status", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("latency_ms", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "content_length",
+                    models.PositiveBigIntegerField(blank=True, null=True),
+                ),
+                ("content_type", models.CharField(blank=True, max_length=255)),
+                ("error", models.CharField(blank=True, max_length=255)),
+                ("checked_at", models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcat", "0020_linkcheck"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="distribution",
+            name="byte_size",
+            field=models.PositiveBigIntegerField(
+                blank=True, help_text="The size of the file in bytes.", null=True
+            ),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcat", "0022_task"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="catalog",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="dataset",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="distribution",
+            name="archived_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
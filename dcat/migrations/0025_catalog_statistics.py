@@ -0,0 +1,56 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcat", "0024_upload_session"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogStatistics",
+            fields=[
+                (
+                    "catalog",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="statistics",
+                        serialize=False,
+                        to="dcat.catalog",
+                    ),
+                ),
+                ("dataset_count", models.BigIntegerField(default=0)),
+                ("distribution_count", models.BigIntegerField(default=0)),
+                (
+                    "byte_size",
+                    models.BigIntegerField(
+                        default=0,
+                        help_text="The total size of the files of the distributions.",
+                    ),
+                ),
+                (
+                    "formats",
+                    models.JSONField(
+                        default=dict,
+                        help_text="The number of distributions by format extension.",
+                    ),
+                ),
+                (
+                    "last_modified",
+                    models.DateField(
+                        blank=True,
+                        help_text="The latest modification date of a dataset.",
+                        null=True,
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "catalog statistics",
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 6.1.2 on 2026-10-19 03:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dcat", "0025_catalog_statistics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HarvestSource",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("url", models.URLField(max_length=2000, unique=True)),
+                ("enabled", models.BooleanField(default=True)),
+                ("etag", models.CharField(blank=True, max_length=255)),
+                ("last_modified", models.CharField(blank=True, max_length=64)),
+                (
+                    "status",
+                    models.CharField(
+                        blank=True,
+                        choices=[
+                            ("ok", "Harvested"),
+                            ("not-modified", "Not modified"),
+                            ("failed", "Failed"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("dataset_count", models.PositiveIntegerField(default=0)),
+                ("harvested_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "catalog",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="harvest_source",
+                        to="dcat.catalog",
+                    ),
+                ),
+            ],
+        ),
+    ]
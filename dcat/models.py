@@ -11,8 +11,25 @@ the DCAT-AP specification.
 
 """
 import hashlib
+import uuid
 
 from django.db import models
+from django.utils import timezone
+
+from dcat import mappings
+from dcat.iris import build_download_url, build_iri
+
+
+def _is_prefetched(instance, name):
+    """Return True if the related objects of name were prefetched."""
+    return name in getattr(instance, "_prefetched_objects_cache", {})
+
+
+class ActiveManager(models.Manager):
+    """Manager of the rows that are not archived. See dcat.archive."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(archived_at__isnull=True)
 
 
 class Agent(models.Model):
@@ -37,12 +54,14 @@ class Agent(models.Model):
         blank=True, null=True, help_text="An email address of the Agent."
     )
 
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+
+    @property
+    def iri(self):
+        return build_iri("agent", self.uuid)
+
     def to_jsonld(self):
-        result = dict()
-        result["foaf:name"] = self.name
-        if self.type:
-            result["@type"] = self.type
-        return result
+        return mappings.AGENT.from_instance(self)
 
     def __str__(self):
         return self.name
@@ -77,17 +96,20 @@ class Catalog(models.Model):
         blank=True, help_text="A web page that acts as the main page for the Catalogue."
     )
 
-    def to_jsonld(self):
-        result = dict()
-        result["@type"] = "dcat:Catalog"
-        result["dct:title"] = self.title
-        result["dct:description"] = self.description
-        result["dct:publisher"] = self.publisher.to_jsonld()
-        if self.homepage:
-            result["foaf:homepage"] = {"@type": "foaf:Document", "foaf:Document": self.homepage}
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    archived_at = models.DateTimeField(blank=True, null=True, db_index=True)
 
-        result["dcat:dataset"] = [dataset.to_jsonld() for dataset in self.dataset_set.all()]
+    objects = ActiveManager()
+    all_objects = models.Manager()
 
+    @property
+    def iri(self):
+        return build_iri("catalog", self.uuid)
+
+    def to_jsonld(self):
+        result = mappings.CATALOG.from_instance(self)
+        datasets = self.dataset_set.for_jsonld()
+        result["dcat:dataset"] = [dataset.to_jsonld() for dataset in datasets]
         return result
 
     def __str__(self):
@@ -107,6 +129,22 @@ class Catalog(models.Model):
 #     pass
 
 
+class DatasetQuerySet(models.QuerySet):
+    def for_jsonld(self):
+        """Fetch everything Dataset.to_jsonld() needs for the whole queryset.
+
+        The publishers are joined and themes, keywords and distributions are
+        prefetched, so serializing any number of datasets takes five queries.
+        """
+        return self.select_related("publisher").prefetch_related(
+            "themes",
+            "keywords",
+            models.Prefetch(
+                "distribution_set", queryset=Distribution.objects.for_jsonld()
+            ),
+        )
+
+
 class Dataset(models.Model):
     """A conceptual entity that represents the information published."""
 
@@ -146,14 +184,27 @@ class Dataset(models.Model):
         help_text="A web page that provides access to the Dataset, its Distributions and/or additional information. It is intended to point to a landing page at the original data provider, not to a page on a site of a third party, such as an aggregator.",
     )
 
-    def to_jsonld(self):
-        result = dict()
-        result["dct:title"] = self.title
-        if self.description:
-            result["dct:description"] = self.description
-        result["dcat:distribution"] = [d.to_jsonld() for d in self.distribution_set.all()]
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    archived_at = models.DateTimeField(blank=True, null=True, db_index=True)
 
-        return result
+    objects = ActiveManager.from_queryset(DatasetQuerySet)()
+    all_objects = DatasetQuerySet.as_manager()
+
+    @property
+    def iri(self):
+        return build_iri("dataset", self.uuid)
+
+    def to_jsonld(self):
+        if _is_prefetched(self, "distribution_set"):
+            distributions = self.distribution_set.all()
+        else:
+            distributions = self.distribution_set.for_jsonld()
+        return mappings.DATASET.from_instance(
+            self,
+            themes=[theme.to_jsonld() for theme in self.themes.all()],
+            keywords=[keyword.name for keyword in self.keywords.all()],
+            distributions=[d.to_jsonld() for d in distributions],
+        )
 
     def __str__(self):
         return self.title
@@ -169,6 +220,12 @@ class Dataset(models.Model):
 #     pass
 
 
+class DistributionQuerySet(models.QuerySet):
+    def for_jsonld(self):
+        """Fetch everything Distribution.to_jsonld() needs in a single query."""
+        return self.select_related("format", "licence", "checksum")
+
+
 class Distribution(models.Model):
     """A physical embodiment of the Dataset in a particular format.
 
@@ -187,18 +244,20 @@ class Distribution(models.Model):
     # Mandatory properties
     dataset = models.ForeignKey("Dataset", on_delete=models.CASCADE)
 
+    objects = ActiveManager.from_queryset(DistributionQuerySet)()
+    all_objects = DistributionQuerySet.as_manager()
+
     @property
     def access_url(self):
         """Return the access url of the file.
 
         If the file is hosted in another portal, the access_url is provided
-        in the distribution. Otherwise, the access_url is the URL to the
-        distribution.
+        in the distribution. Otherwise, the access_url is the download_url
+        of the file.
         """
         if self.external_access_url:
             return self.external_access_url
-        # TODO: Implement views in django-dcat
-        return ""
+        return self.download_url
 
     # Recomened properties
     title = models.CharField(
@@ -242,14 +301,27 @@ class Distribution(models.Model):
         null=True,
         help_text="A mechanism that can be used to verify that the contents of a distribution have not changed. The checksum is related to the download_url.",
     )
+    byte_size = models.PositiveBigIntegerField(
+        blank=True,
+        null=True,
+        help_text="The size of the file in bytes.",
+    )
+    archived_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+
+    @property
+    def iri(self):
+        return build_iri("distribution", self.uuid)
 
     @property
     def download_url(self):
         """Return the download url of the file.
 
         If the file is hosted in another portal, the download_url is provided
-        in the distribution. Otherwise, the download_url is generated from the
-        file field.
+        in the distribution. Otherwise, the download_url is the URL of the
+        download view (see dcat.views.distribution_download), or the URL of
+        the file in its storage if the view isn't mounted.
 
         This field is not mandatory so it can return an empty string (a distrubution
         can contain only an access_url.)
@@ -257,7 +329,7 @@ class Distribution(models.Model):
         if self.external_download_url:
             return self.external_download_url
         if self.file:
-            return self.file.url
+            return build_download_url(self.uuid) or self.file.url
         return ""
 
     def calculate_md5_checksum(self):
@@ -269,14 +341,7 @@ class Distribution(models.Model):
         return md5_hash.hexdigest()
 
     def to_jsonld(self):
-        result = dict()
-        result["@type"] = "dcat:Distribution"
-        result["dcat:accessURL"] = self.access_url
-        if self.title:
-            result["dct:title"] = self.title
-        if self.description:
-            result["dct:description"] = self.description
-        return result
+        return mappings.DISTRIBUTION.from_instance(self)
 
     def __str__(self):
         return self.title
@@ -320,6 +385,9 @@ class MediaType(models.Model):
     media_type = models.CharField(max_length=50, blank=True)
     description = models.TextField(blank=True)
 
+    def to_jsonld(self):
+        return mappings.MEDIA_TYPE.from_instance(self)
+
     def __str__(self):
         return self.extension
 
@@ -337,6 +405,9 @@ class LicenceDocument(models.Model):
     url_general = models.URLField(blank=True, default="")
     url_document = models.URLField(blank=True, default="")
 
+    def to_jsonld(self):
+        return mappings.LICENCE.from_instance(self)
+
     def __str__(self):
         return self.label
 
@@ -355,6 +426,9 @@ class DataTheme(models.Model):
     label = models.CharField(max_length=255)
     description = models.TextField(blank=True, default="")
 
+    def to_jsonld(self):
+        return mappings.THEME.from_instance(self)
+
     def __str__(self):
         return self.label
 
@@ -365,6 +439,9 @@ class Checksum(models.Model):
     checksum_value = models.CharField(max_length=255)
     algorithm = models.CharField(max_length=10)
 
+    def to_jsonld(self):
+        return mappings.CHECKSUM.from_instance(self)
+
     def __str__(self):
         return f"{self.checksum_value} ({self.algorithm})"
 
@@ -377,3 +454,242 @@ class Keyword(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class DatasetCard(models.Model):
+    """A denormalized, read-only summary of a Dataset for listing pages.
+
+    Cards are kept in sync by the signals in dcat.signals and can be rebuilt
+    with the rebuild_dataset_cards command. See dcat.cards.
+    """
+
+    dataset = models.OneToOneField(
+        "Dataset", on_delete=models.CASCADE, primary_key=True, related_name="card"
+    )
+    catalog = models.ForeignKey("Catalog", on_delete=models.CASCADE, related_name="+")
+    title = models.CharField(max_length=255)
+    publisher_name = models.CharField(max_length=255, blank=True)
+    theme_labels = models.JSONField(default=list)
+    keyword_names = models.JSONField(default=list)
+    distribution_count = models.PositiveIntegerField(default=0)
+    formats = models.JSONField(default=list)
+    modified = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["catalog", "title"])]
+
+    def __str__(self):
+        return self.title
+
+
+class CatalogStatistics(models.Model):
+    """Precomputed figures of a Catalog for dashboards.
+
+    Kept up to date by the signals in dcat.signals, and rebuilt with the
+    rebuild_catalog_statistics command. See dcat.stats.
+    """
+
+    catalog = models.OneToOneField(
+        "Catalog", on_delete=models.CASCADE, primary_key=True, related_name="statistics"
+    )
+    dataset_count = models.BigIntegerField(default=0)
+    distribution_count = models.BigIntegerField(default=0)
+    byte_size = models.BigIntegerField(
+        default=0, help_text="The total size of the files of the distributions."
+    )
+    formats = models.JSONField(
+        default=dict, help_text="The number of distributions by format extension."
+    )
+    last_modified = models.DateField(
+        blank=True, null=True, help_text="The latest modification date of a dataset."
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "catalog statistics"
+
+    def __str__(self):
+        return f"Statistics of catalog {self.catalog_id}"
+
+
+class ChangeLogEntry(models.Model):
+    """An append-only record of a change to a Dataset or Distribution.
+
+    The id is the sequence number harvesters use to ask for the changes since
+    their last visit. See dcat.changes.
+    """
+
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    ACTION_CHOICES = [(CREATED, "Created"), (UPDATED, "Updated"), (DELETED, "Deleted")]
+
+    kind = models.CharField(max_length=20)
+    object_uuid = models.UUIDField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Plain references: the log must outlive the objects it talks about.
+    dataset = models.ForeignKey(
+        "Dataset",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    catalog = models.ForeignKey(
+        "Catalog",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="+",
+    )
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["catalog", "id"]),
+            models.Index(fields=["kind", "object_uuid"]),
+        ]
+
+    def __str__(self):
+        return f"{self.pk}: {self.kind} {self.object_uuid} {self.action}"
+
+
+class LinkCheck(models.Model):
+    """The last result of checking an external URL. See dcat.linkcheck."""
+
+    url = models.URLField(max_length=2000, unique=True)
+    status = models.PositiveSmallIntegerField(blank=True, null=True)
+    latency_ms = models.PositiveIntegerField(blank=True, null=True)
+    content_length = models.PositiveBigIntegerField(blank=True, null=True)
+    content_type = models.CharField(max_length=255, blank=True)
+    error = models.CharField(max_length=255, blank=True)
+    checked_at = models.DateTimeField(db_index=True)
+
+    @property
+    def is_broken(self):
+        return self.status is None or self.status >= 400
+
+    def __str__(self):
+        return f"{self.url} ({self.status or self.error})"
+
+
+class Task(models.Model):
+    """A unit of background work run by the run_tasks command. See dcat.tasks.
+
+    A task with children only tracks them: it is done when all of them are
+    done, and failed when any of them fails.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=100)
+    arguments = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name="children",
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    @property
+    def percent(self):
+        if not self.total:
+            return None
+        return min(100, self.progress * 100 // self.total)
+
+    def set_progress(self, progress, total=None):
+        """Store the progress of a running task, and its total if given."""
+        self.progress = progress
+        fields = {"progress": progress}
+        if total is not None:
+            self.total = fields["total"] = total
+        Task.objects.filter(pk=self.pk).update(**fields)
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class UploadSession(models.Model):
+    """A resumable upload of the file of a distribution. See dcat.uploads.
+
+    ``offset`` is the number of bytes received so far, already appended to
+    the file stored at ``name``.
+    """
+
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    distribution = models.ForeignKey(
+        "Distribution", on_delete=models.CASCADE, related_name="uploads"
+    )
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+    def __str__(self):
+        return f"{self.name} ({self.offset}/{self.size})"
+
+
+class HarvestSource(models.Model):
+    """A remote DCAT JSON-LD catalog copied into a local Catalog. See dcat.harvest.
+
+    The ETag and Last-Modified of the last harvest are sent back to the
+    source, so unchanged sources are skipped.
+    """
+
+    OK = "ok"
+    NOT_MODIFIED = "not-modified"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (OK, "Harvested"),
+        (NOT_MODIFIED, "Not modified"),
+        (FAILED, "Failed"),
+    ]
+
+    url = models.URLField(max_length=2000, unique=True)
+    enabled = models.BooleanField(default=True)
+    catalog = models.OneToOneField(
+        "Catalog",
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="harvest_source",
+    )
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True)
+    error = models.TextField(blank=True)
+    dataset_count = models.PositiveIntegerField(default=0)
+    harvested_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.url
@@ -0,0 +1,59 @@
+"""Paginators for very large tables."""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+    """A Paginator that doesn't run COUNT(*) over big unfiltered tables.
+
+    When the object list is an unfiltered queryset, the number of rows is read
+    from the database statistics (PostgreSQL and MySQL). If the estimate is
+    below ``threshold``, or there is no estimate available, the exact count is
+    used instead.
+    """
+
+    threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self.estimated_count()
+        if estimate is not None and estimate > self.threshold:
+            return estimate
+        return super().count
+
+    def estimated_count(self):
+        """Return the estimated number of rows of the table, or None."""
+        queryset = self.object_list
+        query = getattr(queryset, "query", None)
+        if query is None or query.distinct or query.combinator:
+            return None
+        # The filter of the default manager (archived rows) doesn't count: the
+        # estimate is close enough.
+        if query.where and query.where != self._default_where(queryset.model):
+            return None
+
+        connection = connections[queryset.db]
+        table = queryset.model._meta.db_table
+        if connection.vendor == "postgresql":
+            sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass"
+            params = [connection.ops.quote_name(table)]
+        elif connection.vendor == "mysql":
+            sql = (
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s"
+            )
+            params = [table]
+        else:
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        if row is None or row[0] is None or row[0] < 0:
+            return None
+        return int(row[0])
+
+    @staticmethod
+    def _default_where(model):
+        return model._default_manager.all().query.where
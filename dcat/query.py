@@ -0,0 +1,364 @@
+"""Structured queries over datasets and distributions.
+
+Consumers looking for "the datasets with theme TRAN and a CSV distribution
+under a CC-BY licence, modified since 2024" shouldn't have to download whole
+catalogs. A query is a JSON document:
+
+.. code:: json
+
+    {
+        "select": "dataset",
+        "where": {
+            "theme": "TRAN",
+            "modified": {"gte": "2024-01-01"},
+            "distribution": {"format": "CSV", "licence": {"code": "CC_BY_4_0"}}
+        },
+        "limit": 100
+    }
+
+``where`` maps the fields of the selected class to conditions, which must all
+hold. A condition is a value, a list of values (any of them matches), or an
+object of operators: ``eq``, ``in``, ``gt``, ``gte``, ``lt``, ``lte``,
+``contains``, ``startswith`` and ``isnull``, depending on the field. ``and``,
+``or`` and ``not`` combine nested ``where`` objects, which can't be empty.
+
+Relations take a nested ``where`` object for the related objects, or a value
+for their main field (the code of a theme, the extension of a format, the
+label of a licence...). A dataset matches ``distribution`` when one of its
+distributions matches all the nested conditions at once.
+
+``compile_query()`` turns the document into a single SELECT: relations to
+many objects (themes, keywords, distributions) become ``Exists`` subqueries
+instead of joins, so no row is duplicated and no DISTINCT is needed. Every
+comparison adds to the cost of a query, subqueries and text searches more so,
+and queries costing more than DCAT_QUERY_MAX_COST are refused, as are limits
+above DCAT_QUERY_MAX_RESULTS. Results are ordered by primary key: ``after``
+takes the ``after`` of the previous response to read the next page.
+"""
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+from django.utils.dateparse import parse_date
+
+from dcat.encoders import dumps
+from dcat.jsonld import CONTEXT
+from dcat.models import Dataset, Distribution
+from dcat.serializers import iter_datasets, iter_distributions
+
+MAX_DEPTH = 6
+MAX_VALUES = 100
+COMPARISON_COST = 1
+TEXT_SEARCH_COST = 5
+SUBQUERY_COST = 5
+
+
+class QueryError(ValueError):
+    """The query document is invalid or too expensive."""
+
+
+def _text(value):
+    if not isinstance(value, str):
+        raise ValueError("expected a string")
+    return value
+
+
+def _integer(value):
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError("expected an integer")
+    return value
+
+
+def _date(value):
+    if isinstance(value, str):
+        try:
+            date = parse_date(value[:10])
+        except ValueError:
+            date = None
+        if date is not None:
+            return date
+    raise ValueError("expected an ISO 8601 date")
+
+
+def _boolean(value):
+    if not isinstance(value, bool):
+        raise ValueError("expected true or false")
+    return value
+
+
+_ORDERED = ("eq", "in", "gt", "gte", "lt", "lte", "isnull")
+_TEXT = ("eq", "in", "contains", "startswith", "isnull")
+
+# Django lookups of the operators.
+_LOOKUPS = {
+    "eq": "exact",
+    "in": "in",
+    "gt": "gt",
+    "gte": "gte",
+    "lt": "lt",
+    "lte": "lte",
+    "contains": "icontains",
+    "startswith": "istartswith",
+    "isnull": "isnull",
+}
+
+
+class Field:
+    """A column compared with values parsed by parse."""
+
+    def __init__(self, column, parse, operators):
+        self.column = column
+        self.parse = parse
+        self.operators = operators
+
+
+class Relation:
+    """Objects related to the queried ones, described by their own fields.
+
+    ``default`` is the field compared when the condition is a value. A
+    relation through a foreign key has the column of the key. A relation to
+    many objects is a ``(model, link, prefix)`` instead: the rows of model
+    whose link column points to the queried object, with the fields of the
+    related objects under prefix.
+    """
+
+    def __init__(self, fields, default=None, column=None, many=None):
+        self.fields = fields
+        self.default = default
+        self.column = column
+        self.many = many
+
+
+TEXT = _text, _TEXT
+
+THEME = {
+    "code": Field("code", *TEXT),
+    "label": Field("label", *TEXT),
+}
+KEYWORD = {
+    "name": Field("name", *TEXT),
+    "slug": Field("slug", *TEXT),
+}
+MEDIA_TYPE = {
+    "extension": Field("extension", *TEXT),
+    "media_type": Field("media_type", *TEXT),
+    "code": Field("code", *TEXT),
+}
+LICENCE = {
+    "label": Field("label", *TEXT),
+    "code": Field("code", *TEXT),
+    "url": Field("url_general", *TEXT),
+}
+AGENT = {
+    "name": Field("name", *TEXT),
+    "type": Field("type", *TEXT),
+}
+DATASET = {
+    "catalog": Field("catalog_id", _integer, _ORDERED),
+    "title": Field("title", *TEXT),
+    "description": Field("description", *TEXT),
+    "issued": Field("issued", _date, _ORDERED),
+    "modified": Field("modified", _date, _ORDERED),
+    "landing_page": Field("landing_page", *TEXT),
+    "publisher": Relation(AGENT, default="name", column="publisher"),
+    "theme": Relation(
+        THEME, default="code", many=(Dataset.themes.through, "dataset", "datatheme")
+    ),
+    "keyword": Relation(
+        KEYWORD, default="name", many=(Dataset.keywords.through, "dataset", "keyword")
+    ),
+}
+DISTRIBUTION = {
+    "title": Field("title", *TEXT),
+    "byte_size": Field("byte_size", _integer, _ORDERED),
+    "download_url": Field("external_download_url", *TEXT),
+    "access_url": Field("external_access_url", *TEXT),
+    "format": Relation(MEDIA_TYPE, default="extension", column="format"),
+    "licence": Relation(LICENCE, default="label", column="licence"),
+    "dataset": Relation(DATASET, column="dataset"),
+}
+DATASET["distribution"] = Relation(DISTRIBUTION, many=(Distribution, "dataset", ""))
+
+# The classes that can be selected: their queryset and their fields.
+SELECTABLE = {
+    "dataset": (Dataset.objects.all, DATASET),
+    "distribution": (Distribution.objects.all, DISTRIBUTION),
+}
+
+
+class _Compiler:
+    """Compile a ``where`` object into a Q object, adding up its cost."""
+
+    def __init__(self, max_cost):
+        self.max_cost = max_cost
+        self.cost = 0
+
+    def _charge(self, cost, path):
+        self.cost += cost
+        if self.cost > self.max_cost:
+            raise QueryError(
+                f"{path}: the query is too expensive (the limit is {self.max_cost})."
+            )
+
+    def where(self, fields, where, prefix, path, depth):
+        if not isinstance(where, dict):
+            raise QueryError(f"{path}: expected an object.")
+        if depth > MAX_DEPTH:
+            raise QueryError(f"{path}: conditions are nested too deeply.")
+        q = Q()
+        for key, condition in where.items():
+            key_path = f"{path}.{key}"
+            if key in ("and", "or"):
+                if not isinstance(condition, list) or not condition:
+                    raise QueryError(f"{key_path}: expected a list of objects.")
+                combined = Q()
+                for i, item in enumerate(condition):
+                    clause = self.clause(
+                        fields, item, prefix, f"{key_path}[{i}]", depth + 1
+                    )
+                    combined = combined & clause if key == "and" else combined | clause
+                q &= combined
+            elif key == "not":
+                q &= ~self.clause(fields, condition, prefix, key_path, depth + 1)
+            elif key in fields:
+                q &= self.condition(fields[key], condition, prefix, key_path, depth)
+            else:
+                raise QueryError(f"{key_path}: unknown field.")
+        return q
+
+    def clause(self, fields, where, prefix, path, depth):
+        # An empty Q() would vanish from "or" (Q() | X is X) and match
+        # everything in "not".
+        if where == {}:
+            raise QueryError(f"{path}: expected at least one condition.")
+        return self.where(fields, where, prefix, path, depth)
+
+    def condition(self, field, condition, prefix, path, depth):
+        if isinstance(field, Relation):
+            return self.relation(field, condition, prefix, path, depth)
+        if not isinstance(condition, dict):
+            condition = {"in" if isinstance(condition, list) else "eq": condition}
+        if not condition:
+            raise QueryError(f"{path}: expected at least one operator.")
+        q = Q()
+        for operator, value in condition.items():
+            if operator not in field.operators:
+                raise QueryError(f"{path}: unknown operator {operator!r}.")
+            cost = COMPARISON_COST
+            try:
+                if operator == "isnull":
+                    value = _boolean(value)
+                elif operator == "in":
+                    if not isinstance(value, list) or not 0 < len(value) <= MAX_VALUES:
+                        raise ValueError(f"expected a list of 1 to {MAX_VALUES} values")
+                    value = [field.parse(item) for item in value]
+                else:
+                    value = field.parse(value)
+            except ValueError as e:
+                raise QueryError(f"{path}.{operator}: {e}.")
+            if operator in ("contains", "startswith"):
+                cost = TEXT_SEARCH_COST
+            self._charge(cost, path)
+            q &= Q(**{f"{prefix}{field.column}__{_LOOKUPS[operator]}": value})
+        return q
+
+    def relation(self, relation, condition, prefix, path, depth):
+        if not isinstance(condition, dict):
+            if relation.default is None:
+                raise QueryError(f"{path}: expected an object.")
+            condition = {relation.default: condition}
+        if relation.many is None:
+            # A foreign key: joining doesn't duplicate rows.
+            return self.where(
+                relation.fields,
+                condition,
+                f"{prefix}{relation.column}__",
+                path,
+                depth + 1,
+            )
+        self._charge(SUBQUERY_COST, path)
+        model, link, related = relation.many
+        q = self.where(
+            relation.fields,
+            condition,
+            f"{related}__" if related else "",
+            path,
+            depth + 1,
+        )
+        related_rows = model.objects.filter(q, **{link: OuterRef(f"{prefix}pk")})
+        return Q(Exists(related_rows))
+
+
+class CompiledQuery:
+    """A query ready to run: its queryset ordered by primary key and its limit."""
+
+    def __init__(self, select, queryset, limit, cost):
+        self.select = select
+        self.queryset = queryset
+        self.limit = limit
+        self.cost = cost
+
+
+def max_cost():
+    return getattr(settings, "DCAT_QUERY_MAX_COST", 50)
+
+
+def max_results():
+    return getattr(settings, "DCAT_QUERY_MAX_RESULTS", 1000)
+
+
+def compile_query(document):
+    """Compile a query document. Raises QueryError when it isn't valid."""
+    if not isinstance(document, dict):
+        raise QueryError("The query must be an object.")
+    unknown = set(document) - {"select", "where", "limit", "after"}
+    if unknown:
+        raise QueryError(f"Unknown keys: {', '.join(sorted(unknown))}.")
+    select = document.get("select", "dataset")
+    if select not in SELECTABLE:
+        raise QueryError(f"select must be one of: {', '.join(SELECTABLE)}.")
+    limit = document.get("limit", min(100, max_results()))
+    if (
+        not isinstance(limit, int)
+        or isinstance(limit, bool)
+        or not 0 < limit <= max_results()
+    ):
+        raise QueryError(f"limit must be an integer from 1 to {max_results()}.")
+    after = document.get("after")
+    if after is not None and (not isinstance(after, int) or isinstance(after, bool)):
+        raise QueryError("after must be an integer.")
+
+    queryset, fields = SELECTABLE[select]
+    compiler = _Compiler(max_cost())
+    q = compiler.where(fields, document.get("where", {}), "", "where", 0)
+    queryset = queryset().filter(q).order_by("pk")
+    if after is not None:
+        queryset = queryset.filter(pk__gt=after)
+    return CompiledQuery(select, queryset, limit, compiler.cost)
+
+
+def run_query(compiled):
+    """Return the primary keys of the results and whether more are left."""
+    ids = list(compiled.queryset.values_list("pk", flat=True)[: compiled.limit + 1])
+    return ids[: compiled.limit], len(ids) > compiled.limit
+
+
+def iter_results_jsonld(compiled, chunk_size=1000):
+    """Yield the JSON-LD document of the results as encoded chunks of bytes.
+
+    The results are listed in ``@graph``. When there are more, ``after`` is
+    the value to send in the query for the next page.
+    """
+    ids, has_more = run_query(compiled)
+    header = {"@context": CONTEXT, "has_more": has_more}
+    if has_more:
+        header["after"] = ids[-1]
+    serialize = iter_datasets if compiled.select == "dataset" else iter_distributions
+    model = compiled.queryset.model
+
+    yield dumps(header)[:-1] + b',"@graph":['
+    first = True
+    for start in range(0, len(ids), chunk_size):
+        chunk = model.objects.filter(pk__in=ids[start : start + chunk_size])
+        for result in serialize(chunk, chunk_size=chunk_size):
+            yield dumps(result) if first else b"," + dumps(result)
+            first = False
+    yield b"]}"
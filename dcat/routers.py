@@ -0,0 +1,99 @@
+"""Send the reads of DCAT models to a read replica.
+
+Feeds, listings and searches only read, so they can be served by a replica
+while imports write to the primary. Add the router and the middleware to
+your settings and name the replica alias:
+
+.. code:: python
+
+    DATABASE_ROUTERS = ["dcat.routers.ReplicaRouter"]
+    MIDDLEWARE = [..., "dcat.middleware.ReplicaMiddleware"]
+    DCAT_REPLICA_DATABASE = "replica"
+
+Reads only go to the replica inside ``use_replica()``, which the middleware
+enters for GET and HEAD requests; everything else (management commands,
+admin forms, tasks) reads and writes the primary. Once a write happens the
+rest of the block reads from the primary too, so code never reads data older
+than what it just wrote.
+"""
+import contextlib
+import contextvars
+
+from django.conf import settings
+
+_replica = contextvars.ContextVar("dcat_use_replica", default=False)
+_pinned = contextvars.ContextVar("dcat_pinned_to_primary", default=False)
+
+
+def primary_database():
+    return getattr(settings, "DCAT_PRIMARY_DATABASE", "default")
+
+
+def replica_database():
+    return getattr(settings, "DCAT_REPLICA_DATABASE", None)
+
+
+@contextlib.contextmanager
+def use_replica():
+    """Read DCAT models from the replica inside this block, until a write."""
+    replica = _replica.set(True)
+    pinned = _pinned.set(False)
+    try:
+        yield
+    finally:
+        _pinned.reset(pinned)
+        _replica.reset(replica)
+
+
+@contextlib.contextmanager
+def use_primary():
+    """Read DCAT models from the primary inside this block."""
+    replica = _replica.set(False)
+    pinned = _pinned.set(False)
+    try:
+        yield
+    finally:
+        _pinned.reset(pinned)
+        _replica.reset(replica)
+
+
+def pin_to_primary():
+    """Read from the primary for the rest of the current use_replica() block."""
+    _pinned.set(True)
+
+
+def is_pinned():
+    """Return True if a write happened in the current block."""
+    return _pinned.get()
+
+
+class ReplicaRouter:
+    """Route the queries of the dcat app between the primary and the replica."""
+
+    app_label = "dcat"
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label != self.app_label:
+            return None
+        replica = replica_database()
+        if replica and _replica.get() and not _pinned.get():
+            return replica
+        return primary_database()
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label != self.app_label:
+            return None
+        pin_to_primary()
+        return primary_database()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {primary_database(), replica_database()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets the schema from the primary.
+        if app_label == self.app_label and db == replica_database():
+            return False
+        return None
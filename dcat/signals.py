@@ -0,0 +1,314 @@
+"""Signal handlers keeping the denormalized tables in sync."""
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from dcat.cache import invalidate_objects, invalidate_rows
+from dcat.cards import card_updates_suspended, refresh_dataset_cards
+from dcat.changes import record_change
+from dcat.stats import (
+    apply_difference,
+    refresh_catalog_statistics,
+    statistics_updates_suspended,
+)
+from dcat.models import (
+    Agent,
+    Catalog,
+    ChangeLogEntry,
+    Dataset,
+    DataTheme,
+    Distribution,
+    Keyword,
+    LicenceDocument,
+    MediaType,
+)
+
+
+def schedule_card_refresh(dataset_ids):
+    """Refresh the cards of dataset_ids once the current transaction commits."""
+    if card_updates_suspended():
+        return
+    dataset_ids = list(dataset_ids)
+    if dataset_ids:
+        transaction.on_commit(
+            lambda: refresh_dataset_cards(Dataset.objects.filter(pk__in=dataset_ids))
+        )
+
+
+@receiver(post_save, sender=Dataset)
+def dataset_saved(sender, instance, **kwargs):
+    schedule_card_refresh([instance.pk])
+
+
+@receiver(post_save, sender=Distribution)
+@receiver(post_delete, sender=Distribution)
+def distribution_changed(sender, instance, **kwargs):
+    schedule_card_refresh([instance.dataset_id])
+
+
+@receiver(m2m_changed, sender=Dataset.themes.through)
+@receiver(m2m_changed, sender=Dataset.keywords.through)
+def dataset_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            schedule_card_refresh([instance.pk])
+    elif action in ("post_add", "post_remove"):
+        schedule_card_refresh(pk_set)
+    elif action == "pre_clear":
+        schedule_card_refresh(instance.dataset_set.values_list("pk", flat=True))
+
+
+# Vocabulary rows whose name or label is copied into the cards.
+_CARD_LOOKUPS = {
+    Agent: "publisher",
+    DataTheme: "themes",
+    Keyword: "keywords",
+    MediaType: "distribution__format",
+}
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_save, sender=DataTheme)
+@receiver(post_save, sender=Keyword)
+@receiver(post_save, sender=MediaType)
+@receiver(pre_delete, sender=Agent)
+@receiver(pre_delete, sender=DataTheme)
+@receiver(pre_delete, sender=Keyword)
+@receiver(pre_delete, sender=MediaType)
+def vocabulary_changed(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    lookup = _CARD_LOOKUPS[sender]
+    schedule_card_refresh(
+        Dataset.objects.filter(**{lookup: instance}).values_list("pk", flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_save, sender=Distribution)
+def log_saved(sender, instance, created, **kwargs):
+    action = ChangeLogEntry.CREATED if created else ChangeLogEntry.UPDATED
+    record_change(sender._meta.model_name, instance, action)
+
+
+@receiver(post_delete, sender=Dataset)
+@receiver(post_delete, sender=Distribution)
+def log_deleted(sender, instance, **kwargs):
+    record_change(sender._meta.model_name, instance, ChangeLogEntry.DELETED)
+
+
+@receiver(m2m_changed, sender=Dataset.themes.through)
+@receiver(m2m_changed, sender=Dataset.keywords.through)
+def log_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            record_change("dataset", instance, ChangeLogEntry.UPDATED)
+    elif action in ("post_add", "post_remove"):
+        for dataset in Dataset.objects.filter(pk__in=pk_set):
+            record_change("dataset", dataset, ChangeLogEntry.UPDATED)
+    elif action == "pre_clear":
+        # pk_set is None after a clear: log the datasets before.
+        for dataset in instance.dataset_set.all():
+            record_change("dataset", dataset, ChangeLogEntry.UPDATED)
+
+
+def schedule_statistics_update(catalog_id, **difference):
+    """Update the statistics of a catalog once the transaction commits."""
+    if statistics_updates_suspended() or catalog_id is None:
+        return
+    transaction.on_commit(lambda: apply_difference(catalog_id, **difference))
+
+
+def schedule_statistics_refresh(catalogs):
+    """Rebuild the statistics of a Catalog queryset once the transaction commits."""
+    if statistics_updates_suspended():
+        return
+    catalog_ids = list(catalogs.values_list("pk", flat=True))
+    if catalog_ids:
+        transaction.on_commit(
+            lambda: refresh_catalog_statistics(
+                Catalog.objects.filter(pk__in=catalog_ids)
+            )
+        )
+
+
+def _loaded_values(instance, names):
+    """Return the values of names, or None if any of them is deferred."""
+    values = instance.__dict__
+    if any(name not in values for name in names):
+        return None
+    return tuple(values[name] for name in names)
+
+
+# The stored values of an updated row are read just before it is saved, to
+# compute the difference made by the save.
+_DATASET_FIELDS = ("catalog_id", "archived_at", "modified")
+_DISTRIBUTION_FIELDS = ("dataset_id", "format_id", "byte_size", "archived_at")
+
+
+@receiver(pre_save, sender=Dataset)
+@receiver(pre_save, sender=Distribution)
+def remember_statistics_values(sender, instance, **kwargs):
+    instance._statistics_values = None
+    if statistics_updates_suspended() or instance._state.adding:
+        return
+    fields = _DATASET_FIELDS if sender is Dataset else _DISTRIBUTION_FIELDS
+    instance._statistics_values = (
+        sender.all_objects.filter(pk=instance.pk).values_list(*fields).first()
+    )
+
+
+@receiver(post_save, sender=Dataset)
+def dataset_statistics_saved(sender, instance, created, **kwargs):
+    if statistics_updates_suspended():
+        return
+    old = None if created else instance._statistics_values
+    new = _loaded_values(instance, _DATASET_FIELDS)
+    if created:
+        schedule_statistics_update(
+            instance.catalog_id, datasets=1, modified=instance.modified
+        )
+    elif old is None or new is None or old[:2] != new[:2]:
+        # Moved to another catalog or archived: rebuild both catalogs.
+        schedule_statistics_refresh(
+            Catalog.all_objects.filter(
+                pk__in={instance.catalog_id, old and old[0]} - {None}
+            )
+        )
+    elif old[2] != new[2] and instance.archived_at is None:
+        schedule_statistics_update(
+            instance.catalog_id, modified=instance.modified, removed_modified=old[2]
+        )
+
+
+@receiver(post_delete, sender=Dataset)
+def dataset_statistics_deleted(sender, instance, **kwargs):
+    if instance.archived_at is None:
+        schedule_statistics_update(
+            instance.catalog_id, datasets=-1, removed_modified=instance.modified
+        )
+
+
+def _schedule_distribution_difference(values, sign):
+    dataset_id, format_id, byte_size, archived_at = values
+    if archived_at is not None:
+        return
+    catalog_id = (
+        Dataset.all_objects.filter(pk=dataset_id)
+        .values_list("catalog_id", flat=True)
+        .first()
+    )
+    formats = {}
+    if format_id is not None:
+        extension = (
+            MediaType.objects.filter(pk=format_id)
+            .values_list("extension", flat=True)
+            .first()
+        )
+        if extension:
+            formats[extension] = sign
+    schedule_statistics_update(
+        catalog_id,
+        distributions=sign,
+        byte_size=sign * (byte_size or 0),
+        formats=formats,
+    )
+
+
+@receiver(post_save, sender=Distribution)
+def distribution_statistics_saved(sender, instance, created, **kwargs):
+    if statistics_updates_suspended():
+        return
+    old = None if created else instance._statistics_values
+    new = _loaded_values(instance, _DISTRIBUTION_FIELDS)
+    if not created and (old is None or new is None):
+        schedule_statistics_refresh(
+            Catalog.all_objects.filter(dataset__distribution=instance)
+        )
+    elif old != new:
+        if old is not None:
+            _schedule_distribution_difference(old, -1)
+        _schedule_distribution_difference(new, 1)
+
+
+@receiver(post_delete, sender=Distribution)
+def distribution_statistics_deleted(sender, instance, **kwargs):
+    if statistics_updates_suspended():
+        return
+    values = _loaded_values(instance, _DISTRIBUTION_FIELDS)
+    if values is None:
+        schedule_statistics_refresh(
+            Catalog.all_objects.filter(dataset=instance.dataset_id)
+        )
+    else:
+        _schedule_distribution_difference(values, -1)
+
+
+@receiver(post_save, sender=MediaType)
+@receiver(pre_delete, sender=MediaType)
+def media_type_statistics_changed(sender, instance, created=False, **kwargs):
+    # The extensions are copied in the statistics.
+    if not created:
+        schedule_statistics_refresh(
+            Catalog.objects.filter(dataset__distribution__format=instance).distinct()
+        )
+
+
+# Cached JSON-LD, see dcat.cache.
+
+
+@receiver(post_save, sender=Dataset)
+@receiver(post_delete, sender=Dataset)
+def dataset_cache_invalidated(sender, instance, **kwargs):
+    invalidate_objects("dataset", [instance.uuid])
+
+
+@receiver(post_save, sender=Distribution)
+@receiver(post_delete, sender=Distribution)
+def distribution_cache_invalidated(sender, instance, **kwargs):
+    invalidate_objects("distribution", [instance.uuid])
+    invalidate_objects(
+        "dataset",
+        Dataset.all_objects.filter(pk=instance.dataset_id).values_list(
+            "uuid", flat=True
+        ),
+    )
+
+
+@receiver(m2m_changed, sender=Dataset.themes.through)
+@receiver(m2m_changed, sender=Dataset.keywords.through)
+def dataset_m2m_cache_invalidated(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            invalidate_objects("dataset", [instance.uuid])
+    elif action in ("post_add", "post_remove"):
+        invalidate_objects(
+            "dataset",
+            Dataset.all_objects.filter(pk__in=pk_set).values_list("uuid", flat=True),
+        )
+    elif action == "pre_clear":
+        invalidate_objects(
+            "dataset", instance.dataset_set.values_list("uuid", flat=True)
+        )
+
+
+@receiver(post_save, sender=Agent)
+@receiver(post_save, sender=DataTheme)
+@receiver(post_save, sender=Keyword)
+@receiver(post_save, sender=MediaType)
+@receiver(post_save, sender=LicenceDocument)
+@receiver(post_delete, sender=Agent)
+@receiver(post_delete, sender=DataTheme)
+@receiver(post_delete, sender=Keyword)
+@receiver(post_delete, sender=MediaType)
+@receiver(post_delete, sender=LicenceDocument)
+def vocabulary_cache_invalidated(sender, instance, created=False, **kwargs):
+    # No cached document uses a new row yet.
+    if not created:
+        invalidate_rows(sender, [instance.pk])
@@ -0,0 +1,233 @@
+"""Per-catalog statistics maintained incrementally.
+
+Dashboards show the number of datasets and distributions of a catalog, the
+total size of its files, its formats and the last modification of its
+datasets. Aggregating Dataset and Distribution on every page view is too
+slow for big catalogs, so the figures are stored in one CatalogStatistics
+row per catalog, and reading them is a single-row lookup:
+
+.. code:: python
+
+    from dcat.stats import get_statistics
+
+    statistics = get_statistics(catalog)
+    statistics.dataset_count, statistics.formats
+
+The signals in dcat.signals add the difference made by every saved or
+deleted dataset and distribution once the transaction commits, without
+aggregating again. Bulk operations that skip the signals (format detection,
+archival) accumulate the differences of every batch with add_difference()
+and apply them with apply_differences(); imports and harvests rebuild the
+statistics of their catalog once at the end, and the
+rebuild_catalog_statistics command fixes any drift. Statistics are computed
+the first time they are read, and differences are only applied to
+statistics that already exist.
+
+When the newest dataset of a catalog is deleted, archived or dated back,
+its former date is passed as ``removed_modified`` and the last modification
+is looked up again, with one aggregate on the datasets of the catalog.
+"""
+import contextlib
+import contextvars
+
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from dcat.models import Catalog, CatalogStatistics, Dataset, Distribution
+
+_updates_suspended = contextvars.ContextVar(
+    "dcat_statistics_updates_suspended", default=False
+)
+
+
+@contextlib.contextmanager
+def suspend_statistics_updates():
+    """Don't update statistics from signals inside this block.
+
+    Useful for bulk imports, which should rebuild the statistics once at the
+    end with refresh_catalog_statistics().
+    """
+    token = _updates_suspended.set(True)
+    try:
+        yield
+    finally:
+        _updates_suspended.reset(token)
+
+
+def statistics_updates_suspended():
+    return _updates_suspended.get()
+
+
+def compute_statistics(catalog_ids):
+    """Return unsaved CatalogStatistics for catalog_ids, aggregated from scratch."""
+    statistics = {
+        pk: CatalogStatistics(catalog_id=pk, formats={}) for pk in catalog_ids
+    }
+
+    datasets = (
+        Dataset.objects.filter(catalog_id__in=catalog_ids)
+        .values("catalog_id")
+        .annotate(count=Count("pk"), last_modified=Max("modified"))
+        .order_by()
+    )
+    for row in datasets:
+        catalog_statistics = statistics[row["catalog_id"]]
+        catalog_statistics.dataset_count = row["count"]
+        catalog_statistics.last_modified = row["last_modified"]
+
+    distributions = (
+        Distribution.objects.filter(dataset__catalog_id__in=catalog_ids)
+        .values("dataset__catalog_id", "format__extension")
+        .annotate(count=Count("pk"), byte_size=Sum("byte_size"))
+        .order_by()
+    )
+    for row in distributions:
+        catalog_statistics = statistics[row["dataset__catalog_id"]]
+        catalog_statistics.distribution_count += row["count"]
+        catalog_statistics.byte_size += row["byte_size"] or 0
+        extension = row["format__extension"]
+        if extension:
+            formats = catalog_statistics.formats
+            formats[extension] = formats.get(extension, 0) + row["count"]
+    return list(statistics.values())
+
+
+def refresh_catalog_statistics(catalogs=None, batch_size=500):
+    """Rebuild the statistics of a Catalog queryset (all catalogs if None).
+
+    Returns the number of catalogs.
+    """
+    if catalogs is None:
+        catalogs = Catalog.objects.all()
+    ids = list(catalogs.values_list("pk", flat=True))
+    update_fields = [
+        field.name
+        for field in CatalogStatistics._meta.concrete_fields
+        if not field.primary_key
+    ]
+    for start in range(0, len(ids), batch_size):
+        CatalogStatistics.objects.bulk_create(
+            compute_statistics(ids[start : start + batch_size]),
+            update_conflicts=True,
+            unique_fields=["catalog"],
+            update_fields=update_fields,
+        )
+    return len(ids)
+
+
+def get_statistics(catalog):
+    """Return the CatalogStatistics of catalog, computing them the first time."""
+    statistics = CatalogStatistics.objects.filter(catalog=catalog).first()
+    if statistics is None:
+        refresh_catalog_statistics(Catalog.all_objects.filter(pk=catalog.pk))
+        statistics = CatalogStatistics.objects.get(catalog=catalog)
+    return statistics
+
+
+def add_difference(differences, catalog_id, **difference):
+    """Add a difference to ``differences``, a ``{catalog_id: difference}`` dict."""
+    total = differences.setdefault(catalog_id, {"formats": {}})
+    for name, value in difference.items():
+        if name == "formats":
+            for extension, count in value.items():
+                total["formats"][extension] = total["formats"].get(extension, 0) + count
+        elif name in ("modified", "removed_modified"):
+            if value is not None and (total.get(name) is None or value > total[name]):
+                total[name] = value
+        else:
+            total[name] = total.get(name, 0) + value
+    return differences
+
+
+def removal_differences(datasets):
+    """Return the differences made by removing a Dataset queryset, by catalog.
+
+    Archived rows are not counted. Apply them with apply_differences() once
+    the datasets are removed.
+    """
+    differences = {}
+    rows = (
+        datasets.filter(archived_at__isnull=True)
+        .values("catalog_id")
+        .annotate(count=Count("pk"), modified=Max("modified"))
+        .order_by()
+    )
+    for row in rows:
+        add_difference(
+            differences,
+            row["catalog_id"],
+            datasets=-row["count"],
+            removed_modified=row["modified"],
+        )
+    rows = (
+        Distribution.objects.filter(dataset__in=datasets.filter(archived_at=None))
+        .values("dataset__catalog_id", "format__extension")
+        .annotate(count=Count("pk"), byte_size=Sum("byte_size"))
+        .order_by()
+    )
+    for row in rows:
+        extension = row["format__extension"]
+        add_difference(
+            differences,
+            row["dataset__catalog_id"],
+            distributions=-row["count"],
+            byte_size=-(row["byte_size"] or 0),
+            formats={extension: -row["count"]} if extension else {},
+        )
+    return differences
+
+
+def apply_differences(differences):
+    """Apply the differences returned by add_difference() or removal_differences()."""
+    for catalog_id, difference in differences.items():
+        apply_difference(catalog_id, **difference)
+
+
+def apply_difference(
+    catalog_id,
+    datasets=0,
+    distributions=0,
+    byte_size=0,
+    formats=None,
+    modified=None,
+    removed_modified=None,
+):
+    """Add a difference to the statistics of a catalog, if they exist.
+
+    ``removed_modified`` is the latest modification date of the datasets
+    that left the catalog, or of a dataset whose date went back.
+    """
+    with transaction.atomic():
+        statistics = (
+            CatalogStatistics.objects.select_for_update()
+            .filter(catalog_id=catalog_id)
+            .first()
+        )
+        if statistics is None:
+            return
+        # The value saved in the model can still be a string.
+        field = Dataset._meta.get_field("modified")
+        modified = field.to_python(modified)
+        removed_modified = field.to_python(removed_modified)
+        changed = bool(datasets or distributions or byte_size or formats)
+        statistics.dataset_count += datasets
+        statistics.distribution_count += distributions
+        statistics.byte_size += byte_size
+        for extension, count in (formats or {}).items():
+            total = statistics.formats.get(extension, 0) + count
+            if total > 0:
+                statistics.formats[extension] = total
+            else:
+                statistics.formats.pop(extension, None)
+        last_modified = statistics.last_modified
+        if removed_modified and last_modified and removed_modified >= last_modified:
+            # The newest dataset is gone: the aggregate sees modified too.
+            statistics.last_modified = Dataset.objects.filter(
+                catalog_id=catalog_id
+            ).aggregate(last_modified=Max("modified"))["last_modified"]
+            changed = True
+        elif modified and (last_modified is None or modified > last_modified):
+            statistics.last_modified = modified
+            changed = True
+        if changed:
+            statistics.save()
@@ -0,0 +1,326 @@
+"""Background tasks stored in the database.
+
+Heavy operations (imports, checksums, link checks, feed exports) can take
+hours, so instead of running them in a request or a cron slot they are
+queued as Task rows and run by ``python manage.py run_tasks``. No broker is
+needed: workers claim pending tasks with a conditional UPDATE, so any number
+of them can share the same database.
+
+A task is a function registered with the ``task`` decorator. It receives the
+Task row (to report progress with ``task.set_progress()``) and the keyword
+arguments it was enqueued with, which must be JSON serializable:
+
+.. code:: python
+
+    from dcat.tasks import task
+
+    @task(max_attempts=5, retry_delay=30)
+    def reindex(task, ids):
+        for i, pk in enumerate(ids):
+            ...
+            task.set_progress(i + 1, len(ids))
+
+    reindex.enqueue(ids=[1, 2, 3])
+
+A failing task is retried with an exponential backoff until it runs out of
+attempts. ``fan_out()`` splits a list in chunks and enqueues a child task per
+chunk under a parent task that tracks how many of them finished.
+
+Workers import the ``tasks`` module of every installed app to find the
+registered tasks.
+"""
+import datetime
+import os
+import socket
+import tempfile
+import time
+import traceback
+
+from django.core.management import call_command
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from dcat import archive, formats, harvest, linkcheck, uploads
+from dcat.cards import refresh_dataset_cards
+from dcat.models import (
+    Catalog,
+    Checksum,
+    Dataset,
+    Distribution,
+    HarvestSource,
+    Task,
+)
+from dcat.serializers import iter_catalog_jsonld
+from dcat.stats import refresh_catalog_statistics
+
+REGISTRY = {}
+
+
+class TaskType:
+    """A registered task function and its retry policy."""
+
+    def __init__(self, func, name, max_attempts, retry_delay):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+
+    def __call__(self, task, **arguments):
+        return self.func(task, **arguments)
+
+    def enqueue(self, parent=None, run_after=None, **arguments):
+        """Queue a run of the task with arguments and return its Task."""
+        return Task.objects.create(
+            name=self.name,
+            arguments=arguments,
+            parent=parent,
+            max_attempts=self.max_attempts,
+            run_after=run_after or timezone.now(),
+        )
+
+    def fan_out(self, items, chunk_size, argument="ids", **arguments):
+        """Queue a child task for every chunk of items and return their parent.
+
+        Every child receives its chunk as the ``argument`` keyword argument,
+        besides ``arguments``.
+        """
+        items = list(items)
+        chunks = [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+        parent = Task.objects.create(
+            name=self.name,
+            arguments=arguments,
+            status=Task.RUNNING if chunks else Task.DONE,
+            total=len(chunks),
+            started_at=timezone.now(),
+        )
+        now = timezone.now()
+        Task.objects.bulk_create(
+            [
+                Task(
+                    name=self.name,
+                    arguments={**arguments, argument: chunk},
+                    parent=parent,
+                    max_attempts=self.max_attempts,
+                    run_after=now,
+                )
+                for chunk in chunks
+            ]
+        )
+        return parent
+
+
+def task(name=None, max_attempts=3, retry_delay=60):
+    """Register a function as a task.
+
+    ``retry_delay`` is the number of seconds before the first retry, doubled
+    on every attempt.
+    """
+
+    def decorator(func):
+        task_name = name or f"{func.__module__}.{func.__name__}"
+        task_type = TaskType(func, task_name, max_attempts, retry_delay)
+        REGISTRY[task_type.name] = task_type
+        return task_type
+
+    return decorator
+
+
+def default_worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_task(worker):
+    """Mark the next pending task as running for worker and return it, or None."""
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(status=Task.PENDING, run_after__lte=now)
+        .order_by("run_after", "pk")
+        .values_list("pk", flat=True)
+    )
+    for pk in candidates[:10]:
+        # Only one worker can switch the task from pending to running.
+        claimed = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            worker=worker,
+            started_at=now,
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def run_task(task):
+    """Run a claimed task, then record its result, retry or failure."""
+    task_type = REGISTRY.get(task.name)
+    try:
+        if task_type is None:
+            raise LookupError(f"There is no registered task named {task.name}.")
+        result = task_type(task, **task.arguments)
+    except Exception:
+        error = traceback.format_exc()
+        if task_type is not None and task.attempts < task.max_attempts:
+            delay = task_type.retry_delay * 2 ** (task.attempts - 1)
+            Task.objects.filter(pk=task.pk).update(
+                status=Task.PENDING,
+                error=error,
+                run_after=timezone.now() + datetime.timedelta(seconds=delay),
+            )
+            task.status = Task.PENDING
+        else:
+            _finish(task, Task.FAILED, error=error)
+    else:
+        _finish(task, Task.DONE, result=result)
+    return task
+
+
+def _finish(task, status, result=None, error=""):
+    now = timezone.now()
+    task.status = status
+    Task.objects.filter(pk=task.pk).update(
+        status=status, result=result, error=error, finished_at=now
+    )
+    if task.parent_id is None:
+        return
+
+    Task.objects.filter(pk=task.parent_id).update(progress=F("progress") + 1)
+    parent = Task.objects.filter(
+        pk=task.parent_id, status=Task.RUNNING, progress__gte=F("total")
+    )
+    failed_children = Task.objects.filter(parent=OuterRef("pk"), status=Task.FAILED)
+    parent.filter(Exists(failed_children)).update(status=Task.FAILED, finished_at=now)
+    parent.update(status=Task.DONE, finished_at=now)
+
+
+def requeue_stale(timeout):
+    """Queue again the tasks running for longer than timeout (a timedelta).
+
+    They belong to workers that died. Tasks that used all their attempts
+    fail instead, so a task killing its worker isn't run forever. Parents
+    are not affected: they are finished by their children. Returns the
+    number of requeued tasks.
+    """
+    children = Task.objects.filter(parent=OuterRef("pk"))
+    stale = Task.objects.filter(
+        status=Task.RUNNING, started_at__lt=timezone.now() - timeout
+    ).exclude(Exists(children))
+    for task in stale.filter(attempts__gte=F("max_attempts")):
+        _finish(task, Task.FAILED, error="The worker stopped while running the task.")
+    return stale.update(status=Task.PENDING, run_after=timezone.now())
+
+
+def work(worker=None, once=False, sleep=1.0, max_tasks=None):
+    """Run tasks until interrupted. Returns the number of tasks run.
+
+    With ``once`` it returns as soon as there are no pending tasks.
+    """
+    worker = worker or default_worker_name()
+    total = 0
+    while max_tasks is None or total < max_tasks:
+        task = claim_task(worker)
+        if task is None:
+            if once:
+                break
+            time.sleep(sleep)
+            continue
+        run_task(task)
+        total += 1
+    return total
+
+
+# Built-in tasks
+
+
+@task(name="dcat.import_datajson", max_attempts=1)
+def import_datajson(task, file, datapath=None):
+    args = [f"--file={file}"]
+    if datapath:
+        args.append(f"--datapath={datapath}")
+    call_command("import_from_datajson", *args)
+
+
+@task(name="dcat.compute_checksums")
+def compute_checksums(task, ids):
+    distributions = Distribution.objects.filter(pk__in=ids).exclude(file="")
+    total = distributions.count()
+    for i, distribution in enumerate(distributions.iterator(), start=1):
+        checksum = Checksum.objects.create(
+            algorithm="md5", checksum_value=distribution.calculate_md5_checksum()
+        )
+        if distribution.checksum_id:
+            Checksum.objects.filter(pk=distribution.checksum_id).delete()
+        distribution.checksum = checksum
+        distribution.save(update_fields=["checksum"])
+        task.set_progress(i, total)
+    return {"distributions": total}
+
+
+@task(name="dcat.check_links")
+def check_links(task, urls, **options):
+    return {"checked": linkcheck.check_links(urls, **options)}
+
+
+@task(name="dcat.detect_formats")
+def detect_formats(task, ids, overwrite=False):
+    distributions = Distribution.objects.filter(pk__in=ids)
+    return {"updated": formats.detect_formats(distributions, overwrite=overwrite)}
+
+
+@task(name="dcat.refresh_dataset_cards")
+def refresh_cards(task, ids):
+    return {"cards": refresh_dataset_cards(Dataset.objects.filter(pk__in=ids))}
+
+
+@task(name="dcat.refresh_catalog_statistics")
+def refresh_statistics(task, ids=None):
+    catalogs = Catalog.objects.filter(pk__in=ids) if ids is not None else None
+    return {"catalogs": refresh_catalog_statistics(catalogs)}
+
+
+@task(name="dcat.export_jsonld")
+def export_jsonld(task, catalog, output, expanded=False):
+    """Regenerate the JSON-LD feed of a catalog, replacing output atomically."""
+    catalog = Catalog.objects.get(pk=catalog)
+    folder = os.path.dirname(os.path.abspath(output))
+    with tempfile.NamedTemporaryFile(dir=folder, delete=False) as f:
+        try:
+            for chunk in iter_catalog_jsonld(catalog, expanded=expanded):
+                f.write(chunk)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, output)
+    return {"output": output}
+
+
+@task(name="dcat.delete_files")
+def delete_files(task, names):
+    archive.delete_files(names)
+    return {"files": len(names)}
+
+
+@task(name="dcat.purge_archived", max_attempts=1)
+def purge_archived(task, days=0, batch_size=1000):
+    """Purge what was archived more than days ago, deleting files in other tasks."""
+    before = timezone.now() - datetime.timedelta(days=days)
+    total = archive.purge_archived(
+        before,
+        batch_size=batch_size,
+        on_files=lambda names: delete_files.enqueue(names=names),
+    )
+    return {"datasets": total}
+
+
+@task(name="dcat.expire_uploads")
+def expire_uploads(task, hours=24):
+    """Abort the chunked uploads that received nothing in the last hours."""
+    before = timezone.now() - datetime.timedelta(hours=hours)
+    return {"uploads": uploads.expire_uploads(before)}
+
+
+@task(name="dcat.harvest", max_attempts=1)
+def harvest_sources(task, ids=None, force=False, **options):
+    """Harvest the sources with the given ids, or every enabled source."""
+    sources = HarvestSource.objects.filter(pk__in=ids) if ids is not None else None
+    harvested = harvest.harvest(sources, force=force, **options)
+    return {source.url: source.status for source in harvested}
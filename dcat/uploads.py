@@ -0,0 +1,196 @@
+"""Chunked, resumable uploads of the files of distributions.
+
+A multi-GB file can't go through a single request: it times out, and
+Django's upload handler copies it to a temporary file before it reaches the
+storage. Instead, ``start_upload()`` creates an UploadSession and an empty
+file in the storage of ``Distribution.file``, and the client sends the file
+in chunks with ``append_chunk()`` (or the views in dcat.views). Every chunk
+is streamed straight to the end of the stored file and added to an
+incremental MD5 hash, so when the last chunk arrives the distribution gets
+its file, size and checksum without reading the file again.
+
+Uploads are resumable: the session stores how many bytes were received, and
+a chunk is only accepted at that offset. A chunk that fails halfway is
+truncated from the file. The hash of every session is kept in memory by the
+process that received the last chunk; another process (or a restart)
+rebuilds it from the bytes already stored.
+
+Chunks are appended through ``Storage.path()``, so the storage of the file
+field must be a local or mounted filesystem.
+"""
+import collections
+import hashlib
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from dcat.archive import delete_files
+from dcat.models import Checksum, Distribution, UploadSession
+
+ALGORITHM = "md5"
+BUFFER_SIZE = 1024 * 1024
+# Number of sessions whose hash is kept in memory.
+CACHE_SIZE = 256
+
+_hashes = collections.OrderedDict()
+_hashes_lock = threading.Lock()
+
+
+class OffsetMismatch(Exception):
+    """A chunk was sent at another offset than the one expected."""
+
+    def __init__(self, offset):
+        super().__init__(f"Expected a chunk at offset {offset}.")
+        self.offset = offset
+
+
+class IncompleteChunk(Exception):
+    """The request ended before the whole chunk was received."""
+
+
+def _storage():
+    return Distribution._meta.get_field("file").storage
+
+
+def _path(name):
+    try:
+        return _storage().path(name)
+    except NotImplementedError:
+        raise ImproperlyConfigured(
+            "Chunked uploads need a storage with local paths for Distribution.file."
+        )
+
+
+def start_upload(distribution, filename, size):
+    """Start the upload of a file of size bytes for distribution."""
+    if size < 0:
+        raise ValueError("The size of the file can't be negative.")
+    field = Distribution._meta.get_field("file")
+    name = field.generate_filename(distribution, filename)
+    # Saving an empty file reserves an available name for the upload.
+    name = _storage().save(name, ContentFile(b""))
+    _path(name)
+    session = UploadSession.objects.create(
+        distribution=distribution, name=name, size=size
+    )
+    if size == 0:
+        with transaction.atomic():
+            _complete(session, hashlib.new(ALGORITHM))
+    return session
+
+
+def _pop_hash(session, path):
+    """Return the hash of the bytes received by session, removing it from cache."""
+    with _hashes_lock:
+        cached = _hashes.pop(session.pk, None)
+    if cached is not None and cached[0] == session.offset:
+        return cached[1]
+
+    digest = hashlib.new(ALGORITHM)
+    remaining = session.offset
+    with open(path, "rb") as f:
+        while remaining and (data := f.read(min(BUFFER_SIZE, remaining))):
+            digest.update(data)
+            remaining -= len(data)
+    return digest
+
+
+def _cache_hash(session, digest):
+    with _hashes_lock:
+        _hashes[session.pk] = (session.offset, digest)
+        while len(_hashes) > CACHE_SIZE:
+            _hashes.popitem(last=False)
+
+
+def _complete(session, digest):
+    distribution = session.distribution
+    old_file = distribution.file.name
+    if distribution.checksum_id:
+        Checksum.objects.filter(pk=distribution.checksum_id).delete()
+    distribution.checksum = Checksum.objects.create(
+        algorithm=ALGORITHM, checksum_value=digest.hexdigest()
+    )
+    distribution.file = session.name
+    distribution.byte_size = session.size
+    distribution.save(update_fields=["file", "byte_size", "checksum"])
+    if old_file and old_file != session.name:
+        transaction.on_commit(lambda: delete_files([old_file]))
+
+    session.completed_at = timezone.now()
+    session.save(update_fields=["offset", "completed_at", "updated_at"])
+
+
+def append_chunk(session, offset, stream, length):
+    """Append length bytes read from stream to the file of session at offset.
+
+    Raises OffsetMismatch if offset isn't the number of bytes received so far,
+    and IncompleteChunk if stream ends early. When the file is complete, it
+    is set on the distribution with its size and checksum. Returns the
+    updated session.
+    """
+    with transaction.atomic():
+        session = (
+            UploadSession.objects.select_for_update()
+            .select_related("distribution")
+            .get(pk=session.pk)
+        )
+        if session.is_complete or offset != session.offset:
+            raise OffsetMismatch(session.offset)
+        if offset + length > session.size:
+            raise ValueError("The chunk goes beyond the size of the file.")
+
+        path = _path(session.name)
+        digest = _pop_hash(session, path)
+        written = 0
+        try:
+            with open(path, "r+b") as f:
+                # Drop what a failed chunk could have left after the offset.
+                f.truncate(offset)
+                f.seek(offset)
+                while written < length:
+                    data = stream.read(min(BUFFER_SIZE, length - written))
+                    if not data:
+                        raise IncompleteChunk(f"Received {written} of {length} bytes.")
+                    f.write(data)
+                    digest.update(data)
+                    written += len(data)
+        except BaseException:
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+            raise
+
+        session.offset += length
+        if session.offset == session.size:
+            _complete(session, digest)
+        else:
+            session.save(update_fields=["offset", "updated_at"])
+            _cache_hash(session, digest)
+    return session
+
+
+def abort_upload(session):
+    """Delete an unfinished upload and its partial file."""
+    if session.is_complete:
+        raise ValueError("The upload is already complete.")
+    with _hashes_lock:
+        _hashes.pop(session.pk, None)
+    session.delete()
+    delete_files([session.name])
+
+
+def expire_uploads(before):
+    """Abort the unfinished uploads that received no chunk since before.
+
+    Returns the number of aborted uploads.
+    """
+    sessions = UploadSession.objects.filter(
+        completed_at__isnull=True, updated_at__lt=before
+    )
+    total = 0
+    for session in sessions.iterator():
+        abort_upload(session)
+        total += 1
+    return total
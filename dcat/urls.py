@@ -0,0 +1,29 @@
+from django.urls import path
+
+from dcat import views
+
+app_name = "dcat"
+
+urlpatterns = [
+    path("catalogs/<int:pk>.jsonld", views.catalog_jsonld, name="catalog-jsonld"),
+    path("catalogs/<int:pk>/data.json", views.catalog_datajson, name="catalog-datajson"),
+    path("changes.jsonld", views.changes_jsonld, name="changes-jsonld"),
+    path("query.jsonld", views.query_jsonld, name="query-jsonld"),
+    path(
+        "distributions/<uuid:uuid>/uploads",
+        views.upload_start,
+        name="upload-start",
+    ),
+    path("uploads/<uuid:uuid>", views.upload, name="upload"),
+    path(
+        "distributions/<uuid:uuid>/download",
+        views.distribution_download,
+        name="distribution-download",
+    ),
+    # The IRIs built by dcat.iris when DCAT_BASE_IRI points to this app.
+    path(
+        "<str:kind>/<uuid:uuid>",
+        views.resource_jsonld,
+        name="resource-jsonld",
+    ),
+]
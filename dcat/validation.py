@@ -0,0 +1,172 @@
+"""DCAT-AP conformance checks for a whole catalog.
+
+Every Rule describes, with a Q object, the rows that violate a mandatory or
+recommended property of a class. The rules of a class are evaluated together
+as conditional counts of a single aggregate query, so validating a catalog
+takes one query per class no matter how many datasets it has.
+
+The rules follow the DCAT-AP 3.0 specification:
+https://semiceu.github.io/DCAT-AP/releases/3.0.0/
+"""
+from django.db.models import Count, Exists, OuterRef, Q
+
+from dcat.models import Agent, Catalog, Dataset, Distribution
+
+MANDATORY = "mandatory"
+RECOMMENDED = "recommended"
+
+
+class Rule:
+    """A property that the objects of a model should have.
+
+    ``invalid`` is a Q object matching the objects that don't comply.
+    """
+
+    def __init__(self, model, property, level, invalid):
+        self.model = model
+        self.property = property
+        self.level = level
+        self.invalid = invalid
+
+    @property
+    def name(self):
+        return f"{self.model.__name__}.{self.property}"
+
+    def __str__(self):
+        return f"{self.name} ({self.level})"
+
+
+def _without(model, field):
+    """Return a Q matching the objects not referenced by any row of model."""
+    return ~Q(Exists(model.objects.filter(**{field: OuterRef("pk")})))
+
+
+RULES = [
+    # Catalogue
+    Rule(Catalog, "dct:title", MANDATORY, Q(title="")),
+    Rule(Catalog, "dct:description", MANDATORY, Q(description="")),
+    Rule(Catalog, "dcat:dataset", RECOMMENDED, _without(Dataset, "catalog_id")),
+    Rule(Catalog, "foaf:homepage", RECOMMENDED, Q(homepage="")),
+    Rule(Catalog, "dct:license", RECOMMENDED, Q(licence__isnull=True)),
+    Rule(
+        Catalog,
+        "dcat:themeTaxonomy",
+        RECOMMENDED,
+        _without(Catalog.themes.through, "catalog_id"),
+    ),
+    # Dataset
+    Rule(Dataset, "dct:title", MANDATORY, Q(title="")),
+    Rule(Dataset, "dct:description", MANDATORY, Q(description="")),
+    Rule(
+        Dataset,
+        "dcat:distribution",
+        RECOMMENDED,
+        _without(Distribution, "dataset_id"),
+    ),
+    Rule(
+        Dataset,
+        "dcat:keyword",
+        RECOMMENDED,
+        _without(Dataset.keywords.through, "dataset_id"),
+    ),
+    Rule(Dataset, "dct:publisher", RECOMMENDED, Q(publisher__isnull=True)),
+    Rule(
+        Dataset,
+        "dcat:theme",
+        RECOMMENDED,
+        _without(Dataset.themes.through, "dataset_id"),
+    ),
+    # Distribution
+    Rule(
+        Distribution,
+        "dcat:accessURL",
+        MANDATORY,
+        # Like Distribution.access_url, which falls back to download_url.
+        Q(external_access_url="", external_download_url="", file=""),
+    ),
+    Rule(Distribution, "dct:description", RECOMMENDED, Q(description="")),
+    Rule(Distribution, "dct:format", RECOMMENDED, Q(format__isnull=True)),
+    Rule(Distribution, "dct:license", RECOMMENDED, Q(licence__isnull=True)),
+    # Agent
+    Rule(Agent, "foaf:name", MANDATORY, Q(name="")),
+    Rule(Agent, "dct:type", RECOMMENDED, Q(type="")),
+]
+
+
+class RuleResult:
+    """The number of objects violating a rule, out of total."""
+
+    def __init__(self, rule, failures, total):
+        self.rule = rule
+        self.failures = failures
+        self.total = total
+
+    def to_dict(self):
+        return {
+            "rule": self.rule.name,
+            "level": self.rule.level,
+            "failures": self.failures,
+            "total": self.total,
+        }
+
+
+class ConformanceReport:
+    """The results of validating a catalog against the rules."""
+
+    def __init__(self, catalog, results):
+        self.catalog = catalog
+        self.results = results
+
+    @property
+    def errors(self):
+        return [r for r in self.results if r.failures and r.rule.level == MANDATORY]
+
+    @property
+    def warnings(self):
+        return [r for r in self.results if r.failures and r.rule.level == RECOMMENDED]
+
+    @property
+    def is_conformant(self):
+        return not self.errors
+
+    def to_dict(self):
+        return {
+            "catalog": self.catalog.pk,
+            "conformant": self.is_conformant,
+            "results": [r.to_dict() for r in self.results],
+        }
+
+
+def _scope(model, catalog):
+    """Return the objects of model that belong to catalog."""
+    if model is Catalog:
+        return Catalog.objects.filter(pk=catalog.pk)
+    if model is Dataset:
+        return Dataset.objects.filter(catalog=catalog)
+    if model is Distribution:
+        return Distribution.objects.filter(dataset__catalog=catalog)
+    if model is Agent:
+        return Agent.objects.filter(
+            Q(pk=catalog.publisher_id)
+            | Q(Exists(Dataset.objects.filter(catalog=catalog, publisher=OuterRef("pk"))))
+        )
+    raise ValueError(f"There is no scope for {model.__name__} in a catalog.")
+
+
+def validate_catalog(catalog, rules=None):
+    """Evaluate rules (RULES by default) over catalog with one query per model."""
+    rules = RULES if rules is None else rules
+    results = []
+    models = list(dict.fromkeys(rule.model for rule in rules))
+    for model in models:
+        model_rules = [rule for rule in rules if rule.model is model]
+        counts = _scope(model, catalog).aggregate(
+            total=Count("pk"),
+            **{
+                f"rule_{i}": Count("pk", filter=rule.invalid)
+                for i, rule in enumerate(model_rules)
+            },
+        )
+        for i, rule in enumerate(model_rules):
+            results.append(RuleResult(rule, counts[f"rule_{i}"], counts["total"]))
+    return ConformanceReport(catalog, results)
@@ -1,3 +1,374 @@
-from django.shortcuts import render
+import json
+import os
+import re
+from urllib.parse import quote
 
-# Create your views here.
+from django.conf import settings
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+    UnreadablePostError,
+)
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import content_disposition_header, http_date
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from dcat.cache import LOADERS, get_resource_jsonld
+from dcat.changes import changes_since
+from dcat.datajson import iter_datajson
+from dcat.encoders import dumps
+from dcat.jsonld import CONTEXT
+from dcat.models import Catalog, Distribution, UploadSession
+from dcat.query import QueryError, compile_query, iter_results_jsonld
+from dcat.serializers import iter_catalog_jsonld
+from dcat.uploads import (
+    IncompleteChunk,
+    OffsetMismatch,
+    abort_upload,
+    append_chunk,
+    start_upload,
+)
+
+JSONLD_CONTENT_TYPE = "application/ld+json"
+
+
+def _catalog_response(request, catalog):
+    expanded = request.GET.get("form") == "expanded"
+    return StreamingHttpResponse(
+        iter_catalog_jsonld(catalog, expanded=expanded),
+        content_type=JSONLD_CONTENT_TYPE,
+    )
+
+
+def catalog_jsonld(request, pk):
+    """Stream the JSON-LD feed of a catalog.
+
+    Use ``?form=expanded`` to get the expanded form, with full IRIs, instead of
+    the compact one.
+    """
+    catalog = get_object_or_404(Catalog, pk=pk)
+    return _catalog_response(request, catalog)
+
+
+def catalog_datajson(request, pk):
+    """Stream the data.json (DCAT-US) of a catalog."""
+    catalog = get_object_or_404(Catalog, pk=pk)
+    return StreamingHttpResponse(iter_datajson(catalog), content_type="application/json")
+
+
+def resource_jsonld(request, kind, uuid):
+    """Return the JSON-LD of the resource identified by its IRI.
+
+    Catalogs are streamed like catalog_jsonld(), the other resources are cached
+    (see dcat.cache).
+    """
+    if kind == "catalog":
+        catalog = get_object_or_404(Catalog, uuid=uuid)
+        return _catalog_response(request, catalog)
+    if kind not in LOADERS:
+        raise Http404
+    content = get_resource_jsonld(kind, uuid)
+    if content is None:
+        raise Http404
+    return HttpResponse(content, content_type=JSONLD_CONTENT_TYPE)
+
+
+def changes_jsonld(request):
+    """Return the changes since ``?sequence=<n>`` or ``?since=<ISO datetime>``.
+
+    ``?catalog=<id>`` limits the changes to a catalog.
+    """
+    try:
+        sequence = int(request.GET.get("sequence", 0))
+    except ValueError:
+        return HttpResponseBadRequest("sequence must be an integer.")
+    since = None
+    if "since" in request.GET:
+        since = parse_datetime(request.GET["since"])
+        if since is None:
+            return HttpResponseBadRequest("since must be an ISO 8601 datetime.")
+    catalog = None
+    if "catalog" in request.GET:
+        try:
+            catalog_id = int(request.GET["catalog"])
+        except ValueError:
+            return HttpResponseBadRequest("catalog must be an integer.")
+        catalog = get_object_or_404(Catalog, pk=catalog_id)
+
+    document = {
+        "@context": CONTEXT,
+        **changes_since(sequence=sequence, since=since, catalog=catalog),
+    }
+    return HttpResponse(dumps(document), content_type=JSONLD_CONTENT_TYPE)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def query_jsonld(request):
+    """Stream the datasets or distributions matching a structured query.
+
+    The query (see dcat.query) is the JSON body of a POST, or the ``q``
+    parameter of a GET.
+    """
+    body = request.body if request.method == "POST" else request.GET.get("q", "")
+    try:
+        document = json.loads(body)
+    except ValueError:
+        return HttpResponseBadRequest("The query must be a JSON document.")
+    try:
+        compiled = compile_query(document)
+    except QueryError as e:
+        return HttpResponseBadRequest(str(e))
+    return StreamingHttpResponse(
+        iter_results_jsonld(compiled), content_type=JSONLD_CONTENT_TYPE
+    )
+
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _parse_range(header, size):
+    """Return the ``(start, end)`` of a single byte range, end included.
+
+    Returns None when the header is missing or isn't a single valid range,
+    so the whole file is sent, and raises ValueError when the range can't be
+    satisfied.
+    """
+    match = _RANGE.match(header.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # The last bytes of the file.
+        start, end = max(0, size - int(last)), size - 1
+    if start > end:
+        raise ValueError(f"Range not satisfiable for {size} bytes.")
+    return start, end
+
+
+class _FileRange:
+    """A file object that only reads up to the end of a range.
+
+    It keeps ``fileno()`` and ``tell()``, so a WSGI server that sends files
+    with sendfile() still does it from the start of the range, for the
+    Content-Length of the response.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def _sendfile_response(name, storage):
+    backend = getattr(settings, "DCAT_SENDFILE", None)
+    response = HttpResponse()
+    if backend == "x-accel-redirect":
+        prefix = getattr(settings, "DCAT_SENDFILE_URL", "/protected/")
+        response["X-Accel-Redirect"] = prefix.rstrip("/") + "/" + quote(name)
+    elif backend == "x-sendfile":
+        try:
+            response["X-Sendfile"] = storage.path(name)
+        except NotImplementedError:
+            # Not a local file: stream it from the storage.
+            return None
+    else:
+        return None
+    # The web server sets the content type and length, and handles ranges.
+    del response["Content-Type"]
+    response["Content-Disposition"] = content_disposition_header(
+        True, os.path.basename(name)
+    )
+    return response
+
+
+def _file_response(request, distribution, etag, last_modified):
+    name = distribution.file.name
+    storage = distribution.file.storage
+    try:
+        file = storage.open(name, "rb")
+    except FileNotFoundError:
+        raise Http404
+    size = storage.size(name)
+    media_type = distribution.format.media_type if distribution.format else ""
+    options = {
+        "as_attachment": True,
+        "filename": os.path.basename(name),
+        "content_type": media_type or None,
+    }
+
+    byte_range = None
+    # A range is only sent if the file didn't change since the client got
+    # the first part.
+    if_range = request.headers.get("If-Range")
+    validators = (etag, last_modified and http_date(last_modified))
+    if if_range is None or if_range in validators:
+        try:
+            byte_range = _parse_range(request.headers.get("Range", ""), size)
+        except ValueError:
+            file.close()
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    if byte_range:
+        start, end = byte_range
+        response = FileResponse(
+            _FileRange(file, start, end - start + 1), status=206, **options
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+    else:
+        response = FileResponse(file, **options)
+    response.block_size = 64 * 1024
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+@require_http_methods(["GET", "HEAD"])
+def distribution_download(request, uuid):
+    """Download the file of a distribution.
+
+    With ``DCAT_SENDFILE = "x-accel-redirect"`` (nginx, with the files served
+    from the internal location ``DCAT_SENDFILE_URL``) or ``"x-sendfile"``
+    (Apache, lighttpd), the web server sends the file. Otherwise the file is
+    streamed with FileResponse, which WSGI servers send with sendfile(), and
+    a single byte range can be requested. The ETag is the checksum of the
+    file, so clients can revalidate and resume downloads.
+    """
+    distribution = get_object_or_404(
+        Distribution.objects.select_related("checksum", "format"),
+        uuid=uuid,
+        file__gt="",
+    )
+    storage = distribution.file.storage
+    try:
+        modified = storage.get_modified_time(distribution.file.name)
+        last_modified = int(modified.timestamp())
+    except (FileNotFoundError, NotImplementedError):
+        last_modified = None
+    etag = None
+    if distribution.checksum:
+        checksum = distribution.checksum
+        etag = f'"{checksum.algorithm}-{checksum.checksum_value}"'
+
+    response = (
+        get_conditional_response(request, etag, last_modified)
+        or _sendfile_response(distribution.file.name, storage)
+        or _file_response(request, distribution, etag, last_modified)
+    )
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def _upload_response(session, status=200):
+    response = JsonResponse(
+        {
+            "upload": str(session.uuid),
+            "url": reverse("dcat:upload", args=[session.uuid]),
+            "offset": session.offset,
+            "size": session.size,
+            "complete": session.is_complete,
+        },
+        status=status,
+    )
+    response["Upload-Offset"] = session.offset
+    return response
+
+
+def _can_upload(request):
+    return request.user.has_perm("dcat.change_distribution")
+
+
+@require_http_methods(["POST"])
+def upload_start(request, uuid):
+    """Start a chunked upload of the file of a distribution.
+
+    Takes the ``filename`` and the ``size`` in bytes of the file, and returns
+    the URL where the chunks are sent.
+    """
+    if not _can_upload(request):
+        return HttpResponseForbidden()
+    distribution = get_object_or_404(Distribution, uuid=uuid)
+    filename = request.POST.get("filename", "").strip()
+    try:
+        size = int(request.POST.get("size", ""))
+    except ValueError:
+        return HttpResponseBadRequest("size must be an integer.")
+    if not filename or size < 0:
+        return HttpResponseBadRequest("filename and a valid size are required.")
+    session = start_upload(distribution, filename, size)
+    response = _upload_response(session, status=201)
+    response["Location"] = reverse("dcat:upload", args=[session.uuid])
+    return response
+
+
+@require_http_methods(["GET", "HEAD", "PATCH", "DELETE"])
+def upload(request, uuid):
+    """Resume, send chunks to, or abort a chunked upload.
+
+    GET and HEAD return the offset where the next chunk starts. PATCH appends
+    the body of the request at the offset given in the ``Upload-Offset``
+    header, and answers 409 with the expected offset when it doesn't match.
+    DELETE aborts the upload.
+    """
+    if not _can_upload(request):
+        return HttpResponseForbidden()
+    session = get_object_or_404(UploadSession, uuid=uuid)
+    if request.method == "DELETE":
+        if session.is_complete:
+            return _upload_response(session, status=409)
+        abort_upload(session)
+        return HttpResponse(status=204)
+    if request.method != "PATCH":
+        return _upload_response(session)
+
+    try:
+        offset = int(request.headers["Upload-Offset"])
+        length = int(request.headers["Content-Length"])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest("Upload-Offset and Content-Length are required.")
+    max_size = getattr(settings, "DCAT_UPLOAD_MAX_CHUNK_SIZE", 64 * 1024 * 1024)
+    if length > max_size:
+        return HttpResponse(f"Chunks can't exceed {max_size} bytes.", status=413)
+    try:
+        session = append_chunk(session, offset, request, length)
+    except OffsetMismatch as e:
+        session.offset = e.offset
+        return _upload_response(session, status=409)
+    except (IncompleteChunk, UnreadablePostError, ValueError) as e:
+        return HttpResponseBadRequest(str(e))
+    return _upload_response(session)
@@ -0,0 +1,155 @@
+"""Import the EU controlled vocabularies into the database.
+
+The Publications Office of the EU publishes its authority tables as XML
+files with one ``<record>`` element per entry. Every vocabulary shares the
+same engine: the file is parsed as a stream (records are discarded as soon
+as they are read) and rows are upserted in batches, so memory and time per
+record stay constant no matter the size of the file.
+
+Adding a new vocabulary only requires declaring a ``Vocabulary`` subclass
+with the model and the XPath of each field inside a record.
+"""
+import xml.etree.ElementTree as ET
+
+from dcat.cache import invalidate, invalidate_rows
+from dcat.models import DataTheme, LicenceDocument, MediaType
+
+
+class Vocabulary:
+    """Describe how an authority table maps into a model.
+
+    ``fields`` maps a model field name to the XPath (as supported by
+    ElementTree) of its value, relative to a record. Records missing any of
+    the ``required`` fields are skipped. Existing rows are matched, and
+    updated, using ``unique_field``.
+    """
+
+    model = None
+    filename = ""
+    download_url = ""
+    fields = {}
+    required = ()
+    unique_field = "code"
+    skip_deprecated = True
+    record_tag = "record"
+    batch_size = 500
+
+    def parse_record(self, record):
+        """Return the field values of a record, or None if it must be skipped."""
+        values = {}
+        for field_name, xpath in self.fields.items():
+            value = record.findtext(xpath)
+            if value is not None:
+                value = value.strip()
+            if value is None and not self.model._meta.get_field(field_name).null:
+                value = ""
+            values[field_name] = value
+
+        if any(not values[field_name] for field_name in self.required):
+            return None
+        return values
+
+    def iter_records(self, source):
+        """Yield ``(code, values)`` for every record in source.
+
+        ``values`` is None when the record is skipped. Records are cleared once
+        read so the parsed tree never grows.
+        """
+        context = ET.iterparse(source, events=("start", "end"))
+        _, root = next(context)
+        for event, element in context:
+            if event != "end" or element.tag != self.record_tag:
+                continue
+            code = element.findtext("authority-code") or element.get("id", "")
+            if self.skip_deprecated and element.get("deprecated") == "true":
+                values = None
+            else:
+                values = self.parse_record(element)
+            element.clear()
+            root.clear()
+            yield code, values
+
+    def save(self, batch):
+        """Insert or update a batch of records with a single query."""
+        update_fields = [name for name in self.fields if name != self.unique_field]
+        rows = self.model.objects.bulk_create(
+            [self.model(**values) for values in batch.values()],
+            update_conflicts=True,
+            unique_fields=[self.unique_field],
+            update_fields=update_fields,
+        )
+        # bulk_create() doesn't send signals: invalidate the cached rows here,
+        # or all of them on backends that don't return the keys of the rows.
+        if all(row.pk is not None for row in rows):
+            invalidate_rows(self.model, [row.pk for row in rows])
+        else:
+            invalidate()
+
+    def import_file(self, source, on_skip=None):
+        """Import every record of source and return the number of records saved.
+
+        ``on_skip`` is called with the code of every skipped record.
+        """
+        total = 0
+        batch = {}
+        for code, values in self.iter_records(source):
+            if values is None:
+                if on_skip is not None:
+                    on_skip(code)
+                continue
+            # Keyed by the unique field so a record repeated inside a batch
+            # doesn't make the upsert touch the same row twice.
+            batch[values[self.unique_field]] = values
+            if len(batch) >= self.batch_size:
+                self.save(batch)
+                total += len(batch)
+                batch = {}
+        if batch:
+            self.save(batch)
+            total += len(batch)
+        return total
+
+
+class FileTypeVocabulary(Vocabulary):
+    """The EU's File types vocabulary, imported as MediaType."""
+
+    model = MediaType
+    filename = "filetypes.xml"
+    download_url = "https://op.europa.eu/s/y52f"
+    fields = {
+        "code": "authority-code",
+        "extension": "file-extension",
+        "media_type": "internet-media-type",
+        "description": "sources/source/description",
+    }
+    required = ("code", "extension")
+    skip_deprecated = False
+
+
+class LicenceVocabulary(Vocabulary):
+    """The EU's Licences vocabulary, imported as LicenceDocument."""
+
+    model = LicenceDocument
+    filename = "licences.xml"
+    download_url = "https://op.europa.eu/s/y52h"
+    fields = {
+        "code": "authority-code",
+        "label": "label/lg.version[@lg='eng']",
+        "url_general": "url.general",
+        "url_document": "url.document",
+    }
+    required = ("code", "label")
+
+
+class DataThemeVocabulary(Vocabulary):
+    """The EU's Data theme vocabulary, imported as DataTheme."""
+
+    model = DataTheme
+    filename = "data-theme.xml"
+    download_url = "https://op.europa.eu/s/y52L"
+    fields = {
+        "code": "authority-code",
+        "label": "label/lg.version[@lg='eng']",
+        "description": "definition/lg.version[@lg='eng']",
+    }
+    required = ("code", "label")
@@ -0,0 +1,84 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from dcat.models import Agent, Catalog, Dataset, Distribution, Keyword, MediaType
+from dcat.paginators import EstimatedCountPaginator
+
+
+class AdminPerformanceTestCase(TestCase):
+    def setUp(self):
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+        self.publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(
+            title='Catalog', description='A catalog', publisher=self.publisher
+        )
+        self.csv = MediaType.objects.create(extension='CSV')
+
+    def _create_datasets(self, count):
+        for i in range(count):
+            publisher = Agent.objects.create(name=f'Publisher {i}')
+            catalog = Catalog.objects.create(
+                title=f'Catalog {i}', description='', publisher=publisher
+            )
+            dataset = Dataset.objects.create(
+                title=f'Dataset {i}', catalog=catalog, publisher=publisher
+            )
+            Distribution.objects.create(dataset=dataset, title=f'Distribution {i}', format=self.csv)
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = [
+            reverse(f'admin:dcat_{model}_changelist')
+            for model in ('catalog', 'dataset', 'distribution', 'datasetcard')
+        ]
+        self._create_datasets(2)
+        few = [self._count_queries(url) for url in urls]
+        self._create_datasets(10)
+        many = [self._count_queries(url) for url in urls]
+        self.assertEqual(few, many)
+
+    def test_change_form_does_not_render_every_keyword(self):
+        self._create_datasets(1)
+        Keyword.objects.create(name='unused-keyword', slug='unused-keyword')
+        dataset = Dataset.objects.first()
+
+        response = self.client.get(reverse('admin:dcat_dataset_change', args=[dataset.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'unused-keyword')
+        self.assertContains(response, 'admin-autocomplete')
+
+
+class EstimatedCountPaginatorTestCase(TestCase):
+    def setUp(self):
+        publisher = Agent.objects.create(name='Publisher')
+        catalog = Catalog.objects.create(title='Catalog', description='', publisher=publisher)
+        for i in range(3):
+            Dataset.objects.create(title=f'Dataset {i}', catalog=catalog)
+
+    def test_falls_back_to_count_without_estimate(self):
+        paginator = EstimatedCountPaginator(Dataset.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.count, 3)
+
+    def test_uses_estimate_for_big_tables(self):
+        class FakeEstimatePaginator(EstimatedCountPaginator):
+            def estimated_count(self):
+                return 50000
+
+        paginator = FakeEstimatePaginator(Dataset.objects.order_by('pk'), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 50000)
+
+    def test_filtered_querysets_are_not_estimated(self):
+        paginator = EstimatedCountPaginator(
+            Dataset.objects.filter(title='Dataset 1').order_by('pk'), 2
+        )
+        self.assertIsNone(paginator.estimated_count())
@@ -0,0 +1,106 @@
+import datetime
+import io
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from dcat.archive import archive_catalog, archive_datasets, purge_archived
+from dcat.changes import changes_since
+from dcat.models import (
+    Agent,
+    Catalog,
+    ChangeLogEntry,
+    Checksum,
+    DataService,
+    Dataset,
+    DatasetCard,
+    DataTheme,
+    Distribution,
+    Keyword,
+    MediaType,
+    Task,
+)
+
+
+class ArchiveTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.media_root = os.path.join(tmp.name, 'media')
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(title='Catalog', publisher=publisher)
+        self.catalog.themes.add(DataTheme.objects.create(code='ECON', label='Economy'))
+        service = DataService.objects.create(
+            title='API', endpoint_url='https://example.com/api', catalog=self.catalog
+        )
+        service.format.add(MediaType.objects.create(extension='JSON'))
+        self.dataset = Dataset.objects.create(title='Dataset', catalog=self.catalog)
+        self.dataset.keywords.add(Keyword.objects.create(name='budget', slug='budget'))
+        self.distribution = Distribution(
+            dataset=self.dataset,
+            title='CSV',
+            checksum=Checksum.objects.create(algorithm='md5', checksum_value='abc'),
+        )
+        self.distribution.file.save('data.csv', ContentFile(b'a,b\n'))
+        self.other = Dataset.objects.create(title='Other', catalog=self.catalog)
+
+    def test_archived_rows_are_hidden(self):
+        self.assertEqual(archive_catalog(self.catalog), 2)
+
+        self.assertFalse(Catalog.objects.exists())
+        self.assertFalse(Dataset.objects.exists())
+        self.assertFalse(Distribution.objects.exists())
+        self.assertFalse(DatasetCard.objects.exists())
+        self.assertEqual(Dataset.all_objects.count(), 2)
+        self.assertEqual(Distribution.all_objects.get().dataset, self.dataset)
+
+    def test_archived_datasets_are_deleted_in_the_feed(self):
+        archive_datasets(Dataset.objects.filter(pk=self.dataset.pk))
+        changes = changes_since()
+        self.assertIn(self.dataset.iri, changes['deleted'])
+        self.assertEqual(
+            [d['@id'] for d in changes['dcat:dataset']], [self.other.iri]
+        )
+
+    def test_purge(self):
+        archive_catalog(self.catalog)
+        path = self.distribution.file.path
+        deleted_files = []
+
+        with self.captureOnCommitCallbacks(execute=True):
+            total = purge_archived(batch_size=1, on_files=deleted_files.extend)
+
+        self.assertEqual(total, 2)
+        self.assertFalse(Catalog.all_objects.exists())
+        self.assertFalse(Dataset.all_objects.exists())
+        self.assertFalse(Distribution.all_objects.exists())
+        self.assertFalse(Checksum.objects.exists())
+        self.assertFalse(DataService.objects.exists())
+        self.assertFalse(Dataset.keywords.through.objects.exists())
+        self.assertFalse(Catalog.themes.through.objects.exists())
+        # The change log outlives the purged objects.
+        self.assertTrue(ChangeLogEntry.objects.exists())
+        self.assertEqual(deleted_files, [self.distribution.file.name])
+        self.assertTrue(os.path.exists(path))
+
+    def test_purge_keeps_recent_archives(self):
+        archive_datasets(Dataset.objects.filter(pk=self.dataset.pk))
+        before = timezone.now() - datetime.timedelta(days=1)
+        self.assertEqual(purge_archived(before), 0)
+        self.assertEqual(Dataset.all_objects.count(), 2)
+
+    def test_commands_delete_files_in_background(self):
+        call_command('archive_catalog', self.catalog.pk, stdout=io.StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('purge_archived', '--days=0', stdout=io.StringIO())
+        self.assertEqual(Task.objects.get().name, 'dcat.delete_files')
+
+        call_command('run_tasks', '--once', stdout=io.StringIO())
+        self.assertFalse(os.path.exists(self.distribution.file.path))
@@ -0,0 +1,154 @@
+import json
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from dcat.archive import archive_datasets
+from dcat.cache import LRUCache, check_cache, get_resource_jsonld, reset, stats
+from dcat.jsonld import CONTEXT
+from dcat.models import (
+    Agent,
+    Catalog,
+    Dataset,
+    DataTheme,
+    Distribution,
+    Keyword,
+    LicenceDocument,
+    MediaType,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class LRUCacheTestCase(TestCase):
+    def test_size_and_time_bounds(self):
+        clock = FakeClock()
+        cache = LRUCache(maxsize=2, ttl=10, clock=clock)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        # 'b' is the least recently used.
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        clock.now = 10
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(
+            cache.stats(),
+            {'hits': 1, 'misses': 2, 'hit_ratio': 1 / 3, 'evictions': 1, 'size': 1},
+        )
+
+    def test_versions(self):
+        cache = LRUCache(maxsize=10, ttl=10)
+        cache.set('a', 1, version='v1')
+        self.assertEqual(cache.get('a', 'v2', default=0), 0)
+        # The stale entry is dropped.
+        self.assertIsNone(cache.get('a', 'v1'))
+
+
+@override_settings(DCAT_CACHE='default')
+class ResourceCacheTestCase(TestCase):
+    def setUp(self):
+        reset()
+        self.publisher = Agent.objects.create(name='Publisher')
+        catalog = Catalog.objects.create(title='Catalog', publisher=self.publisher)
+        self.dataset = Dataset.objects.create(
+            title='Roads', catalog=catalog, publisher=self.publisher
+        )
+        self.theme = DataTheme.objects.create(code='TRAN', label='Transport')
+        self.dataset.themes.add(self.theme)
+        self.dataset.keywords.add(Keyword.objects.create(name='roads', slug='roads'))
+        self.distribution = Distribution.objects.create(
+            dataset=self.dataset,
+            format=MediaType.objects.create(extension='CSV', media_type='text/csv'),
+            licence=LicenceDocument.objects.create(label='CC-BY'),
+            external_access_url='https://example.org/roads.csv',
+        )
+
+    def document(self, obj):
+        content = get_resource_jsonld(obj._meta.model_name, obj.uuid)
+        return json.loads(content) if content is not None else None
+
+    def test_documents_are_cached(self):
+        dataset = Dataset.objects.for_jsonld().get(pk=self.dataset.pk)
+        content = get_resource_jsonld('dataset', self.dataset.uuid)
+        self.assertEqual(
+            json.loads(content), {'@context': CONTEXT, **dataset.to_jsonld()}
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(get_resource_jsonld('dataset', self.dataset.uuid), content)
+        self.assertEqual(stats()['fragments']['hit_ratio'], 0.5)
+
+        url = reverse('dcat:resource-jsonld', args=['dataset', self.dataset.uuid])
+        self.assertEqual(self.client.get(url).content, content)
+
+    def test_rows_are_shared(self):
+        self.document(self.dataset)
+        self.dataset.title = 'Streets'
+        self.dataset.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.document(self.dataset)['dct:title'], 'Streets')
+        for table in ('dcat_agent', 'dcat_datatheme', 'dcat_mediatype'):
+            self.assertFalse(any(table in q['sql'] for q in queries), table)
+        self.assertEqual(stats()['rows']['hits'], 5)
+
+        self.publisher.name = 'Renamed'
+        self.publisher.save()
+        self.assertEqual(
+            self.document(self.dataset)['dct:publisher']['foaf:name'], 'Renamed'
+        )
+
+    def test_rows_are_invalidated_one_by_one(self):
+        self.document(self.dataset)
+        Agent.objects.create(name='Other')
+        with self.assertNumQueries(0):
+            self.document(self.dataset)
+
+        self.theme.label = 'Mobility'
+        self.theme.save()
+        document = self.document(self.dataset)
+        self.assertEqual(document['dcat:theme'][0]['skos:prefLabel'], 'Mobility')
+        # Only the theme was read again.
+        self.assertEqual(stats()['rows']['misses'], 5 + 1)
+
+    def test_renamed_agent(self):
+        self.assertEqual(self.document(self.publisher)['foaf:name'], 'Publisher')
+        self.publisher.name = 'Renamed'
+        self.publisher.save()
+        self.assertEqual(self.document(self.publisher)['foaf:name'], 'Renamed')
+
+    def test_related_changes_invalidate(self):
+        self.document(self.dataset)
+        self.document(self.distribution)
+        self.distribution.byte_size = 1000
+        self.distribution.save()
+        self.assertEqual(self.document(self.distribution)['dcat:byteSize'], 1000)
+        self.assertEqual(
+            self.document(self.dataset)['dcat:distribution'][0]['dcat:byteSize'], 1000
+        )
+
+        self.theme.dataset_set.remove(self.dataset)
+        self.assertNotIn('dcat:theme', self.document(self.dataset))
+
+    def test_archived_datasets_are_not_found(self):
+        self.document(self.dataset)
+        archive_datasets(Dataset.objects.filter(pk=self.dataset.pk))
+        self.assertIsNone(self.document(self.dataset))
+        self.assertIsNone(self.document(self.distribution))
+        url = reverse('dcat:resource-jsonld', args=['dataset', self.dataset.uuid])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class CacheCheckTestCase(TestCase):
+    def test_local_memory_cache(self):
+        self.assertEqual(check_cache(None), [])
+        with override_settings(DCAT_CACHE='default'):
+            self.assertEqual([m.id for m in check_cache(None)], ['dcat.W001'])
+        with override_settings(DCAT_CACHE='missing'):
+            self.assertEqual([m.id for m in check_cache(None)], ['dcat.E001'])
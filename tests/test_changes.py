@@ -0,0 +1,99 @@
+import datetime
+import io
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from dcat.changes import changes_since, compact_changelog
+from dcat.models import Agent, Catalog, ChangeLogEntry, Dataset, Distribution, Keyword
+
+
+class ChangeFeedTestCase(TestCase):
+    def setUp(self):
+        publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(
+            title='Catalog', description='A catalog', publisher=publisher
+        )
+        self.dataset = Dataset.objects.create(title='Dataset', catalog=self.catalog)
+        self.distribution = Distribution.objects.create(dataset=self.dataset, title='CSV')
+
+    def test_changes_are_logged(self):
+        self.dataset.keywords.add(Keyword.objects.create(name='kw', slug='kw'))
+        self.distribution.delete()
+
+        actions = list(ChangeLogEntry.objects.order_by('id').values_list('kind', 'action'))
+        self.assertEqual(actions, [
+            ('dataset', 'created'),
+            ('distribution', 'created'),
+            ('dataset', 'updated'),
+            ('distribution', 'deleted'),
+        ])
+
+    def test_reverse_clear_is_logged(self):
+        keyword = Keyword.objects.create(name='kw', slug='kw')
+        self.dataset.keywords.add(keyword)
+        ChangeLogEntry.objects.all().delete()
+        keyword.dataset_set.clear()
+        self.assertEqual(
+            list(ChangeLogEntry.objects.values_list('object_uuid', 'action')),
+            [(self.dataset.uuid, 'updated')],
+        )
+
+    def test_changes_since_sequence(self):
+        sequence = changes_since()['sequence']
+        other = Dataset.objects.create(title='Other', catalog=self.catalog)
+        distribution_iri = self.distribution.iri
+        self.distribution.delete()
+
+        result = changes_since(sequence)
+
+        self.assertEqual(
+            [d['@id'] for d in result['dcat:dataset']], [self.dataset.iri, other.iri]
+        )
+        self.assertEqual(result['deleted'], [distribution_iri])
+        self.assertEqual(result['sequence'], ChangeLogEntry.objects.latest('id').pk)
+        self.assertFalse(result['has_more'])
+        self.assertEqual(changes_since(result['sequence'])['dcat:dataset'], [])
+
+    def test_changes_since_datetime_and_limit(self):
+        result = changes_since(since=timezone.now() - datetime.timedelta(minutes=1), limit=1)
+        self.assertTrue(result['has_more'])
+        self.assertEqual(len(result['dcat:dataset']), 1)
+
+    def test_deleted_datasets_are_tombstones(self):
+        dataset_iri = self.dataset.iri
+        self.dataset.delete()
+        result = changes_since()
+        self.assertEqual(result['dcat:dataset'], [])
+        self.assertEqual(set(result['deleted']), {dataset_iri, self.distribution.iri})
+
+    def test_compaction_keeps_latest_entry_per_object(self):
+        for _ in range(3):
+            self.dataset.save()
+        before = ChangeLogEntry.objects.count()
+
+        deleted = compact_changelog(timezone.now() + datetime.timedelta(seconds=1))
+
+        self.assertEqual(deleted, before - 2)
+        self.assertEqual(
+            set(ChangeLogEntry.objects.values_list('kind', 'action')),
+            {('dataset', 'updated'), ('distribution', 'created')},
+        )
+        self.assertEqual(len(changes_since()['dcat:dataset']), 1)
+
+    def test_compact_changelog_command(self):
+        out = io.StringIO()
+        call_command('compact_changelog', days=0, stdout=out)
+        self.assertIn('Deleted 0 change log entries.', out.getvalue())
+
+    def test_changes_view(self):
+        response = self.client.get(reverse('dcat:changes-jsonld'), {'catalog': self.catalog.pk})
+        document = json.loads(response.content)
+        self.assertEqual(document['dcat:dataset'][0]['@id'], self.dataset.iri)
+
+        response = self.client.get(reverse('dcat:changes-jsonld'), {'sequence': 'x'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('dcat:changes-jsonld'), {'catalog': 'x'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,154 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from dcat.datajson import iter_datajson
+from dcat.models import (
+    Agent,
+    Catalog,
+    Dataset,
+    DataTheme,
+    Distribution,
+    Keyword,
+    LicenceDocument,
+    MediaType,
+)
+
+
+class DataJSONExportTestCase(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=os.path.join(self.tmp.name, 'media'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+        publisher = Agent.objects.create(name='Publisher', mbox='data@example.com')
+        licence = LicenceDocument.objects.create(label='CC-BY-4.0')
+        self.catalog = Catalog.objects.create(
+            title='Catalog', description='A catalog', publisher=publisher, licence=licence
+        )
+        self.catalog.themes.add(DataTheme.objects.create(code='ECON', label='Economy'))
+        health = DataTheme.objects.create(code='HEAL', label='Health', description='Health data')
+        csv = MediaType.objects.create(extension='CSV', media_type='text/csv')
+
+        dataset = Dataset.objects.create(
+            title='Vaccination',
+            description='Vaccination campaigns',
+            catalog=self.catalog,
+            publisher=publisher,
+            issued=datetime.date(2023, 5, 1),
+            modified=datetime.date(2024, 1, 2),
+            landing_page='https://example.com/vaccination',
+        )
+        dataset.themes.add(health)
+        dataset.keywords.add(Keyword.objects.create(name='vaccines', slug='vaccines'))
+        Distribution.objects.create(
+            dataset=dataset,
+            title='External CSV',
+            external_download_url='https://example.com/vaccination.csv',
+            external_access_url='https://example.com/vaccination',
+            format=csv,
+            licence=licence,
+        )
+        local = Distribution(dataset=dataset, title='Local CSV', format=csv)
+        local.file.save('vaccination.csv', ContentFile(b'a,b\n1,2\n'))
+        Dataset.objects.create(title='Empty', catalog=self.catalog)
+
+    def _export(self, files=True):
+        path = os.path.join(self.tmp.name, 'data.json')
+        datapath = os.path.join(self.tmp.name, 'data')
+        options = {'datapath': datapath} if files else {}
+        call_command(
+            'export_to_datajson', Catalog.objects.get().pk,
+            file=path, stdout=io.StringIO(), **options,
+        )
+        os.makedirs(datapath, exist_ok=True)
+        with open(path) as f:
+            return path, datapath, json.load(f)
+
+    def _import(self, path, datapath):
+        Catalog.objects.all().delete()
+        call_command(
+            'import_from_datajson', f'--file={path}', f'--datapath={datapath}',
+            stdout=io.StringIO(),
+        )
+
+    def test_export_document(self):
+        _, datapath, data = self._export()
+
+        self.assertEqual(data['title'], 'Catalog')
+        self.assertEqual(data['publisher']['mbox'], 'data@example.com')
+        self.assertEqual(data['license'], 'CC-BY-4.0')
+        self.assertEqual([t['id'] for t in data['themeTaxonomy']], ['ECON'])
+        dataset = data['dataset'][0]
+        self.assertEqual(dataset['theme'], ['HEAL'])
+        self.assertEqual(dataset['keyword'], ['vaccines'])
+        self.assertEqual(dataset['modified'], '2024-01-02')
+        external, local = dataset['distribution']
+        self.assertEqual(external['downloadURL'], 'https://example.com/vaccination.csv')
+        self.assertEqual(external['format'], 'CSV')
+        self.assertEqual(external['license'], 'CC-BY-4.0')
+        self.assertEqual(local['fileName'], 'vaccination.csv')
+        file_path = os.path.join(
+            datapath, dataset['identifier'], local['identifier'], 'vaccination.csv'
+        )
+        with open(file_path, 'rb') as f:
+            self.assertEqual(f.read(), b'a,b\n1,2\n')
+
+    def test_round_trip_is_lossless(self):
+        path, datapath, exported = self._export()
+        self._import(path, datapath)
+        _, _, reexported = self._export()
+
+        for data in (exported, reexported):
+            for dataset in data['dataset']:
+                for distribution in dataset['distribution']:
+                    # The URL of local files contains the new dataset pk.
+                    if 'fileName' in distribution:
+                        distribution.pop('downloadURL')
+        self.assertEqual(reexported, exported)
+
+    def test_round_trip_keeps_the_themes_apart(self):
+        path, datapath, _ = self._export(files=False)
+        DataTheme.objects.all().delete()
+        self._import(path, datapath)
+
+        catalog = Catalog.objects.get()
+        self.assertEqual([t.code for t in catalog.themes.all()], ['ECON'])
+        dataset = catalog.dataset_set.get(title='Vaccination')
+        self.assertEqual([t.code for t in dataset.themes.all()], ['HEAL'])
+
+    def test_round_trip_of_optional_values(self):
+        Catalog.objects.update(licence=None)
+        Agent.objects.update(mbox=None)
+        path, datapath, exported = self._export(files=False)
+        self.assertNotIn('license', exported)
+        self.assertNotIn('mbox', exported['publisher'])
+        self._import(path, datapath)
+        self.assertIsNone(Catalog.objects.get().licence)
+        self.assertIsNone(Agent.objects.get().mbox)
+
+        _, _, reexported = self._export(files=False)
+        local = exported['dataset'][0]['distribution'][1]
+        # The file wasn't exported: its download URL is kept instead.
+        self.assertNotIn('fileName', reexported['dataset'][0]['distribution'][1])
+        local.pop('fileName')
+        self.assertTrue(local['downloadURL'])
+        self.assertEqual(reexported, exported)
+
+    def test_datasets_are_read_in_chunks(self):
+        # Theme taxonomy, datasets and, per chunk, themes + keywords + distributions.
+        with self.assertNumQueries(2 + 2 * 3):
+            list(iter_datajson(self.catalog, chunk_size=1))
+
+    def test_datajson_view(self):
+        response = self.client.get(reverse('dcat:catalog-datajson', args=[self.catalog.pk]))
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(data['dataset']), 2)
@@ -0,0 +1,92 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+from dcat.cards import refresh_dataset_cards, suspend_card_updates
+from dcat.models import (
+    Agent,
+    Catalog,
+    Dataset,
+    DatasetCard,
+    DataTheme,
+    Distribution,
+    Keyword,
+    MediaType,
+)
+
+
+class DatasetCardTestCase(TestCase):
+    def setUp(self):
+        self.publisher = Agent.objects.create(name='Ministry of Health')
+        self.catalog = Catalog.objects.create(
+            title='Health catalog', description='A catalog', publisher=self.publisher
+        )
+        self.csv = MediaType.objects.create(extension='CSV')
+        self.theme = DataTheme.objects.create(code='HEAL', label='Health')
+        self.keyword = Keyword.objects.create(name='vaccines', slug='vaccines')
+
+    def _create_dataset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dataset = Dataset.objects.create(
+                title='Vaccination', catalog=self.catalog, publisher=self.publisher
+            )
+            dataset.themes.add(self.theme)
+            dataset.keywords.add(self.keyword)
+            Distribution.objects.create(dataset=dataset, title='data', format=self.csv)
+        return dataset
+
+    def test_card_is_built_from_signals(self):
+        dataset = self._create_dataset()
+
+        card = DatasetCard.objects.get(dataset=dataset)
+        self.assertEqual(card.catalog, self.catalog)
+        self.assertEqual(card.title, 'Vaccination')
+        self.assertEqual(card.publisher_name, 'Ministry of Health')
+        self.assertEqual(card.theme_labels, ['Health'])
+        self.assertEqual(card.keyword_names, ['vaccines'])
+        self.assertEqual(card.distribution_count, 1)
+        self.assertEqual(card.formats, ['CSV'])
+
+    def test_card_follows_vocabulary_changes(self):
+        dataset = self._create_dataset()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.publisher.name = 'Ministry of Health and Care'
+            self.publisher.save()
+            self.theme.delete()
+            dataset.distribution_set.all().delete()
+
+        card = DatasetCard.objects.get(dataset=dataset)
+        self.assertEqual(card.publisher_name, 'Ministry of Health and Care')
+        self.assertEqual(card.theme_labels, [])
+        self.assertEqual(card.distribution_count, 0)
+        self.assertEqual(card.formats, [])
+
+    def test_deleting_a_dataset_deletes_its_card(self):
+        dataset = self._create_dataset()
+        with self.captureOnCommitCallbacks(execute=True):
+            dataset.delete()
+        self.assertFalse(DatasetCard.objects.exists())
+
+    def test_suspended_updates_and_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with suspend_card_updates():
+                Dataset.objects.create(title='First', catalog=self.catalog)
+                Dataset.objects.create(title='Second', catalog=self.catalog)
+        self.assertFalse(DatasetCard.objects.exists())
+
+        call_command('rebuild_dataset_cards', missing=True, stdout=io.StringIO())
+        self.assertEqual(DatasetCard.objects.count(), 2)
+
+    def test_refresh_queries_are_constant(self):
+        for _ in range(5):
+            self._create_dataset()
+        with self.assertNumQueries(5):
+            refresh_dataset_cards()
+
+    def test_listing_is_a_single_query(self):
+        self._create_dataset()
+        self._create_dataset()
+        with self.assertNumQueries(1):
+            cards = list(DatasetCard.objects.filter(catalog=self.catalog))
+        self.assertEqual(len(cards), 2)
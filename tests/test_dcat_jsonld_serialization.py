@@ -1,5 +1,17 @@
+import datetime
+
 from django.test import TestCase
-from dcat.models import Agent, Catalog, Dataset, Distribution
+from dcat.models import (
+    Agent,
+    Catalog,
+    Checksum,
+    Dataset,
+    DataTheme,
+    Distribution,
+    Keyword,
+    LicenceDocument,
+    MediaType,
+)
 
 
 class DCATSerializationJSONLDTestCase(TestCase):
@@ -83,3 +95,105 @@ class DCATSerializationJSONLDTestCase(TestCase):
         d0, d1 = Distribution.objects.all()
         self.assertEqual(result['dcat:dataset'][0]['dcat:distribution'][0], d0.to_jsonld())
         self.assertEqual(result['dcat:dataset'][0]['dcat:distribution'][1], d1.to_jsonld())
+
+
+class DistributionJSONLDCompletenessTestCase(TestCase):
+    """Test the DCAT-AP properties of Distribution and their query cost."""
+    def setUp(self):
+        publisher = Agent.objects.create(name='Publisher')
+        catalog = Catalog.objects.create(title='Catalog', description='', publisher=publisher)
+        self.dataset = Dataset.objects.create(title='Dataset', catalog=catalog)
+        csv = MediaType.objects.create(extension='CSV', code='CSV', media_type='text/csv')
+        licence = LicenceDocument.objects.create(
+            label='MIT License', code='MIT', url_general='https://opensource.org/licenses/MIT'
+        )
+        for i in range(3):
+            checksum = Checksum.objects.create(checksum_value=f'abc{i}', algorithm='md5')
+            Distribution.objects.create(
+                dataset=self.dataset,
+                title=f'Distribution {i}',
+                external_download_url=f'https://external.com/file{i}.csv',
+                format=csv,
+                licence=licence,
+                checksum=checksum,
+            )
+
+    def test_distribution_to_jsonld_properties(self):
+        distribution = Distribution.objects.first()
+        result = distribution.to_jsonld()
+        self.assertEqual(result['dcat:downloadURL'], 'https://external.com/file0.csv')
+        self.assertEqual(result['dct:format'], {'@type': 'dct:MediaTypeOrExtent', 'rdfs:label': 'CSV'})
+        self.assertEqual(result['dcat:mediaType'], 'text/csv')
+        self.assertEqual(result['dct:license'], {
+            '@type': 'dct:LicenseDocument',
+            'rdfs:label': 'MIT License',
+            'dct:type': 'https://opensource.org/licenses/MIT',
+        })
+        self.assertEqual(result['spdx:checksum'], {
+            '@type': 'spdx:Checksum',
+            'spdx:algorithm': 'md5',
+            'spdx:checksumValue': 'abc0',
+        })
+
+    def test_optional_properties_are_omitted(self):
+        distribution = Distribution.objects.create(dataset=self.dataset, title='Empty')
+        result = distribution.to_jsonld()
+        for key in ('dcat:downloadURL', 'dct:format', 'dct:license', 'spdx:checksum'):
+            self.assertNotIn(key, result)
+
+    def test_dataset_distributions_without_extra_queries(self):
+        dataset = Dataset.objects.for_jsonld().get(pk=self.dataset.pk)
+        with self.assertNumQueries(0):
+            result = dataset.to_jsonld()
+        self.assertEqual(len(result['dcat:distribution']), 3)
+        self.assertIn('spdx:checksum', result['dcat:distribution'][2])
+
+
+class DatasetJSONLDBatchTestCase(TestCase):
+    """Test the DCAT-AP properties of Dataset and the batched serialization."""
+    def setUp(self):
+        self.publisher = Agent.objects.create(name='Publisher', type='foaf:Organization')
+        self.catalog = Catalog.objects.create(
+            title='Catalog', description='', publisher=self.publisher
+        )
+        themes = [DataTheme.objects.create(code=f'T{i}', label=f'Theme {i}') for i in range(2)]
+        keywords = [Keyword.objects.create(name=f'kw{i}', slug=f'kw{i}') for i in range(2)]
+        for i in range(4):
+            dataset = Dataset.objects.create(
+                title=f'Dataset {i}',
+                catalog=self.catalog,
+                publisher=self.publisher,
+                issued=datetime.date(2024, 1, 1),
+                modified=datetime.date(2024, 2, 1),
+                landing_page='https://example.com/dataset',
+            )
+            dataset.themes.set(themes)
+            dataset.keywords.set(keywords)
+            Distribution.objects.create(dataset=dataset, title='Distribution')
+
+    def test_dataset_to_jsonld_properties(self):
+        result = Dataset.objects.first().to_jsonld()
+        self.assertEqual(result['dct:publisher'], self.publisher.to_jsonld())
+        self.assertEqual(result['dcat:theme'], [
+            {'@type': 'skos:Concept', 'skos:notation': 'T0', 'skos:prefLabel': 'Theme 0'},
+            {'@type': 'skos:Concept', 'skos:notation': 'T1', 'skos:prefLabel': 'Theme 1'},
+        ])
+        self.assertEqual(result['dcat:keyword'], ['kw0', 'kw1'])
+        self.assertEqual(result['dct:issued'], '2024-01-01')
+        self.assertEqual(result['dct:modified'], '2024-02-01')
+        self.assertEqual(
+            result['dcat:landingPage'],
+            {'@type': 'foaf:Document', 'foaf:Document': 'https://example.com/dataset'},
+        )
+
+    def test_batched_serialization_is_constant(self):
+        with self.assertNumQueries(4):
+            results = [d.to_jsonld() for d in Dataset.objects.for_jsonld()]
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results, [d.to_jsonld() for d in Dataset.objects.all()])
+
+    def test_catalog_to_jsonld_is_constant(self):
+        catalog = Catalog.objects.get(pk=self.catalog.pk)
+        with self.assertNumQueries(5):
+            result = catalog.to_jsonld()
+        self.assertEqual(len(result['dcat:dataset']), 4)
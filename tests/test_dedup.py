@@ -0,0 +1,101 @@
+import io
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+from dcat.dedup import SPECS, find_duplicates, merge, normalize
+from dcat.models import (
+    Agent,
+    Catalog,
+    ChangeLogEntry,
+    Dataset,
+    DatasetCard,
+    Distribution,
+    Keyword,
+    LicenceDocument,
+)
+
+
+class NormalizeTestCase(TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize('  Ministério  de la SALUD. '), 'ministerio de la salud')
+        self.assertEqual(normalize('open_data'), 'open data')
+
+
+class DeduplicationTestCase(TestCase):
+    def setUp(self):
+        self.health = Agent.objects.create(name='Ministry of Health', mbox='health@example.com')
+        self.health_lower = Agent.objects.create(name='ministry of health ')
+        self.health_typo = Agent.objects.create(name='Ministry of Heath')
+        self.other_health = Agent.objects.create(
+            name='Ministry of Health', mbox='other@example.com'
+        )
+        self.catalog = Catalog.objects.create(title='Catalog', publisher=self.health_lower)
+        self.dataset = Dataset.objects.create(
+            title='Dataset', catalog=self.catalog, publisher=self.health_typo
+        )
+
+    def test_exact_duplicates(self):
+        [cluster] = find_duplicates(SPECS['agent'])
+        self.assertEqual(cluster.survivor.pk, self.health.pk)
+        self.assertEqual([d.pk for d in cluster.duplicates], [self.health_lower.pk])
+
+    def test_similar_duplicates(self):
+        [cluster] = find_duplicates(SPECS['agent'], threshold=0.9)
+        self.assertEqual(
+            [d.pk for d in cluster.duplicates], [self.health_lower.pk, self.health_typo.pk]
+        )
+
+    def test_merge_repoints_foreign_keys(self):
+        clusters = find_duplicates(SPECS['agent'], threshold=0.9)
+        self.assertEqual(merge(SPECS['agent'], clusters), 2)
+
+        self.assertEqual(
+            set(Agent.objects.values_list('pk', flat=True)),
+            {self.health.pk, self.other_health.pk},
+        )
+        self.catalog.refresh_from_db()
+        self.dataset.refresh_from_db()
+        self.assertEqual(self.catalog.publisher, self.health)
+        self.assertEqual(self.dataset.publisher, self.health)
+        self.assertEqual(DatasetCard.objects.get().publisher_name, 'Ministry of Health')
+        self.assertTrue(
+            ChangeLogEntry.objects.filter(
+                object_uuid=self.dataset.uuid, action=ChangeLogEntry.UPDATED
+            ).exists()
+        )
+
+    def test_merge_many_to_many(self):
+        health = Keyword.objects.create(name='Health', slug='health')
+        health_lower = Keyword.objects.create(name='health', slug='health')
+        other = Dataset.objects.create(title='Other', catalog=self.catalog)
+        self.dataset.keywords.add(health, health_lower)
+        other.keywords.add(health_lower)
+
+        merge(SPECS['keyword'], find_duplicates(SPECS['keyword']))
+
+        self.assertEqual(list(Keyword.objects.all()), [health])
+        self.assertEqual(list(self.dataset.keywords.all()), [health])
+        self.assertEqual(list(other.keywords.all()), [health])
+
+    def test_vocabulary_licence_survives(self):
+        imported = LicenceDocument.objects.create(label='cc-by 4.0')
+        vocabulary = LicenceDocument.objects.create(label='CC BY 4.0', code='CC_BY_4_0')
+        distribution = Distribution.objects.create(dataset=self.dataset, licence=imported)
+
+        merge(SPECS['licence'], find_duplicates(SPECS['licence']))
+
+        distribution.refresh_from_db()
+        self.assertEqual(distribution.licence, vocabulary)
+
+    def test_dry_run_report(self):
+        out = io.StringIO()
+        call_command('deduplicate', '--model=agent', '--dry-run', '--json', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['agent'][0]['duplicates'][0]['value'], 'ministry of health ')
+        self.assertEqual(Agent.objects.count(), 4)
+
+        out = io.StringIO()
+        call_command('deduplicate', '--threshold=0.9', stdout=out)
+        self.assertIn('Merged 2 duplicates.', out.getvalue())
+        self.assertEqual(Agent.objects.count(), 2)
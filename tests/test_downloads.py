@@ -0,0 +1,135 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from dcat.models import Agent, Catalog, Checksum, Dataset, Distribution, MediaType
+
+
+class RemoteStorage(FileSystemStorage):
+    """A storage without local paths, like the cloud ones."""
+
+    def path(self, name):
+        raise NotImplementedError
+
+    def _open(self, name, mode='rb'):
+        return File(open(super().path(name), mode))
+
+    def size(self, name):
+        return os.path.getsize(super().path(name))
+
+
+class DownloadTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        publisher = Agent.objects.create(name='Publisher')
+        catalog = Catalog.objects.create(title='Catalog', publisher=publisher)
+        dataset = Dataset.objects.create(title='Dataset', catalog=catalog)
+        self.content = bytes(range(256)) * 40
+        self.distribution = Distribution(
+            dataset=dataset,
+            title='CSV',
+            format=MediaType.objects.create(extension='CSV', media_type='text/csv'),
+            checksum=Checksum.objects.create(algorithm='md5', checksum_value='abc'),
+        )
+        self.distribution.file.save('data.csv', ContentFile(self.content))
+        self.url = reverse('dcat:distribution-download', args=[self.distribution.uuid])
+
+    def get(self, **headers):
+        return self.client.get(self.url, headers=headers)
+
+    def test_download(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['ETag'], '"md5-abc"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(
+            response['Content-Disposition'], 'attachment; filename="data.csv"'
+        )
+
+    def test_urls_point_to_the_view(self):
+        self.assertEqual(self.distribution.download_url, self.url)
+        self.assertEqual(self.distribution.access_url, self.url)
+        with override_settings(DCAT_BASE_IRI='https://data.example.org/dcat/'):
+            self.assertEqual(
+                self.distribution.to_jsonld()['dcat:downloadURL'],
+                f'https://data.example.org/dcat/distributions/'
+                f'{self.distribution.uuid}/download',
+            )
+
+    def test_conditional_get(self):
+        response = self.get(If_None_Match='"md5-abc"')
+        self.assertEqual(response.status_code, 304)
+        response = self.get(If_Modified_Since=self.get()['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_ranges(self):
+        for header, start, end in (
+            ('bytes=100-199', 100, 199),
+            ('bytes=10000-', 10000, len(self.content) - 1),
+            ('bytes=-50', len(self.content) - 50, len(self.content) - 1),
+            ('bytes=10000-99999', 10000, len(self.content) - 1),
+        ):
+            with self.subTest(header):
+                response = self.get(Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    b''.join(response.streaming_content), self.content[start : end + 1]
+                )
+                self.assertEqual(
+                    response['Content-Range'],
+                    f'bytes {start}-{end}/{len(self.content)}',
+                )
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+
+    def test_unsatisfiable_and_invalid_ranges(self):
+        response = self.get(Range=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+        for header in ('bytes=20-10', 'bytes=0-1,5-6', 'items=1-2'):
+            with self.subTest(header):
+                self.assertEqual(self.get(Range=header).status_code, 200)
+
+    def test_if_range(self):
+        response = self.get(Range='bytes=0-9', If_Range='"md5-abc"')
+        self.assertEqual(response.status_code, 206)
+        response = self.get(Range='bytes=0-9', If_Range='"md5-old"')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(DCAT_SENDFILE='x-accel-redirect', DCAT_SENDFILE_URL='/internal/')
+    def test_x_accel_redirect(self):
+        response = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'],
+            f'/internal/{self.distribution.file.name}',
+        )
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], '"md5-abc"')
+
+    @override_settings(DCAT_SENDFILE='x-sendfile')
+    def test_x_sendfile(self):
+        response = self.get()
+        self.assertEqual(response['X-Sendfile'], self.distribution.file.path)
+
+    @override_settings(DCAT_SENDFILE='x-sendfile')
+    def test_x_sendfile_without_local_path(self):
+        field = Distribution._meta.get_field('file')
+        with mock.patch.object(field, 'storage', RemoteStorage()):
+            response = self.get()
+        self.assertNotIn('X-Sendfile', response)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_missing_file(self):
+        Distribution.objects.filter(pk=self.distribution.pk).update(file='')
+        self.assertEqual(self.get().status_code, 404)
@@ -0,0 +1,77 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from dcat import encoders
+from dcat.jsonld import CONTEXT
+from dcat.models import Agent, Catalog, Dataset
+from dcat.serializers import serialize_catalog
+
+
+DATA = {'dct:title': 'Catálogo', 'dcat:dataset': [{'dct:title': 'Dataset', 'n': 1}]}
+
+
+class EncodersTestCase(TestCase):
+    @override_settings(DCAT_JSON_BACKEND='json')
+    def test_stdlib_backend(self):
+        result = encoders.dumps(DATA)
+        self.assertIsInstance(result, bytes)
+        self.assertEqual(json.loads(result), DATA)
+
+    @override_settings(DCAT_JSON_BACKEND='orjson')
+    def test_orjson_backend(self):
+        if encoders.orjson is None:
+            self.skipTest('orjson is not installed')
+        self.assertEqual(encoders.dumps(DATA), encoders.JSONBackend().dumps(DATA))
+
+    def test_auto_falls_back_to_stdlib(self):
+        with mock.patch.object(encoders, 'orjson', None):
+            self.assertEqual(encoders.get_backend().name, 'json')
+
+    @override_settings(DCAT_JSON_BACKEND='orjson')
+    def test_missing_orjson_is_improperly_configured(self):
+        with mock.patch.object(encoders, 'orjson', None):
+            with self.assertRaises(ImproperlyConfigured):
+                encoders.dumps(DATA)
+
+    def test_dump_writes_bytes(self):
+        fp = io.BytesIO()
+        encoders.dump(DATA, fp)
+        self.assertEqual(json.loads(fp.getvalue()), DATA)
+
+
+class CatalogFeedTestCase(TestCase):
+    def setUp(self):
+        publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(
+            title='Catalog', description='A catalog', publisher=publisher
+        )
+        Dataset.objects.create(title='Dataset', catalog=self.catalog)
+
+    def test_catalog_jsonld_view(self):
+        response = self.client.get(reverse('dcat:catalog-jsonld', args=[self.catalog.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/ld+json')
+        self.assertEqual(
+            json.loads(b''.join(response.streaming_content)),
+            {'@context': CONTEXT, **serialize_catalog(self.catalog)},
+        )
+
+    def test_catalog_jsonld_view_not_found(self):
+        response = self.client.get(reverse('dcat:catalog-jsonld', args=[self.catalog.pk + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_jsonld_command(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'catalog.jsonld')
+            call_command('export_jsonld', self.catalog.pk, output=output, stdout=io.StringIO())
+            with open(output, 'rb') as f:
+                self.assertEqual(
+                    json.load(f), {'@context': CONTEXT, **serialize_catalog(self.catalog)}
+                )
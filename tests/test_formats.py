@@ -0,0 +1,101 @@
+import io
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from dcat.formats import MediaTypeIndex, sniff
+from dcat.stats import get_statistics
+from dcat.models import (
+    Agent,
+    Catalog,
+    ChangeLogEntry,
+    Dataset,
+    DatasetCard,
+    Distribution,
+    MediaType,
+)
+
+
+class SniffTestCase(TestCase):
+    def test_magic_bytes_win_over_extension(self):
+        self.assertEqual(sniff(b'%PDF-1.7\n', 'report.csv'), ('pdf', 'application/pdf'))
+
+    def test_extension_of_containers(self):
+        self.assertEqual(sniff(b'PK\x03\x04rest', 'budget.XLSX'), ('xlsx', ''))
+        self.assertEqual(sniff(b'PK\x03\x04rest', 'archive.bin'), ('zip', 'application/zip'))
+
+    def test_text_formats_use_extension(self):
+        self.assertEqual(sniff(b'a,b\n1,2\n', 'data.csv'), ('csv', ''))
+
+    def test_index_prefers_vocabulary_entries(self):
+        imported = MediaType.objects.create(extension='CSV')
+        vocabulary = MediaType.objects.create(extension='.csv', code='CSV', media_type='text/csv')
+        pdf = MediaType.objects.create(extension='.pdf', code='PDF', media_type='application/pdf')
+        index = MediaTypeIndex()
+        self.assertEqual(index.get('csv'), vocabulary)
+        self.assertEqual(index.get('unknown', 'application/pdf'), pdf)
+        self.assertIsNone(index.get('unknown'))
+        self.assertNotEqual(index.get('csv'), imported)
+
+
+class DetectFormatsTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=os.path.join(tmp.name, 'media'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.csv = MediaType.objects.create(extension='.csv', code='CSV', media_type='text/csv')
+        self.pdf = MediaType.objects.create(
+            extension='.pdf', code='PDF', media_type='application/pdf'
+        )
+        publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(title='Catalog', publisher=publisher)
+        dataset = Dataset.objects.create(title='Dataset', catalog=self.catalog)
+
+        self.table = Distribution(dataset=dataset, title='Table')
+        self.table.file.save('table.csv', ContentFile(b'a,b\n1,2\n'))
+        self.report = Distribution(dataset=dataset, title='Report', format=self.csv)
+        self.report.file.save('report.csv', ContentFile(b'%PDF-1.7\n' + b'x' * 1000))
+        Distribution.objects.create(
+            dataset=dataset, title='External', external_download_url='https://example.com/a.csv'
+        )
+
+    def test_detect_formats(self):
+        call_command('detect_formats', '--batch-size=1', stdout=io.StringIO())
+
+        self.table.refresh_from_db()
+        self.assertEqual(self.table.format, self.csv)
+        self.assertEqual(self.table.byte_size, 8)
+        self.assertEqual(self.table.to_jsonld()['dcat:byteSize'], 8)
+        # Formats already set are kept, but the size is recorded.
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.format, self.csv)
+        self.assertEqual(self.report.byte_size, 1009)
+        self.assertEqual(
+            ChangeLogEntry.objects.filter(
+                kind='distribution', action=ChangeLogEntry.UPDATED
+            ).count(),
+            2,
+        )
+        self.assertEqual(DatasetCard.objects.get().formats, ['.csv'])
+
+    def test_overwrite(self):
+        get_statistics(self.catalog)
+        call_command('detect_formats', '--overwrite', stdout=io.StringIO())
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.format, self.pdf)
+
+        # The differences are applied without aggregating the catalog again.
+        statistics = get_statistics(self.catalog)
+        self.assertEqual(statistics.formats, {'.csv': 1, '.pdf': 1})
+        self.assertEqual(statistics.byte_size, 1017)
+
+    def test_only_missing_values_are_detected(self):
+        call_command('detect_formats', stdout=io.StringIO())
+        out = io.StringIO()
+        call_command('detect_formats', stdout=out)
+        self.assertIn('Updated 0 distributions.', out.getvalue())
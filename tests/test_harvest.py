@@ -0,0 +1,280 @@
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management import call_command
+from django.test import TestCase
+from dcat.harvest import JSONObjectStream, harvest, harvested_uuid
+from dcat.models import ChangeLogEntry, Dataset, HarvestSource
+from dcat.stats import get_statistics
+
+
+class CatalogHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # path: (status, headers, body)
+    pages = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        status, headers, body = self.pages.get(self.path, (404, {}, b''))
+        etag = headers.get('ETag')
+        if etag and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        # Pages are sent in small chunks to test the incremental parser.
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for start in range(0, len(body), 100):
+            chunk = body[start : start + 100]
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+        self.wfile.write(b'0\r\n\r\n')
+
+
+def dataset(n, **extra):
+    return {
+        '@id': f'https://remote.example.org/datasets/{n}',
+        '@type': 'dcat:Dataset',
+        'dct:title': f'Dataset {n}',
+        'dct:publisher': {
+            '@id': 'https://remote.example.org/agents/1',
+            'foaf:name': 'Remote publisher',
+        },
+        'dcat:keyword': ['transport', 'roads'],
+        'dcat:theme': [{'skos:notation': 'TRAN', 'skos:prefLabel': 'Transport'}],
+        'dct:modified': '2024-03-01',
+        'dcat:distribution': [
+            {
+                '@id': f'https://remote.example.org/distributions/{n}',
+                'dcat:accessURL': f'https://remote.example.org/files/{n}.csv',
+                'dcat:downloadURL': f'https://remote.example.org/files/{n}.csv',
+                'dct:format': {'rdfs:label': 'CSV'},
+                'dcat:byteSize': 1000 + n,
+                'spdx:checksum': {
+                    'spdx:algorithm': 'md5',
+                    'spdx:checksumValue': f'{n:032x}',
+                },
+            }
+        ],
+        **extra,
+    }
+
+
+def page(datasets, next_page=None):
+    result = {
+        '@id': 'https://remote.example.org/catalog',
+        '@type': 'dcat:Catalog',
+        'dct:title': 'Remote catalog',
+        'dct:description': 'A catalog harvested in tests.',
+        'dct:publisher': {
+            '@id': 'https://remote.example.org/agents/1',
+            'foaf:name': 'Remote publisher',
+        },
+        'dcat:dataset': datasets,
+    }
+    if next_page:
+        result['hydra:view'] = {'hydra:next': next_page}
+    return json.dumps(result).encode()
+
+
+class JSONObjectStreamTestCase(TestCase):
+    def test_items_split_across_pieces(self):
+        document = {
+            'dct:title': 'Catalog',
+            'dcat:dataset': [dataset(1), {'n': 12345}, dataset(2)],
+            'count': 3,
+        }
+        text = json.dumps(document, indent=1)
+        for size in (1, 7, len(text)):
+            with self.subTest(size=size):
+                parser = JSONObjectStream(streamed=['dcat:dataset'])
+                events = []
+                for start in range(0, len(text), size):
+                    events += parser.feed(text[start : start + size])
+                events += parser.feed('', final=True)
+                self.assertEqual(
+                    events,
+                    [
+                        ('member', 'dct:title', 'Catalog'),
+                        ('item', 'dcat:dataset', dataset(1)),
+                        ('item', 'dcat:dataset', {'n': 12345}),
+                        ('item', 'dcat:dataset', dataset(2)),
+                        ('member', 'count', 3),
+                    ],
+                )
+
+    def test_single_streamed_value(self):
+        parser = JSONObjectStream(streamed=['dcat:dataset'])
+        text = json.dumps({'dcat:dataset': dataset(1), 'count': 1})
+        self.assertEqual(
+            parser.feed(text, final=True),
+            [('item', 'dcat:dataset', dataset(1)), ('member', 'count', 1)],
+        )
+        parser = JSONObjectStream(streamed=['dcat:dataset'])
+        self.assertEqual(parser.feed('{"dcat:dataset": null}', final=True), [])
+
+    def test_number_at_the_end_of_a_piece(self):
+        parser = JSONObjectStream()
+        self.assertEqual(parser.feed('{"a": 12'), [])
+        self.assertEqual(parser.feed('34}', final=True), [('member', 'a', 1234)])
+
+    def test_invalid_documents(self):
+        for text in ('[]', '{"a": 1', '{"a" 1}'):
+            with self.subTest(text), self.assertRaises(ValueError):
+                JSONObjectStream().feed(text, final=True)
+
+
+class HarvestTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), CatalogHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        CatalogHandler.pages = {
+            '/catalog': (
+                200,
+                {'ETag': '"v1"'},
+                page([dataset(1), dataset(2)], next_page='/catalog?page=2'),
+            ),
+            '/catalog?page=2': (200, {}, page([dataset(3)])),
+            '/broken': (500, {}, b''),
+        }
+        self.source = HarvestSource.objects.create(url=f'{self.base_url}/catalog')
+
+    def test_harvest_paged_catalog(self):
+        (source,) = harvest(batch_size=2)
+        self.assertEqual(source.status, HarvestSource.OK, source.error)
+        self.assertEqual(source.dataset_count, 3)
+        self.assertEqual(source.etag, '"v1"')
+
+        catalog = source.catalog
+        self.assertEqual(catalog.title, 'Remote catalog')
+        self.assertEqual(catalog.publisher.name, 'Remote publisher')
+        self.assertEqual(catalog.dataset_set.count(), 3)
+
+        harvested = Dataset.objects.get(
+            uuid=harvested_uuid('https://remote.example.org/datasets/1', source.url)
+        )
+        self.assertEqual(harvested.title, 'Dataset 1')
+        self.assertEqual(str(harvested.modified), '2024-03-01')
+        self.assertEqual(
+            sorted(harvested.keywords.values_list('name', flat=True)),
+            ['roads', 'transport'],
+        )
+        self.assertEqual(harvested.themes.get().code, 'TRAN')
+        distribution = harvested.distribution_set.get()
+        self.assertEqual(distribution.format.extension, 'CSV')
+        self.assertEqual(distribution.byte_size, 1001)
+        self.assertEqual(distribution.checksum.checksum_value, f'{1:032x}')
+        self.assertEqual(
+            distribution.download_url, 'https://remote.example.org/files/1.csv'
+        )
+
+        self.assertEqual(harvested.card.distribution_count, 1)
+        self.assertEqual(get_statistics(catalog).distribution_count, 3)
+        for kind in ('dataset', 'distribution'):
+            self.assertEqual(
+                ChangeLogEntry.objects.filter(
+                    kind=kind, action=ChangeLogEntry.CREATED
+                ).count(),
+                3,
+            )
+
+    def test_single_dataset(self):
+        CatalogHandler.pages['/catalog'] = (200, {}, page(dataset(1)))
+        (source,) = harvest()
+        self.assertEqual(source.status, HarvestSource.OK, source.error)
+        self.assertEqual(source.catalog.dataset_set.get().title, 'Dataset 1')
+
+    def test_only_changes_are_logged(self):
+        harvest()
+        sequence = ChangeLogEntry.objects.latest('id').id
+        harvest(force=True)
+        self.assertFalse(ChangeLogEntry.objects.filter(id__gt=sequence).exists())
+
+        renamed = dataset(2, **{'dct:title': 'Renamed'})
+        renamed['dcat:distribution'][0]['dcat:byteSize'] = 5
+        CatalogHandler.pages['/catalog'] = (
+            200,
+            {'ETag': '"v2"'},
+            page([dataset(1), renamed], next_page='/catalog?page=2'),
+        )
+        harvest()
+        self.assertEqual(
+            list(
+                ChangeLogEntry.objects.filter(id__gt=sequence).values_list(
+                    'kind', 'action'
+                )
+            ),
+            [
+                ('dataset', ChangeLogEntry.UPDATED),
+                ('distribution', ChangeLogEntry.UPDATED),
+            ],
+        )
+
+    def test_sources_sharing_datasets(self):
+        # An aggregator listing the same datasets as the source.
+        CatalogHandler.pages['/aggregator'] = CatalogHandler.pages['/catalog?page=2']
+        HarvestSource.objects.create(url=f'{self.base_url}/aggregator')
+        for _ in range(2):
+            sources = harvest()
+        self.assertEqual(
+            sorted(source.catalog.dataset_set.count() for source in sources), [1, 3]
+        )
+
+    def test_unmodified_source_is_skipped(self):
+        harvest()
+        with self.assertNumQueries(2):
+            (source,) = harvest()
+        self.assertEqual(source.status, HarvestSource.NOT_MODIFIED)
+        self.assertEqual(source.dataset_count, 3)
+
+    def test_removed_datasets_are_archived(self):
+        harvest()
+        CatalogHandler.pages['/catalog'] = (
+            200,
+            {'ETag': '"v2"'},
+            page([dataset(1, **{'dct:title': 'Renamed'})]),
+        )
+        (source,) = harvest()
+        self.assertEqual(source.status, HarvestSource.OK, source.error)
+        self.assertEqual(source.dataset_count, 1)
+        self.assertEqual(
+            list(source.catalog.dataset_set.values_list('title', flat=True)),
+            ['Renamed'],
+        )
+        self.assertEqual(Dataset.all_objects.filter(catalog=source.catalog).count(), 3)
+        self.assertEqual(get_statistics(source.catalog).dataset_count, 1)
+
+    def test_failed_source(self):
+        HarvestSource.objects.create(url=f'{self.base_url}/broken')
+        HarvestSource.objects.create(url='http://127.0.0.1:1/closed')
+        statuses = {source.url: source for source in harvest()}
+        self.assertEqual(statuses[self.source.url].status, HarvestSource.OK)
+        broken = statuses[f'{self.base_url}/broken']
+        self.assertEqual(broken.status, HarvestSource.FAILED)
+        self.assertIn('500', broken.error)
+        self.assertIsNone(broken.catalog)
+        self.assertEqual(
+            statuses['http://127.0.0.1:1/closed'].status, HarvestSource.FAILED
+        )
+
+    def test_command(self):
+        stdout = io.StringIO()
+        call_command('harvest', source=[f'{self.base_url}/catalog'], stdout=stdout)
+        self.assertIn('3 datasets', stdout.getvalue())
+        self.assertEqual(HarvestSource.objects.count(), 1)
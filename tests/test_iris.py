@@ -0,0 +1,66 @@
+import json
+import uuid
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from dcat.iris import build_iri, parse_iri, resolve_iri
+from dcat.models import Agent, Catalog, Dataset, Distribution
+from dcat.serializers import serialize_catalog
+
+
+class IRITestCase(TestCase):
+    def setUp(self):
+        self.publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(
+            title='Catalog', description='A catalog', publisher=self.publisher
+        )
+        self.dataset = Dataset.objects.create(title='Dataset', catalog=self.catalog)
+        self.distribution = Distribution.objects.create(dataset=self.dataset)
+
+    def test_default_iris_are_urns(self):
+        self.assertEqual(self.dataset.iri, f'urn:dcat:dataset:{self.dataset.uuid}')
+        self.assertEqual(self.dataset.to_jsonld()['@id'], self.dataset.iri)
+        self.assertEqual(self.distribution.to_jsonld()['@id'], self.distribution.iri)
+        self.assertEqual(self.catalog.to_jsonld()['@id'], self.catalog.iri)
+        self.assertEqual(self.publisher.to_jsonld()['@id'], self.publisher.iri)
+
+    @override_settings(DCAT_BASE_IRI='https://data.example.org/dcat/')
+    def test_iris_with_base(self):
+        self.assertEqual(
+            self.distribution.iri,
+            f'https://data.example.org/dcat/distribution/{self.distribution.uuid}',
+        )
+
+    def test_iris_are_stable(self):
+        dataset = Dataset.objects.get(pk=self.dataset.pk)
+        self.assertEqual(dataset.iri, self.dataset.iri)
+
+    def test_parse_iri(self):
+        value = uuid.uuid4()
+        self.assertEqual(parse_iri(build_iri('agent', value)), ('agent', value))
+        self.assertIsNone(parse_iri(f'urn:dcat:user:{value}'))
+        self.assertIsNone(parse_iri('urn:dcat:dataset:not-a-uuid'))
+        self.assertIsNone(parse_iri('https://example.com/dataset/1'))
+
+    @override_settings(DCAT_BASE_IRI='https://data.example.org/dcat')
+    def test_resolve_iri_in_one_query(self):
+        for obj in (self.publisher, self.catalog, self.dataset, self.distribution):
+            with self.assertNumQueries(1):
+                self.assertEqual(resolve_iri(obj.iri), obj)
+        self.assertIsNone(resolve_iri(build_iri('dataset', uuid.uuid4())))
+
+    def test_fast_serializer_emits_ids(self):
+        self.assertEqual(serialize_catalog(self.catalog), self.catalog.to_jsonld())
+
+    def test_resource_view(self):
+        url = reverse('dcat:resource-jsonld', args=['dataset', self.dataset.uuid])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['@id'], self.dataset.iri)
+
+        url = reverse('dcat:resource-jsonld', args=['catalog', self.catalog.uuid])
+        document = json.loads(b''.join(self.client.get(url).streaming_content))
+        self.assertEqual(document['@id'], self.catalog.iri)
+
+        url = reverse('dcat:resource-jsonld', args=['keyword', self.dataset.uuid])
+        self.assertEqual(self.client.get(url).status_code, 404)
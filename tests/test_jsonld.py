@@ -0,0 +1,68 @@
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+from dcat.jsonld import CONTEXT, expand, expand_iri
+from dcat.models import Agent, Catalog, Dataset, Distribution
+from dcat.serializers import iter_catalog_jsonld, serialize_catalog
+
+
+class ExpansionTestCase(TestCase):
+    def test_expand_iri(self):
+        self.assertEqual(expand_iri('dcat:Dataset'), 'http://www.w3.org/ns/dcat#Dataset')
+        self.assertEqual(expand_iri('dct:title'), 'http://purl.org/dc/terms/title')
+        self.assertEqual(expand_iri('https://example.com'), 'https://example.com')
+        self.assertEqual(expand_iri('Organization'), 'Organization')
+
+    def test_expand_node(self):
+        node = {
+            '@type': 'dcat:Dataset',
+            'dct:title': 'Dataset',
+            'dcat:keyword': ['a', 'b'],
+            'dct:publisher': {'foaf:name': 'Publisher'},
+        }
+        self.assertEqual(expand(node), {
+            '@type': ['http://www.w3.org/ns/dcat#Dataset'],
+            'http://purl.org/dc/terms/title': [{'@value': 'Dataset'}],
+            'http://www.w3.org/ns/dcat#keyword': [{'@value': 'a'}, {'@value': 'b'}],
+            'http://purl.org/dc/terms/publisher': [
+                {'http://xmlns.com/foaf/0.1/name': [{'@value': 'Publisher'}]}
+            ],
+        })
+
+
+class CatalogStreamTestCase(TestCase):
+    def setUp(self):
+        publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(
+            title='Catalog', description='A catalog', publisher=publisher
+        )
+        for i in range(3):
+            dataset = Dataset.objects.create(title=f'Dataset {i}', catalog=self.catalog)
+            Distribution.objects.create(dataset=dataset, external_access_url='https://example.com')
+
+    def test_compact_stream_has_context_once(self):
+        chunks = list(iter_catalog_jsonld(self.catalog, chunk_size=2))
+        self.assertGreater(len(chunks), 3)
+        document = b''.join(chunks)
+        self.assertEqual(document.count(b'@context'), 1)
+        self.assertEqual(
+            json.loads(document), {'@context': CONTEXT, **serialize_catalog(self.catalog)}
+        )
+
+    def test_expanded_stream(self):
+        document = json.loads(b''.join(iter_catalog_jsonld(self.catalog, expanded=True)))
+        compact = serialize_catalog(self.catalog)
+        self.assertEqual(document, [expand(compact)])
+        self.assertNotIn(b'dct:', json.dumps(document).encode())
+
+    def test_empty_catalog_stream(self):
+        Dataset.objects.all().delete()
+        document = json.loads(b''.join(iter_catalog_jsonld(self.catalog)))
+        self.assertEqual(document['dcat:dataset'], [])
+
+    def test_expanded_view(self):
+        url = reverse('dcat:catalog-jsonld', args=[self.catalog.pk])
+        response = self.client.get(url, {'form': 'expanded'})
+        document = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(document[0]['@type'], ['http://www.w3.org/ns/dcat#Catalog'])
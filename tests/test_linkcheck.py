@@ -0,0 +1,157 @@
+import asyncio
+import datetime
+import io
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from dcat.linkcheck import check_urls, urls_to_check
+from dcat.models import Agent, Catalog, Dataset, Distribution, LinkCheck
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    connections = set()
+    # (Host header, time) of every request.
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            # The checker closes the connection instead of reading a GET body.
+            pass
+
+    def _send(self, status, headers=(), body=b''):
+        self.connections.add(self.client_address)
+        self.requests.append((self.headers['Host'], time.monotonic()))
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        if self.path == '/ok.csv':
+            self._send(200, [('Content-Type', 'text/csv')])
+        elif self.path in ('/nohead.csv', '/norange.csv'):
+            self._send(405)
+        elif self.path == '/moved':
+            self._send(301, [('Location', '/ok.csv')])
+        elif self.path == '/elsewhere':
+            port = self.server.server_port
+            self._send(302, [('Location', f'http://localhost:{port}/ok.csv')])
+        else:
+            self._send(404)
+
+    def do_GET(self):
+        if self.path == '/nohead.csv' and self.headers.get('Range') == 'bytes=0-0':
+            self._send(
+                206,
+                [('Content-Type', 'text/csv'), ('Content-Range', 'bytes 0-0/1234')],
+                b'a',
+            )
+        elif self.path == '/norange.csv':
+            # Ignores Range and would send a huge file.
+            self.connections.add(self.client_address)
+            self.send_response(200)
+            self.send_header('Content-Length', str(10**12))
+            self.end_headers()
+            self.wfile.write(b'a' * 1024)
+        else:
+            self._send(404)
+
+
+class LinkCheckTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        StubHandler.connections.clear()
+        StubHandler.requests.clear()
+        publisher = Agent.objects.create(name='Publisher')
+        catalog = Catalog.objects.create(
+            title='Catalog', publisher=publisher, homepage=f'{self.base_url}/moved'
+        )
+        dataset = Dataset.objects.create(
+            title='Dataset', catalog=catalog, landing_page=f'{self.base_url}/missing'
+        )
+        Distribution.objects.create(
+            dataset=dataset,
+            title='CSV',
+            external_download_url=f'{self.base_url}/ok.csv',
+            external_access_url=f'{self.base_url}/nohead.csv',
+        )
+
+    def test_check_urls(self):
+        urls = urls_to_check(datetime.timedelta(days=1))
+        results = {r.url: r for r in asyncio.run(check_urls(urls, per_host=1))}
+
+        ok = results[f'{self.base_url}/ok.csv']
+        self.assertEqual(ok.status, 200)
+        self.assertEqual(ok.content_type, 'text/csv')
+        self.assertEqual(ok.content_length, 0)
+        nohead = results[f'{self.base_url}/nohead.csv']
+        self.assertEqual(nohead.status, 206)
+        self.assertEqual(nohead.content_length, 1234)
+        self.assertEqual(results[f'{self.base_url}/moved'].status, 200)
+        self.assertEqual(results[f'{self.base_url}/missing'].status, 404)
+        # A single worker for the host reuses the same connection, until the
+        # GET of nohead.csv closes it.
+        self.assertEqual(len(StubHandler.connections), 2)
+
+    def test_redirects_go_through_the_limits_of_their_host(self):
+        other = f'http://localhost:{self.server.server_port}'
+        urls = [f'{self.base_url}/elsewhere', f'{other}/ok.csv', f'{other}/missing']
+        results = asyncio.run(check_urls(urls, per_host=1, delay=0.3))
+        self.assertEqual([r.status for r in results], [200, 200, 404])
+
+        times = [t for host, t in StubHandler.requests if host.startswith('localhost')]
+        self.assertEqual(len(times), 3)
+        for previous, current in zip(times, times[1:]):
+            self.assertGreaterEqual(current - previous, 0.25)
+
+    def test_get_body_is_not_read(self):
+        [result] = asyncio.run(check_urls([f'{self.base_url}/norange.csv'], timeout=2))
+        self.assertEqual(result.status, 200)
+        self.assertEqual(result.content_length, 10**12)
+
+    def test_unreachable_url(self):
+        [result] = asyncio.run(check_urls(['http://127.0.0.1:1/'], timeout=1))
+        self.assertIsNone(result.status)
+        self.assertTrue(result.error)
+
+    def test_command_refreshes_by_age(self):
+        call_command('check_links', stdout=io.StringIO())
+        self.assertEqual(LinkCheck.objects.count(), 4)
+        broken = LinkCheck.objects.get(url=f'{self.base_url}/missing')
+        self.assertTrue(broken.is_broken)
+        self.assertEqual(urls_to_check(datetime.timedelta(days=1)), [])
+
+        old = timezone.now() - datetime.timedelta(days=10)
+        LinkCheck.objects.filter(pk=broken.pk).update(checked_at=old)
+        self.assertEqual(
+            urls_to_check(datetime.timedelta(days=7)), [f'{self.base_url}/missing']
+        )
+        call_command('check_links', '--max-age-days=7', stdout=io.StringIO())
+        broken.refresh_from_db()
+        self.assertGreater(broken.checked_at, old)
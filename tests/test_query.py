@@ -0,0 +1,160 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from dcat.iris import build_iri
+from dcat.models import (
+    Agent,
+    Catalog,
+    Dataset,
+    DataTheme,
+    Distribution,
+    LicenceDocument,
+    MediaType,
+)
+from dcat.query import QueryError, compile_query, run_query
+
+
+class QueryTestCase(TestCase):
+    def setUp(self):
+        publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(title='Catalog', publisher=publisher)
+        transport = DataTheme.objects.create(code='TRAN', label='Transport')
+        economy = DataTheme.objects.create(code='ECON', label='Economy')
+        csv = MediaType.objects.create(extension='CSV')
+        json_format = MediaType.objects.create(extension='JSON')
+        cc_by = LicenceDocument.objects.create(label='CC-BY', code='CC_BY_4_0')
+        odbl = LicenceDocument.objects.create(label='ODbL', code='ODBL')
+
+        self.roads = Dataset.objects.create(
+            title='Roads',
+            catalog=self.catalog,
+            publisher=publisher,
+            modified='2024-05-01',
+        )
+        self.roads.themes.add(transport, economy)
+        Distribution.objects.create(dataset=self.roads, format=csv, licence=cc_by)
+        Distribution.objects.create(dataset=self.roads, format=csv, licence=cc_by)
+
+        # A CSV and a CC-BY distribution, but not a CSV under CC-BY.
+        self.rails = Dataset.objects.create(
+            title='Rails', catalog=self.catalog, modified='2024-06-01'
+        )
+        self.rails.themes.add(transport)
+        Distribution.objects.create(dataset=self.rails, format=csv, licence=odbl)
+        Distribution.objects.create(
+            dataset=self.rails, format=json_format, licence=cc_by
+        )
+
+        self.budget = Dataset.objects.create(
+            title='Budget', catalog=self.catalog, modified='2023-01-01'
+        )
+        self.budget.themes.add(economy)
+
+    def results(self, where, select='dataset'):
+        compiled = compile_query({'select': select, 'where': where})
+        ids, _ = run_query(compiled)
+        return ids
+
+    def test_exists_subqueries(self):
+        where = {
+            'theme': ['TRAN', 'ECON'],
+            'modified': {'gte': '2024-01-01'},
+            'distribution': {'format': 'CSV', 'licence': {'code': 'CC_BY_4_0'}},
+        }
+        compiled = compile_query({'where': where})
+        sql = str(compiled.queryset.query)
+        self.assertEqual(sql.count('EXISTS'), 2)
+        self.assertNotIn('DISTINCT', sql)
+        with self.assertNumQueries(1):
+            ids, has_more = run_query(compiled)
+        self.assertEqual(ids, [self.roads.pk])
+        self.assertFalse(has_more)
+
+    def test_conditions(self):
+        for where, expected in (
+            ({}, [self.roads, self.rails, self.budget]),
+            ({'theme': 'TRAN'}, [self.roads, self.rails]),
+            ({'theme': {'label': 'Economy'}}, [self.roads, self.budget]),
+            ({'title': {'startswith': 'r'}}, [self.roads, self.rails]),
+            ({'modified': {'lt': '2024-01-01'}}, [self.budget]),
+            ({'not': {'theme': 'TRAN'}}, [self.budget]),
+            (
+                {'or': [{'title': 'Budget'}, {'title': 'Rails'}]},
+                [self.rails, self.budget],
+            ),
+            ({'distribution': {'format': 'JSON'}}, [self.rails]),
+            ({'publisher': 'Publisher', 'catalog': self.catalog.pk}, [self.roads]),
+        ):
+            with self.subTest(where):
+                self.assertEqual(self.results(where), [d.pk for d in expected])
+
+    def test_select_distributions(self):
+        ids = self.results(
+            {'licence': 'ODbL', 'dataset': {'theme': 'TRAN'}}, select='distribution'
+        )
+        odbl = self.rails.distribution_set.get(licence__label='ODbL')
+        self.assertEqual(ids, [odbl.pk])
+
+    @override_settings(DCAT_QUERY_MAX_COST=10, DCAT_QUERY_MAX_RESULTS=50)
+    def test_invalid_queries(self):
+        for document, message in (
+            ({'where': {'colour': 'red'}}, 'where.colour: unknown field.'),
+            ({'where': {'modified': {'near': '2024'}}}, "unknown operator 'near'"),
+            ({'where': {'modified': 'yesterday'}}, 'expected an ISO 8601 date'),
+            ({'where': {'catalog': '1'}}, 'expected an integer'),
+            ({'where': {'title': {'in': []}}}, 'expected a list of 1 to 100 values'),
+            ({'where': {'distribution': 'CSV'}}, 'expected an object'),
+            (
+                {'where': {'or': [{}, {'theme': 'TRAN'}]}},
+                'where.or[0]: expected at least one condition.',
+            ),
+            ({'where': {'not': {}}}, 'where.not: expected at least one condition.'),
+            ({'select': 'agent'}, 'select must be one of'),
+            ({'limit': 51}, 'limit must be an integer from 1 to 50'),
+            (
+                {'where': {'theme': 'A', 'keyword': 'B', 'title': {'contains': 'C'}}},
+                'too expensive',
+            ),
+        ):
+            with self.subTest(document):
+                with self.assertRaisesMessage(QueryError, message):
+                    compile_query(document)
+
+    def test_view(self):
+        query = {'where': {'theme': 'TRAN'}, 'limit': 1}
+        response = self.client.get(
+            reverse('dcat:query-jsonld'), {'q': json.dumps(query)}
+        )
+        self.assertEqual(response['Content-Type'], 'application/ld+json')
+        document = json.loads(b''.join(response.streaming_content))
+        self.assertTrue(document['has_more'])
+        self.assertEqual(document['after'], self.roads.pk)
+        self.assertEqual(document['@graph'][0]['@id'], self.roads.iri)
+        self.assertEqual(len(document['@graph'][0]['dcat:distribution']), 2)
+
+        query['after'] = document['after']
+        response = self.client.post(
+            reverse('dcat:query-jsonld'), query, content_type='application/json'
+        )
+        document = json.loads(b''.join(response.streaming_content))
+        self.assertFalse(document['has_more'])
+        self.assertEqual([d['@id'] for d in document['@graph']], [self.rails.iri])
+
+    def test_view_distributions(self):
+        query = {'select': 'distribution', 'where': {'format': 'JSON'}}
+        response = self.client.post(
+            reverse('dcat:query-jsonld'), query, content_type='application/json'
+        )
+        (distribution,) = json.loads(b''.join(response.streaming_content))['@graph']
+        self.assertEqual(
+            distribution['@reverse'],
+            {'dcat:distribution': {'@id': build_iri('dataset', self.rails.uuid)}},
+        )
+
+    def test_view_bad_request(self):
+        url = reverse('dcat:query-jsonld')
+        self.assertEqual(self.client.get(url, {'q': '{'}).status_code, 400)
+        response = self.client.get(url, {'q': '{"where": {"colour": 1}}'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.content, b'where.colour: unknown field.')
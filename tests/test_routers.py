@@ -0,0 +1,95 @@
+import json
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from dcat.middleware import PIN_COOKIE, ReplicaMiddleware
+from dcat.models import Agent
+from dcat.routers import ReplicaRouter, use_primary, use_replica
+
+MIDDLEWARE = [
+    'dcat.middleware.ReplicaMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+
+@override_settings(
+    DATABASE_ROUTERS=['dcat.routers.ReplicaRouter'],
+    DCAT_REPLICA_DATABASE='replica',
+    MIDDLEWARE=MIDDLEWARE,
+)
+class ReplicaRouterTestCase(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        # Two SQLite databases whose rows differ, to see where a read goes.
+        self.agent = Agent.objects.create(name='Primary')
+        Agent.objects.using('replica').create(
+            pk=self.agent.pk, uuid=self.agent.uuid, name='Replica'
+        )
+
+    def _name(self):
+        return Agent.objects.get(pk=self.agent.pk).name
+
+    def test_reads_from_primary_by_default(self):
+        self.assertEqual(self._name(), 'Primary')
+
+    def test_reads_from_replica(self):
+        with use_replica():
+            self.assertEqual(self._name(), 'Replica')
+            with use_primary():
+                self.assertEqual(self._name(), 'Primary')
+            self.assertEqual(self._name(), 'Replica')
+
+    def test_sticks_to_primary_after_write(self):
+        with use_replica():
+            Agent.objects.create(name='New')
+            self.assertEqual(self._name(), 'Primary')
+        with use_replica():
+            self.assertEqual(self._name(), 'Replica')
+
+    def test_replica_is_not_migrated(self):
+        router = ReplicaRouter()
+        self.assertFalse(router.allow_migrate('replica', 'dcat'))
+        self.assertIsNone(router.allow_migrate('default', 'dcat'))
+        self.assertIsNone(router.allow_migrate('replica', 'auth'))
+
+    def test_safe_requests_read_from_replica(self):
+        url = reverse('dcat:resource-jsonld', args=['agent', self.agent.uuid])
+        response = self.client.get(url)
+        self.assertEqual(json.loads(response.content)['foaf:name'], 'Replica')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_streamed_content_is_read_from_replica(self):
+        def view(request):
+            return StreamingHttpResponse(self._name() for _ in range(1))
+
+        response = ReplicaMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(b''.join(response.streaming_content), b'Replica')
+
+    def test_client_sticks_to_primary_after_a_write(self):
+        def write(request):
+            Agent.objects.create(name='New')
+            return HttpResponse()
+
+        def read(request):
+            return HttpResponse(self._name())
+
+        response = ReplicaMiddleware(write)(RequestFactory().post('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(ReplicaMiddleware(read)(request).content, b'Primary')
+        self.assertEqual(ReplicaMiddleware(read)(RequestFactory().get('/')).content, b'Replica')
+
+    def test_posts_without_writes_are_not_pinned(self):
+        def read(request):
+            return HttpResponse(self._name())
+
+        response = ReplicaMiddleware(read)(RequestFactory().post('/'))
+        self.assertEqual(response.content, b'Primary')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
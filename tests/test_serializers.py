@@ -0,0 +1,80 @@
+import datetime
+
+from django.test import TestCase
+from dcat.models import (
+    Agent,
+    Catalog,
+    Checksum,
+    Dataset,
+    DataTheme,
+    Distribution,
+    Keyword,
+    LicenceDocument,
+    MediaType,
+)
+from dcat.serializers import iter_datasets, serialize_catalog
+
+
+class FastSerializerTestCase(TestCase):
+    """Test that the values_list() serializer matches the model to_jsonld()."""
+    def setUp(self):
+        publisher = Agent.objects.create(name='Publisher', type='foaf:Organization')
+        self.catalog = Catalog.objects.create(
+            title='Catalog',
+            description='A catalog',
+            publisher=publisher,
+            homepage='https://example.com',
+        )
+        csv = MediaType.objects.create(extension='CSV', media_type='text/csv')
+        licence = LicenceDocument.objects.create(label='CC-BY')
+        theme = DataTheme.objects.create(code='ECON', label='Economy')
+        keyword = Keyword.objects.create(name='budget', slug='budget')
+
+        for i in range(5):
+            dataset = Dataset.objects.create(
+                title=f'Dataset {i}',
+                description='A dataset' if i % 2 else '',
+                catalog=self.catalog,
+                publisher=publisher if i % 2 else None,
+                modified=datetime.date(2024, 1, i + 1),
+                landing_page='https://example.com/dataset' if i % 2 else '',
+            )
+            if i % 2:
+                dataset.themes.add(theme)
+                dataset.keywords.add(keyword)
+            for j in range(i):
+                Distribution.objects.create(
+                    dataset=dataset,
+                    title=f'Distribution {j}',
+                    external_access_url='https://example.com/access',
+                    external_download_url='https://example.com/file.csv' if j % 2 else '',
+                    format=csv if j % 2 else None,
+                    licence=licence if j % 2 else None,
+                    checksum=Checksum.objects.create(checksum_value='abc', algorithm='md5') if j % 2 else None,
+                )
+
+    def test_serialize_catalog_matches_to_jsonld(self):
+        self.assertEqual(serialize_catalog(self.catalog), self.catalog.to_jsonld())
+
+    def test_key_order_matches_to_jsonld(self):
+        def keys(document):
+            if isinstance(document, dict):
+                return [(key, keys(value)) for key, value in document.items()]
+            if isinstance(document, list):
+                return [keys(value) for value in document]
+            return None
+
+        self.assertEqual(
+            keys(serialize_catalog(self.catalog)), keys(self.catalog.to_jsonld())
+        )
+
+    def test_small_chunks_match_to_jsonld(self):
+        self.assertEqual(
+            serialize_catalog(self.catalog, chunk_size=2), self.catalog.to_jsonld()
+        )
+
+    def test_queries_per_chunk(self):
+        # One query for the datasets and three per chunk for the related objects.
+        with self.assertNumQueries(1 + 3 * 3):
+            results = list(iter_datasets(Dataset.objects.all(), chunk_size=2))
+        self.assertEqual(len(results), 5)
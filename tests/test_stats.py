@@ -0,0 +1,147 @@
+import datetime
+import io
+
+from django.core.management import call_command
+from django.db.models.signals import post_init
+from django.test import TestCase
+from dcat.archive import archive_datasets
+from dcat.models import (
+    Agent,
+    Catalog,
+    CatalogStatistics,
+    Dataset,
+    Distribution,
+    MediaType,
+)
+from dcat.stats import compute_statistics, get_statistics, suspend_statistics_updates
+
+
+class CatalogStatisticsTestCase(TestCase):
+    def setUp(self):
+        publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(title='Catalog', publisher=publisher)
+        self.other = Catalog.objects.create(title='Other', publisher=publisher)
+        self.csv = MediaType.objects.create(extension='CSV')
+        self.json = MediaType.objects.create(extension='JSON')
+        self.dataset = Dataset.objects.create(
+            title='Dataset', catalog=self.catalog, modified=datetime.date(2024, 1, 1)
+        )
+        Distribution.objects.create(
+            dataset=self.dataset, format=self.csv, byte_size=100
+        )
+        # The statistics are computed on the first read.
+        get_statistics(self.catalog)
+        get_statistics(self.other)
+
+    def assertStatistics(self, catalog, **expected):
+        statistics = CatalogStatistics.objects.get(catalog=catalog)
+        (computed,) = compute_statistics([catalog.pk])
+        for name in ('dataset_count', 'distribution_count', 'byte_size', 'formats'):
+            self.assertEqual(getattr(statistics, name), getattr(computed, name), name)
+        for name, value in expected.items():
+            self.assertEqual(getattr(statistics, name), value, name)
+
+    def test_read_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            statistics = get_statistics(self.catalog)
+        self.assertEqual(statistics.dataset_count, 1)
+        self.assertEqual(statistics.formats, {'CSV': 1})
+        self.assertEqual(statistics.last_modified, datetime.date(2024, 1, 1))
+
+    def test_incremental_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dataset = Dataset.objects.create(
+                title='New', catalog=self.catalog, modified='2024-06-01'
+            )
+            Distribution.objects.create(dataset=dataset, format=self.json, byte_size=5)
+            distribution = Distribution.objects.create(dataset=dataset, byte_size=10)
+        self.assertStatistics(
+            self.catalog,
+            dataset_count=2,
+            distribution_count=3,
+            byte_size=115,
+            formats={'CSV': 1, 'JSON': 1},
+            last_modified=datetime.date(2024, 6, 1),
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            distribution.format = self.csv
+            distribution.byte_size = 20
+            distribution.save()
+        self.assertStatistics(
+            self.catalog, byte_size=125, formats={'CSV': 2, 'JSON': 1}
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dataset.delete()
+        self.assertStatistics(
+            self.catalog,
+            dataset_count=1,
+            distribution_count=2,
+            byte_size=25,
+            formats={'CSV': 1, 'JSON': 1},
+        )
+
+    def test_instances_are_not_tracked(self):
+        # Loading rows for the feeds must stay free: only saves read values.
+        self.assertFalse(post_init.has_listeners(Dataset))
+        self.assertFalse(post_init.has_listeners(Distribution))
+
+        dataset = Dataset.objects.get(pk=self.dataset.pk)
+        Dataset.objects.filter(pk=dataset.pk).update(modified='2024-09-01')
+        call_command('rebuild_catalog_statistics', stdout=io.StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            dataset.modified = datetime.date(2024, 2, 1)
+            dataset.save()
+        # The stored date was the newest one, so the date is looked up again.
+        self.assertStatistics(self.catalog, last_modified=datetime.date(2024, 2, 1))
+
+    def test_move_dataset(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dataset.catalog = self.other
+            self.dataset.save()
+        self.assertStatistics(self.catalog, dataset_count=0, formats={})
+        self.assertStatistics(self.other, dataset_count=1, byte_size=100)
+
+    def test_archive(self):
+        archive_datasets(Dataset.objects.filter(pk=self.dataset.pk))
+        self.assertStatistics(
+            self.catalog,
+            dataset_count=0,
+            distribution_count=0,
+            formats={},
+            last_modified=None,
+        )
+
+    def test_newest_dataset_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            newest = Dataset.objects.create(
+                title='New', catalog=self.catalog, modified='2024-06-01'
+            )
+            newer = Dataset.objects.create(
+                title='Newer', catalog=self.catalog, modified='2024-09-01'
+            )
+        self.assertStatistics(self.catalog, last_modified=datetime.date(2024, 9, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            newer.modified = datetime.date(2024, 3, 1)
+            newer.save()
+        self.assertStatistics(self.catalog, last_modified=datetime.date(2024, 6, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            newest.delete()
+        self.assertStatistics(self.catalog, last_modified=datetime.date(2024, 3, 1))
+
+        archive_datasets(Dataset.objects.filter(pk=newer.pk))
+        self.assertStatistics(
+            self.catalog, dataset_count=1, last_modified=datetime.date(2024, 1, 1)
+        )
+
+    def test_suspended_updates_and_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with suspend_statistics_updates():
+                Dataset.objects.create(title='Bulk', catalog=self.catalog)
+        self.assertEqual(get_statistics(self.catalog).dataset_count, 1)
+
+        call_command('rebuild_catalog_statistics', stdout=io.StringIO())
+        self.assertEqual(get_statistics(self.catalog).dataset_count, 2)
@@ -0,0 +1,154 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from dcat.models import Agent, Catalog, Dataset, Distribution, Task
+from dcat.tasks import REGISTRY, claim_task, requeue_stale, run_task, task, work
+
+calls = []
+
+
+@task(name='tests.collect', retry_delay=10)
+def collect(task, ids, fail_on=None):
+    if fail_on in ids:
+        raise ValueError(f'{fail_on} failed')
+    calls.extend(ids)
+    task.set_progress(len(ids), len(ids))
+    return {'count': len(ids)}
+
+
+class TaskQueueTestCase(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        queued = collect.enqueue(ids=[1, 2])
+        self.assertEqual(work(once=True), 1)
+
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.DONE)
+        self.assertEqual(queued.result, {'count': 2})
+        self.assertEqual(queued.percent, 100)
+        self.assertEqual(calls, [1, 2])
+
+    def test_claimed_task_is_not_claimed_again(self):
+        collect.enqueue(ids=[1])
+        self.assertIsNotNone(claim_task('a'))
+        self.assertIsNone(claim_task('b'))
+
+    def test_retry_with_backoff(self):
+        queued = collect.enqueue(ids=[1], fail_on=1)
+        run_task(claim_task('worker'))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.PENDING)
+        self.assertIn('ValueError: 1 failed', queued.error)
+        self.assertGreater(queued.run_after, timezone.now() + datetime.timedelta(seconds=5))
+        # Not due yet.
+        self.assertIsNone(claim_task('worker'))
+
+        for _ in range(2):
+            Task.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+            run_task(claim_task('worker'))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+        self.assertEqual(queued.attempts, 3)
+
+    def test_fan_out(self):
+        parent = collect.fan_out(range(5), chunk_size=2)
+        self.assertEqual(parent.children.count(), 3)
+        work(once=True)
+
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, Task.DONE)
+        self.assertEqual(parent.progress, 3)
+        self.assertEqual(sorted(calls), [0, 1, 2, 3, 4])
+
+    def test_fan_out_fails_when_a_child_fails(self):
+        parent = collect.fan_out(range(4), chunk_size=2, fail_on=3)
+        Task.objects.filter(parent=parent).update(max_attempts=1)
+        work(once=True)
+
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, Task.FAILED)
+        self.assertEqual(calls, [0, 1])
+
+    def test_unknown_task_fails(self):
+        queued = Task.objects.create(name='tests.unknown')
+        work(once=True)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.FAILED)
+        self.assertNotIn('tests.unknown', REGISTRY)
+
+    def test_requeue_stale(self):
+        queued = collect.enqueue(ids=[1])
+        claim_task('dead worker')
+        Task.objects.filter(pk=queued.pk).update(
+            started_at=timezone.now() - datetime.timedelta(hours=2)
+        )
+        self.assertEqual(requeue_stale(datetime.timedelta(hours=1)), 1)
+        self.assertEqual(work(once=True), 1)
+
+    def test_stale_tasks_without_attempts_left_fail(self):
+        parent = collect.fan_out(range(2), chunk_size=1)
+        Task.objects.filter(parent=parent).update(max_attempts=1)
+        claim_task('dead worker')
+        Task.objects.filter(status=Task.RUNNING).update(
+            started_at=timezone.now() - datetime.timedelta(hours=2)
+        )
+        self.assertEqual(requeue_stale(datetime.timedelta(hours=1)), 0)
+        self.assertEqual(work(once=True), 1)
+
+        parent.refresh_from_db()
+        self.assertEqual(parent.status, Task.FAILED)
+        self.assertEqual(
+            parent.children.filter(status=Task.FAILED).get().error,
+            'The worker stopped while running the task.',
+        )
+
+
+class BuiltinTasksTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        media = override_settings(MEDIA_ROOT=os.path.join(tmp.name, 'media'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+        publisher = Agent.objects.create(name='Publisher')
+        self.catalog = Catalog.objects.create(title='Catalog', publisher=publisher)
+        dataset = Dataset.objects.create(title='Dataset', catalog=self.catalog)
+        self.distribution = Distribution(dataset=dataset, title='CSV')
+        self.distribution.file.save('data.csv', ContentFile(b'a,b\n1,2\n'))
+
+    def test_compute_checksums(self):
+        parent = REGISTRY['dcat.compute_checksums'].fan_out([self.distribution.pk], 10)
+        call_command('run_tasks', '--once', stdout=io.StringIO())
+
+        self.distribution.refresh_from_db()
+        self.assertEqual(self.distribution.checksum.algorithm, 'md5')
+        self.assertEqual(
+            self.distribution.checksum.checksum_value,
+            self.distribution.calculate_md5_checksum(),
+        )
+        self.assertEqual(parent.children.get().percent, 100)
+
+    def test_detect_formats_in_background(self):
+        call_command('detect_formats', '--background', stdout=io.StringIO())
+        self.assertEqual(Task.objects.filter(name='dcat.detect_formats').count(), 2)
+        call_command('run_tasks', '--once', stdout=io.StringIO())
+        self.distribution.refresh_from_db()
+        self.assertEqual(self.distribution.byte_size, 8)
+
+    def test_export_jsonld(self):
+        output = os.path.join(self.tmp, 'catalog.jsonld')
+        REGISTRY['dcat.export_jsonld'].enqueue(catalog=self.catalog.pk, output=output)
+        call_command('run_tasks', '--once', stdout=io.StringIO())
+        with open(output) as f:
+            self.assertEqual(json.load(f)['dct:title'], 'Catalog')
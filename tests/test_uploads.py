@@ -0,0 +1,130 @@
+import datetime
+import hashlib
+import io
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from dcat import uploads
+from dcat.models import Agent, Catalog, Dataset, Distribution, UploadSession
+
+
+class UploadTestCase(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(uploads._hashes.clear)
+
+        publisher = Agent.objects.create(name='Publisher')
+        catalog = Catalog.objects.create(title='Catalog', publisher=publisher)
+        self.dataset = Dataset.objects.create(title='Dataset', catalog=catalog)
+        self.distribution = Distribution.objects.create(
+            dataset=self.dataset, title='CSV'
+        )
+        self.content = os.urandom(100_000)
+        user = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        self.client.force_login(user)
+
+    def start(self, size=None):
+        if size is None:
+            size = len(self.content)
+        response = self.client.post(
+            reverse('dcat:upload-start', args=[self.distribution.uuid]),
+            {'filename': 'data.csv', 'size': size},
+        )
+        self.assertEqual(response.status_code, 201)
+        return response['Location']
+
+    def send(self, url, offset, data, **headers):
+        return self.client.patch(
+            url,
+            data,
+            content_type='application/offset+octet-stream',
+            headers={'Upload-Offset': str(offset), **headers},
+        )
+
+    def assertUploaded(self):
+        self.distribution.refresh_from_db()
+        with self.distribution.file.open('rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(self.distribution.byte_size, len(self.content))
+        self.assertEqual(
+            self.distribution.checksum.checksum_value,
+            hashlib.md5(self.content).hexdigest(),
+        )
+
+    def test_upload_in_chunks(self):
+        url = self.start()
+        for offset in range(0, len(self.content), 30_000):
+            response = self.send(url, offset, self.content[offset : offset + 30_000])
+            self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['complete'])
+        self.assertUploaded()
+        self.assertEqual(
+            self.distribution.file.name, f'files/datasets/{self.dataset.pk}/data.csv'
+        )
+
+    def test_wrong_offset(self):
+        url = self.start()
+        self.send(url, 0, self.content[:10])
+        response = self.send(url, 20, self.content[20:30])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Upload-Offset'], '10')
+
+    def test_resume_after_interrupted_chunk(self):
+        url = self.start()
+        self.send(url, 0, self.content[:40_000])
+        session = UploadSession.objects.get()
+        # The connection drops after 5000 of the 40000 bytes of the chunk.
+        stream = io.BytesIO(self.content[40_000:45_000])
+        with self.assertRaises(uploads.IncompleteChunk):
+            uploads.append_chunk(session, 40_000, stream, 40_000)
+
+        response = self.client.head(url)
+        self.assertEqual(response['Upload-Offset'], '40000')
+        self.assertEqual(os.path.getsize(uploads._path(session.name)), 40_000)
+
+        self.send(url, 40_000, self.content[40_000:])
+        self.assertUploaded()
+
+    def test_resume_in_another_process(self):
+        url = self.start()
+        self.send(url, 0, self.content[:50_000])
+        # Another process doesn't have the hash: it is rebuilt from the file.
+        uploads._hashes.clear()
+        self.send(url, 50_000, self.content[50_000:])
+        self.assertUploaded()
+
+    def test_chunk_beyond_size(self):
+        url = self.start(size=10)
+        response = self.send(url, 0, self.content[:20])
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(DCAT_UPLOAD_MAX_CHUNK_SIZE=1000)
+    def test_chunk_too_big(self):
+        url = self.start()
+        response = self.send(url, 0, self.content[:2000])
+        self.assertEqual(response.status_code, 413)
+
+    def test_permission_required(self):
+        url = self.start()
+        self.client.logout()
+        self.assertEqual(self.send(url, 0, self.content).status_code, 403)
+
+    def test_abort_and_expire(self):
+        url = self.start()
+        session = UploadSession.objects.get()
+        path = uploads._path(session.name)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertFalse(os.path.exists(path))
+
+        self.start()
+        old = timezone.now() + datetime.timedelta(hours=1)
+        self.assertEqual(uploads.expire_uploads(old), 1)
+        self.assertFalse(UploadSession.objects.exists())
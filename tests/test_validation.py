@@ -0,0 +1,83 @@
+import io
+import json
+
+from django.core.management import call_command
+from django.test import TestCase
+from dcat.models import Agent, Catalog, Dataset, DataTheme, Distribution, Keyword
+from dcat.validation import validate_catalog
+
+
+class ValidationTestCase(TestCase):
+    def setUp(self):
+        publisher = Agent.objects.create(name='Publisher', type='foaf:Organization')
+        self.catalog = Catalog.objects.create(
+            title='Catalog', description='A catalog', publisher=publisher
+        )
+        theme = DataTheme.objects.create(code='ECON', label='Economy')
+        keyword = Keyword.objects.create(name='kw', slug='kw')
+        for i in range(4):
+            dataset = Dataset.objects.create(
+                title=f'Dataset {i}',
+                description='A dataset' if i else '',
+                catalog=self.catalog,
+                publisher=Agent.objects.create(name=f'Agent {i}') if i % 2 else None,
+            )
+            if i % 2:
+                dataset.themes.add(theme)
+                dataset.keywords.add(keyword)
+            Distribution.objects.create(
+                dataset=dataset, external_access_url='https://example.com' if i else ''
+            )
+        # Objects of another catalog are not counted.
+        other = Catalog.objects.create(title='Other', description='', publisher=publisher)
+        Dataset.objects.create(title='Other dataset', catalog=other)
+
+    def _results(self, report):
+        return {r.rule.name: (r.failures, r.total) for r in report.results}
+
+    def test_validate_catalog(self):
+        report = validate_catalog(self.catalog)
+        results = self._results(report)
+
+        self.assertFalse(report.is_conformant)
+        self.assertEqual(results['Catalog.dct:description'], (0, 1))
+        self.assertEqual(results['Catalog.dcat:themeTaxonomy'], (1, 1))
+        self.assertEqual(results['Dataset.dct:description'], (1, 4))
+        self.assertEqual(results['Dataset.dcat:theme'], (2, 4))
+        self.assertEqual(results['Dataset.dcat:keyword'], (2, 4))
+        self.assertEqual(results['Dataset.dct:publisher'], (2, 4))
+        self.assertEqual(results['Dataset.dcat:distribution'], (0, 4))
+        self.assertEqual(results['Distribution.dcat:accessURL'], (1, 4))
+        self.assertEqual(results['Agent.dct:type'], (2, 3))
+        self.assertEqual(
+            {r.rule.name for r in report.errors},
+            {'Dataset.dct:description', 'Distribution.dcat:accessURL'},
+        )
+
+    def test_access_url_falls_back_to_download_url(self):
+        Distribution.objects.filter(external_access_url='').update(
+            external_download_url='https://example.com/data.csv'
+        )
+        results = self._results(validate_catalog(self.catalog))
+        self.assertEqual(results['Distribution.dcat:accessURL'], (0, 4))
+
+    def test_one_query_per_class(self):
+        with self.assertNumQueries(4):
+            validate_catalog(self.catalog)
+
+    def test_conformant_catalog(self):
+        Dataset.objects.filter(description='').update(description='Fixed')
+        Distribution.objects.filter(external_access_url='').update(
+            external_access_url='https://example.com'
+        )
+        self.assertTrue(validate_catalog(self.catalog).is_conformant)
+
+    def test_validate_catalog_command(self):
+        out = io.StringIO()
+        call_command('validate_catalog', self.catalog.pk, stdout=out)
+        self.assertIn('Dataset.dct:description (mandatory): 1 of 4 missing.', out.getvalue())
+        self.assertIn('does not conform to DCAT-AP', out.getvalue())
+
+        out = io.StringIO()
+        call_command('validate_catalog', self.catalog.pk, json=True, stdout=out)
+        self.assertFalse(json.loads(out.getvalue())['conformant'])
@@ -0,0 +1,116 @@
+import io
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+from dcat.models import DataTheme, LicenceDocument, MediaType
+from dcat.vocabularies import DataThemeVocabulary, FileTypeVocabulary, LicenceVocabulary
+
+
+FILETYPES_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<table>
+  <record deprecated="false" id="CSV">
+    <authority-code>CSV</authority-code>
+    <file-extension>.csv</file-extension>
+    <internet-media-type>text/csv</internet-media-type>
+    <sources><source><description>Comma-separated values</description></source></sources>
+  </record>
+  <record deprecated="false" id="NO_EXT">
+    <authority-code>NO_EXT</authority-code>
+  </record>
+  <record deprecated="false" id="PDF">
+    <authority-code>PDF</authority-code>
+    <file-extension>.pdf</file-extension>
+    <internet-media-type>application/pdf</internet-media-type>
+  </record>
+</table>
+"""
+
+LICENCES_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<table>
+  <record deprecated="false" id="MIT">
+    <authority-code>MIT</authority-code>
+    <label>
+      <lg.version lg="spa">Licencia MIT</lg.version>
+      <lg.version lg="eng">MIT License</lg.version>
+    </label>
+    <url.general>https://opensource.org/licenses/MIT</url.general>
+  </record>
+  <record deprecated="true" id="OLD">
+    <authority-code>OLD</authority-code>
+    <label><lg.version lg="eng">Old licence</lg.version></label>
+  </record>
+</table>
+"""
+
+THEMES_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<table>
+  <record deprecated="false" id="AGRI">
+    <authority-code>AGRI</authority-code>
+    <label><lg.version lg="eng">Agriculture, fisheries, forestry and food</lg.version></label>
+  </record>
+  <record deprecated="false" id="ECON">
+    <authority-code>ECON</authority-code>
+    <label><lg.version lg="eng">Economy and finance</lg.version></label>
+  </record>
+</table>
+"""
+
+
+class VocabularyImportTestCase(TestCase):
+    def test_import_filetypes(self):
+        skipped = []
+        total = FileTypeVocabulary().import_file(io.BytesIO(FILETYPES_XML), on_skip=skipped.append)
+
+        self.assertEqual(total, 2)
+        self.assertEqual(skipped, ['NO_EXT'])
+        csv = MediaType.objects.get(code='CSV')
+        self.assertEqual(csv.extension, '.csv')
+        self.assertEqual(csv.media_type, 'text/csv')
+        self.assertEqual(csv.description, 'Comma-separated values')
+        self.assertEqual(MediaType.objects.get(code='PDF').description, '')
+
+    def test_import_licences_skips_deprecated(self):
+        skipped = []
+        LicenceVocabulary().import_file(io.BytesIO(LICENCES_XML), on_skip=skipped.append)
+
+        self.assertEqual(skipped, ['OLD'])
+        licence = LicenceDocument.objects.get()
+        self.assertEqual(licence.label, 'MIT License')
+        self.assertEqual(licence.url_general, 'https://opensource.org/licenses/MIT')
+        self.assertEqual(licence.url_document, '')
+
+    def test_import_is_an_upsert(self):
+        DataTheme.objects.create(code='AGRI', label='Outdated label')
+        vocabulary = DataThemeVocabulary()
+        vocabulary.batch_size = 1
+
+        vocabulary.import_file(io.BytesIO(THEMES_XML))
+        vocabulary.import_file(io.BytesIO(THEMES_XML))
+
+        self.assertEqual(DataTheme.objects.count(), 2)
+        self.assertEqual(
+            DataTheme.objects.get(code='AGRI').label, 'Agriculture, fisheries, forestry and food'
+        )
+
+    def test_import_queries_per_batch(self):
+        vocabulary = DataThemeVocabulary()
+        with self.assertNumQueries(1):
+            vocabulary.import_file(io.BytesIO(THEMES_XML))
+
+    def test_import_datathemes_command(self):
+        with tempfile.NamedTemporaryFile(suffix='.xml', delete=False) as f:
+            f.write(THEMES_XML)
+        self.addCleanup(os.remove, f.name)
+
+        out = io.StringIO()
+        call_command('import_datathemes', file=f.name, stdout=out)
+
+        self.assertIn('Successfully imported 2 data themes.', out.getvalue())
+        self.assertEqual(DataTheme.objects.count(), 2)
+
+    def test_command_with_missing_file(self):
+        out = io.StringIO()
+        call_command('import_licences', file='does-not-exist.xml', stdout=out)
+        self.assertIn('does-not-exist.xml does not exist', out.getvalue())